@@ -0,0 +1,328 @@
+"""Compile natural-language steps into replayable Fremen action plans.
+
+``StepExtractor.parse_steps`` yields steps such as "open chrome" or "browse
+to chase.com". :class:`PlanCompiler` maps each step to an :class:`Action`,
+a typed call on :class:`fremen.Fremen`. Steps that match a known phrasing
+("click the google search button", "type {q} into the search box") are
+compiled by rules against the template names. Only the rest go to the
+local model, in a single request per task.
+
+:class:`PlanStore` persists compiled plans in a JSON file keyed by the
+normalized task description. :class:`PlanRunner` replays a stored plan
+without any LLM call, and asks the model again only to repair a step that
+fails at runtime.
+"""
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+
+from fremen import llm
+from fremen.core import extract_json
+from fremen.templates import DEFAULT_IMAGES_DIR
+
+from .step_extractor import StepExtractor, normalize_description
+
+# One Fremen call. ``kind`` is a key of ACTIONS, ``params`` its arguments
+# and ``step`` the text it was compiled from.
+Action = namedtuple("Action", "kind params step")
+
+# Action kind -> (required, optional) parameter names.
+ACTIONS = {
+    "activate": ((), ()),
+    "open_url": (("url",), ("ready", "timeout")),
+    "click": (("template",), ("confidence",)),
+    "fill": (("template", "text"), ("confidence",)),
+    "press": (("key",), ()),
+    "wait": (("seconds",), ()),
+    "capture": ((), ()),
+}
+
+KEYS = ("enter", "tab", "escape", "backspace", "down", "up", "space")
+
+_URL = r"((?:https?://)?[\w-]+(?:\.[\w-]+)+(?:/\S*)?)"
+_RULES = [
+    ("activate", re.compile(r"^(?:open|launch|start|switch to|activate|focus)\s+"
+                            r"(?:the\s+)?(?:google\s+)?chrome(?:\s+browser)?$")),
+    ("open_url", re.compile(r"^(?:go|browse|navigate|open|visit|load)\s+(?:to\s+)?"
+                            r"(?:the\s+)?(?:website\s+|page\s+|url\s+)?" + _URL + r"$")),
+    ("press", re.compile(r"^(?:press|hit)\s+(?:the\s+)?(" + "|".join(KEYS) + r")(?:\s+key)?$")),
+    ("wait", re.compile(r"^wait\s+(?:for\s+)?(\d+(?:\.\d+)?)\s*(?:s|sec|secs|seconds?)?$")),
+    ("capture", re.compile(r"^(?:copy|capture|read|extract|get|grab)\s+(?:all\s+)?"
+                           r"(?:of\s+)?(?:the\s+)?(?:page\s+)?(?:text|content|contents)"
+                           r"(?:\s+of\s+the\s+page)?$")),
+    ("fill", re.compile(r"^(?:type|enter|fill in|input|write)\s+['\"]?(.+?)['\"]?\s+"
+                        r"(?:in|into|in the|into the)\s+(.+)$")),
+    ("click", re.compile(r"^(?:click|press|tap|select|choose)\s+(?:on\s+)?(.+)$")),
+]
+
+COMPILE_PROMPT = """Translate each browser step into one action.
+Actions (JSON objects, parameters in brackets):
+- {{"action": "activate"}} bring the Chrome window to the front
+- {{"action": "open_url", "url": ...}} open a URL in the current tab
+- {{"action": "click", "template": ...}} click an element shown by a template
+- {{"action": "fill", "template": ..., "text": ...}} click a field and type text
+- {{"action": "press", "key": ...}} press a key ({keys})
+- {{"action": "wait", "seconds": ...}}
+- {{"action": "capture"}} copy the text of the page
+Templates: {templates}
+{context}Steps:
+{steps}
+Answer with a ```json fenced list holding exactly one action per step, in order."""
+
+
+class PlanError(Exception):
+    """A step could not be compiled or kept failing after repair."""
+
+
+class StepFailed(Exception):
+    """An action could not be carried out on the screen."""
+
+
+def _words(text: str) -> list:
+    return re.findall(r"[a-z]+", text.lower())
+
+
+def _template_names(templates) -> list:
+    if templates is not None:
+        return list(templates.names()) if hasattr(templates, "names") else list(templates)
+    if not os.path.isdir(DEFAULT_IMAGES_DIR):
+        return []
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(DEFAULT_IMAGES_DIR)
+                  if name.endswith(".png"))
+
+
+def validate(action: dict, step: str) -> Action:
+    """Return ``action`` (a dict with an ``"action"`` key) as an :class:`Action`."""
+    if not isinstance(action, dict) or action.get("action") not in ACTIONS:
+        raise PlanError(f"Step {step!r} compiled to an unknown action: {action!r}")
+    kind = action["action"]
+    required, optional = ACTIONS[kind]
+    params = {key: value for key, value in action.items() if key != "action"}
+    missing = [key for key in required if key not in params]
+    unknown = sorted(set(params) - set(required) - set(optional))
+    if missing or unknown:
+        raise PlanError(f"Step {step!r}: {kind} needs {', '.join(required) or 'no parameters'}, "
+                        f"got {', '.join(sorted(params)) or 'none'}")
+    return Action(kind, params, step)
+
+
+class PlanCompiler:
+    """Map steps to actions by rules, falling back to ``model``.
+
+    ``templates`` is a ``TemplateRegistry`` or a list of template names;
+    by default the PNGs shipped in ``images/``. ``llm_calls`` counts the
+    model requests made.
+    """
+
+    def __init__(self, templates=None, gateway=None, model: str = "llama3.1:8b",
+                 priority: int = llm.INTERACTIVE, timeout: float = 120.0):
+        self.templates = _template_names(templates)
+        self._gateway = gateway
+        self.model = model
+        self.priority = priority
+        self.timeout = timeout
+        self.llm_calls = 0
+        self._template_words = {
+            name: {w for w in _words(name)} for name in self.templates
+        }
+
+    @property
+    def gateway(self):
+        return self._gateway or llm.default_gateway()
+
+    def match_template(self, text: str):
+        """The template whose name's words all appear in ``text``, or None.
+
+        Prefers the name with the most words; ``google_search`` beats
+        ``search`` for "the google search button".
+        """
+        words = set(_words(text))
+        best = None
+        for name, name_words in self._template_words.items():
+            if name_words and name_words <= words:
+                if best is None or len(name_words) > len(self._template_words[best]):
+                    best = name
+        return best
+
+    def compile_rule(self, step: str):
+        """The action ``step`` compiles to by rules, or None."""
+        text = step.strip().rstrip(".").strip()
+        lowered = text.lower()
+        for kind, pattern in _RULES:
+            match = pattern.match(lowered)
+            if match is None:
+                continue
+            if kind in ("activate", "capture"):
+                return Action(kind, {}, step)
+            if kind == "open_url":
+                # Keep the URL's original case.
+                start, end = match.span(1)
+                return Action(kind, {"url": text[start:end]}, step)
+            if kind == "press":
+                return Action(kind, {"key": match.group(1)}, step)
+            if kind == "wait":
+                return Action(kind, {"seconds": float(match.group(1))}, step)
+            template = self.match_template(match.group(match.lastindex))
+            if template is None:
+                return None
+            if kind == "fill":
+                start, end = match.span(1)
+                return Action(kind, {"template": template, "text": text[start:end]}, step)
+            return Action(kind, {"template": template}, step)
+        return None
+
+    def _ask(self, steps: list, context: str = "") -> list:
+        prompt = COMPILE_PROMPT.format(
+            keys=", ".join(KEYS),
+            templates=", ".join(self.templates) or "none",
+            context=context,
+            steps="\n".join(f"{i}. {step}" for i, step in enumerate(steps, 1)),
+        )
+        self.llm_calls += 1
+        answer = self.gateway.ask(self.model, prompt, priority=self.priority,
+                                  timeout=self.timeout)
+        actions = extract_json(answer)
+        if not isinstance(actions, list) or len(actions) != len(steps):
+            raise PlanError(f"The model did not return one action per step: {answer[:200]!r}")
+        return [validate(action, step) for action, step in zip(actions, steps)]
+
+    def compile(self, steps: list) -> list:
+        """Compile ``steps`` in order; at most one model request for all of them."""
+        plan = [self.compile_rule(step) for step in steps]
+        unknown = [step for step, action in zip(steps, plan) if action is None]
+        if unknown:
+            asked = iter(self._ask(unknown))
+            plan = [action if action is not None else next(asked) for action in plan]
+        return plan
+
+    def repair(self, plan: list, index: int, error: Exception) -> Action:
+        """Ask the model for a replacement of ``plan[index]``, which failed."""
+        failed = plan[index]
+        context = (
+            "Earlier steps: " + "; ".join(a.step for a in plan[:index]) + "\n"
+            if index else ""
+        ) + (f"The action {json.dumps({'action': failed.kind, **failed.params})} "
+             f"failed with: {error}. Choose a different action.\n")
+        (action,) = self._ask([failed.step], context)
+        return action
+
+
+def to_dict(action: Action) -> dict:
+    return {"action": action.kind, **action.params, "step": action.step}
+
+
+def from_dict(data: dict) -> Action:
+    data = dict(data)
+    step = data.pop("step", "")
+    return validate(data, step)
+
+
+class PlanStore:
+    """Compiled plans in a JSON file, keyed by normalized task description."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._plans = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                self._plans = json.load(fh)
+
+    def get(self, description: str):
+        """The stored plan of ``description``, or None."""
+        plan = self._plans.get(normalize_description(description))
+        return None if plan is None else [from_dict(a) for a in plan["actions"]]
+
+    def put(self, description: str, plan: list) -> None:
+        with self._lock:
+            self._plans[normalize_description(description)] = {
+                "description": description,
+                "actions": [to_dict(a) for a in plan],
+            }
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self._plans, fh, indent=1)
+            os.replace(tmp, self.path)
+
+    def __contains__(self, description) -> bool:
+        return normalize_description(description) in self._plans
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+def execute(fremen, action: Action):
+    """Carry out ``action`` on ``fremen``; returns the captured text for ``capture``."""
+    params = action.params
+    if action.kind == "activate":
+        if not fremen.activate_chrome():
+            raise StepFailed("Chrome window not found")
+    elif action.kind == "open_url":
+        fremen.open_url(params["url"])
+        ready = params.get("ready")
+        if ready and not fremen.wait_until_ready(ready, params.get("timeout")):
+            raise StepFailed(f"{ready} did not appear after opening {params['url']}")
+    elif action.kind in ("click", "fill"):
+        if not fremen.click(params["template"], params.get("confidence", 0.9)):
+            raise StepFailed(f"{params['template']} not found on screen")
+        if action.kind == "fill":
+            fremen.type_text(params["text"], clear=True)
+    elif action.kind == "press":
+        fremen.press(params["key"])
+    elif action.kind == "wait":
+        fremen.wait(params["seconds"])
+    elif action.kind == "capture":
+        return fremen.select_all_and_return()
+    return None
+
+
+class PlanRunner:
+    """Run tasks from their stored plans, compiling and repairing as needed.
+
+    ``run(description)`` replays the stored plan with no model request.
+    A new task is turned into steps by ``extractor`` and compiled once.
+    A step that raises :class:`StepFailed` is repaired by the compiler and
+    retried once; the repaired plan is stored on success.
+    """
+
+    def __init__(self, fremen, store: PlanStore, compiler: PlanCompiler = None,
+                 extractor: StepExtractor = None):
+        self.fremen = fremen
+        self.store = store
+        self.compiler = compiler or PlanCompiler(fremen.templates, fremen.gateway)
+        self.extractor = extractor or StepExtractor(gateway=fremen.gateway)
+
+    def plan(self, description: str) -> list:
+        """The stored plan of ``description``, compiling and storing it if needed."""
+        plan = self.store.get(description)
+        if plan is None:
+            steps = self.extractor.parse_steps(
+                self.extractor.generate_instructions(description)
+            )
+            if not steps:
+                raise PlanError(f"No steps were generated for {description!r}")
+            plan = self.compiler.compile(steps)
+            self.store.put(description, plan)
+        return plan
+
+    def run(self, description: str) -> list:
+        """Run the task and return the texts of its ``capture`` actions."""
+        plan = self.plan(description)
+        captured, repaired = [], False
+        for index in range(len(plan)):
+            try:
+                result = execute(self.fremen, plan[index])
+            except StepFailed as exc:
+                plan[index] = self.compiler.repair(plan, index, exc)
+                repaired = True
+                try:
+                    result = execute(self.fremen, plan[index])
+                except StepFailed as again:
+                    raise PlanError(f"Step {plan[index].step!r} failed after repair: {again}") from again
+            if plan[index].kind == "capture":
+                captured.append(result)
+        if repaired:
+            self.store.put(description, plan)
+        return captured
@@ -1,46 +1,152 @@
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 try:
     import openai
 except ImportError:  # pragma: no cover - optional dependency
     openai = None
 
-from fremen import Fremen
+from fremen import Fremen, llm
+
+PROMPT = (
+    "Provide numbered step-by-step instructions for the following task:\n"
+    "{description}\n"
+    "Respond with a short numbered list."
+)
+
+
+def normalize_description(description: str) -> str:
+    """Case and whitespace-insensitive form of a task description."""
+    return " ".join(description.split()).lower()
+
 
 class StepExtractor:
-    """Generate step-by-step instructions for website tasks using an LLM."""
-    def __init__(self, model: str = "gpt-3.5-turbo"):
+    """Generate step-by-step instructions for website tasks using an LLM.
+
+    OpenAI is asked through one client created on first use. When it has
+    not answered after ``hedge_after`` seconds (or failed), the same prompt
+    also goes to ``local_model`` through the LLM gateway and the first
+    answer wins; ``timeout`` bounds the whole call. Instructions are cached
+    per normalized description and the model that gave them, ``cache_size``
+    entries at most.
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo", local_model: str = "llama3.1:8b",
+                 client=None, gateway=None, hedge_after: float = 3.0,
+                 timeout: float = 120.0, cache_size: int = 512):
         self.model = model
-        self.fremen = Fremen()
+        self.local_model = local_model
+        self.fremen = Fremen(gateway=gateway)
+        self.hedge_after = hedge_after
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._client = client
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def gateway(self):
+        return self.fremen.gateway or llm.default_gateway()
+
+    def _openai_client(self):
+        with self._lock:
+            if self._client is None:
+                if openai is None or not hasattr(openai, "OpenAI"):
+                    raise ImportError("openai>=1.0 is required for this feature")
+                if not os.getenv("OPENAI_API_KEY"):
+                    raise ValueError("OPENAI_API_KEY environment variable not set")
+                self._client = openai.OpenAI(timeout=self.timeout)
+            return self._client
 
     def _call_openai(self, prompt: str) -> str:
-        if openai is None:
-            raise ImportError("openai package is required for this feature")
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        openai.api_key = api_key
-        response = openai.ChatCompletion.create(
+        response = self._openai_client().chat.completions.create(
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
         )
-        return response.choices[0].message["content"].strip()
+        return response.choices[0].message.content.strip()
 
-    def generate_instructions(self, description: str, use_openai: bool = True) -> str:
-        """Return raw LLM output describing how to perform the task."""
-        prompt = (
-            "Provide numbered step-by-step instructions for the following task:\n"
-            f"{description}\n"
-            "Respond with a short numbered list."
+    def _submit_openai(self, prompt: str):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="openai")
+            return self._executor.submit(self._call_openai, prompt)
+
+    def _submit_local(self, prompt: str, priority: int):
+        return self.gateway.submit(
+            self.local_model, [{"role": "user", "content": prompt}], priority=priority
         )
+
+    def _cached(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _store(self, key, text: str) -> None:
+        with self._lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _hedged(self, prompt: str, priority: int) -> tuple:
+        """Return the first answer and the model that gave it."""
+        deadline = time.monotonic() + self.timeout
+        remote = self._submit_openai(prompt)
+        done, _ = wait([remote], timeout=min(self.hedge_after, self.timeout))
+        if done and remote.exception() is None:
+            return remote.result(), self.model
+        models = {remote: self.model, self._submit_local(prompt, priority): self.local_model}
+        pending, error = set(models), None
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"No model answered within {self.timeout:g}s")
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), models[future]
+                error = future.exception()
+        raise error
+
+    def generate_instructions(self, description: str, use_openai: bool = True,
+                              priority: int = llm.INTERACTIVE) -> str:
+        """Return raw LLM output describing how to perform the task."""
+        normalized = normalize_description(description)
+        text = self._cached((normalized, self.model if use_openai else self.local_model))
+        if text is not None:
+            return text
+        prompt = PROMPT.format(description=description)
         if use_openai:
-            try:
-                return self._call_openai(prompt)
-            except Exception:
-                pass
-        # Fallback to Fremen.ask if OpenAI fails
-        return self.fremen.ask(question=prompt)
+            text, model = self._hedged(prompt, priority)
+        else:
+            text = self._submit_local(prompt, priority).result(self.timeout)
+            model = self.local_model
+        self._store((normalized, model), text)
+        return text
+
+    def generate_many(self, descriptions: list, concurrency: int = 4,
+                      use_openai: bool = True) -> list:
+        """Instructions for each description, in order, ``concurrency`` at a time.
+
+        Descriptions that normalize to the same text are generated once.
+        Local model requests are queued at batch priority.
+        """
+        unique = {}
+        for description in descriptions:
+            unique.setdefault(normalize_description(description), description)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            texts = dict(zip(unique, pool.map(
+                lambda d: self.generate_instructions(d, use_openai, llm.BATCH),
+                unique.values(),
+            )))
+        return [texts[normalize_description(d)] for d in descriptions]
 
     def parse_steps(self, text: str) -> list:
         """Parse numbered steps from text and return them as a list."""
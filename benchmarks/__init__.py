@@ -0,0 +1,10 @@
+# benchmarks/__init__.py
+"""Performance benchmarks for the Fremen library and workflow server.
+
+Run ``python -m benchmarks.run`` from the repository root.
+"""
+import os
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES_DIR = os.path.join(REPO_ROOT, "images")
+SERVER_DIR = os.path.join(REPO_ROOT, "ui", "my_fremen_project", "server")
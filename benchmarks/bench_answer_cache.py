@@ -0,0 +1,43 @@
+# benchmarks/bench_answer_cache.py
+"""Answer cache lookups over many stored pages.
+
+Each stored page is a short synthetic docket. Hits look up a stored page
+with an ad appended (a near-duplicate), misses a page never stored.
+"""
+import random
+
+from benchmarks.harness import benchmark, time_call
+from fremen.answer_cache import AnswerCache, normalize_content, simhash
+
+TEMPLATE = "when is the lastest filing date in this document: {content}"
+WORDS = ("motion order notice declaration filed by plaintiff defendant court "
+         "hearing continued judgment entered case number superior county").split()
+
+
+def _page(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(1000)) for _ in range(250))
+
+
+@benchmark("answer_cache", requires=("numpy",))
+def bench_answer_cache(report):
+    rng = random.Random(0)
+    page = _page(rng)
+    report.add("answer_cache.simhash_page", time_call(
+        lambda: simhash(normalize_content(page)), number=200) * 1e6, "us")
+
+    for size in (10_000, 50_000):
+        cache = AnswerCache()
+        pages = [_page(rng) for _ in range(size)]
+        for i, text in enumerate(pages):
+            cache.put("m", TEMPLATE, text, str(i))
+        near = [text + " advertisement call now" for text in pages[:100]]
+        fresh = [_page(rng) for _ in range(100)]
+
+        seconds = time_call(lambda: [cache.get("m", TEMPLATE, t) for t in near]) / len(near)
+        report.add(f"answer_cache.{size}.near_hit", seconds * 1e6, "us")
+        seconds = time_call(lambda: [cache.get("m", TEMPLATE, t) for t in fresh]) / len(fresh)
+        report.add(f"answer_cache.{size}.miss", seconds * 1e6, "us")
+        report.add(f"answer_cache.{size}.near_hit_rate",
+                   sum(cache.get("m", TEMPLATE, t) is not None for t in near) / len(near), "ratio",
+                   higher_is_better=True)
+        cache.close()
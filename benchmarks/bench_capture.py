@@ -0,0 +1,32 @@
+# benchmarks/bench_capture.py
+"""Captures per second and bytes allocated per capture for each backend."""
+import os
+
+from benchmarks.harness import benchmark, peak_allocation, time_call
+from fremen.capture import PyAutoGuiCapture, XShmCapture
+
+
+@benchmark("capture", requires=("numpy",))
+def bench_capture(report):
+    if not os.environ.get("DISPLAY"):
+        raise RuntimeError("DISPLAY is not set")
+    backends = []
+    for name, factory in (("xshm", XShmCapture), ("pyautogui", PyAutoGuiCapture)):
+        try:
+            backends.append((name, factory()))
+        except (ImportError, OSError, RuntimeError):
+            continue
+
+    for name, backend in backends:
+        with backend:
+            region = (0, 0, min(800, backend.width), min(600, backend.height))
+            cases = [
+                ("full", lambda: backend.grab()),
+                ("full_gray", lambda: backend.grab(gray=True)),
+                ("region", lambda: backend.grab(region=region)),
+            ]
+            for case, func in cases:
+                seconds = time_call(func, number=10)
+                report.add(f"capture.{name}.{case}.per_s", 1 / seconds, "captures/s", True)
+                report.add(f"capture.{name}.{case}.alloc_kb",
+                           peak_allocation(func) / 1024, "KiB")
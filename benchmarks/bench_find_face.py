@@ -0,0 +1,37 @@
+# benchmarks/bench_find_face.py
+"""Face detection time for the crop step of ``Fremen.find_face``."""
+import os
+import tempfile
+
+from benchmarks import IMAGES_DIR
+from benchmarks.bench_locate import synthetic_screen
+from benchmarks.harness import benchmark, time_call
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+try:
+    from retinaface import RetinaFace
+except ImportError:  # pragma: no cover - optional dependency
+    RetinaFace = None
+
+
+@benchmark("find_face", requires=("numpy", "cv2", "retinaface"))
+def bench_find_face(report):
+    face = cv2.imread(os.path.join(IMAGES_DIR, "test.png"), cv2.IMREAD_COLOR)
+    screen = synthetic_screen(1920, 1080, face)
+    with tempfile.TemporaryDirectory() as tmp:
+        # find_face round-trips the screenshot through a PNG on disk.
+        path = os.path.join(tmp, "screen.png")
+        cv2.imwrite(path, screen)
+
+        # The first call loads the model weights; report it separately.
+        seconds = time_call(lambda: RetinaFace.extract_faces(img_path=path, align=False), repeat=1)
+        report.add("find_face.first_call", seconds * 1e3, "ms")
+
+        seconds = time_call(lambda: RetinaFace.extract_faces(img_path=path, align=False), repeat=3)
+        report.add("find_face.detect_from_file", seconds * 1e3, "ms")
+        seconds = time_call(lambda: RetinaFace.extract_faces(img_path=screen, align=False), repeat=3)
+        report.add("find_face.detect_from_array", seconds * 1e3, "ms")
@@ -0,0 +1,30 @@
+# benchmarks/bench_gui_env.py
+"""Steps per second of the simulated GUI environment under random actions."""
+from benchmarks.harness import benchmark, time_call
+from fremen.gui_env import VectorGUIEnv, random_site, template_names
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+STEPS = 50
+
+
+@benchmark("gui_env", requires=("numpy",))
+def bench_gui_env(report):
+    rng = np.random.default_rng(0)
+    sites = [random_site(rng, template_names()) for _ in range(16)]
+    for observation in ("elements", "pixels"):
+        for num_envs in (1, 64, 1024):
+            env = VectorGUIEnv(sites, num_envs=num_envs, observation=observation, seed=0)
+            env.reset()
+            actions = env.rng.integers(env.num_actions, size=(STEPS, num_envs))
+
+            def run():
+                for batch in actions:
+                    env.step(batch)
+
+            seconds = time_call(run, number=3)
+            report.add(f"gui_env.{observation}_{num_envs}.steps_per_s",
+                       STEPS * num_envs / seconds, "steps/s", higher_is_better=True)
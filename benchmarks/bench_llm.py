@@ -0,0 +1,47 @@
+# benchmarks/bench_llm.py
+"""LLM client overhead measured against a local stub model server."""
+import json
+import urllib.request
+
+from benchmarks.harness import benchmark, time_call
+from benchmarks.stub_llm import StubLLMServer
+from fremen.llm import LLMGateway
+
+try:
+    import ollama
+except ImportError:  # pragma: no cover - optional dependency
+    ollama = None
+
+MESSAGES = [{"role": "user", "content": "Is the sky blue?"}]
+
+
+def _raw_chat(url: str):
+    body = json.dumps({"model": "stub", "messages": MESSAGES, "stream": False}).encode()
+    request = urllib.request.Request(
+        url + "/api/chat", data=body, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())["message"]["content"]
+
+
+@benchmark("llm_client")
+def bench_llm_client(report):
+    with StubLLMServer() as stub:
+        # A bare HTTP round trip is the floor any client can reach.
+        raw = time_call(lambda: _raw_chat(stub.url), number=20)
+        report.add("llm.raw_http_round_trip", raw * 1e3, "ms")
+
+        if ollama is not None:
+            client = ollama.Client(host=stub.url)
+            seconds = time_call(
+                lambda: client.chat(model="stub", messages=MESSAGES), number=20
+            )
+            report.add("llm.ollama_client_round_trip", seconds * 1e3, "ms")
+            report.add("llm.ollama_client_overhead", (seconds - raw) * 1e3, "ms")
+
+        # The gateway reuses its connection, so it may beat the raw round trip.
+        gateway = LLMGateway(stub.url)
+        seconds = time_call(lambda: gateway.chat("stub", MESSAGES), number=20)
+        gateway.shutdown()
+        report.add("llm.gateway_round_trip", seconds * 1e3, "ms")
+        report.add("llm.gateway_overhead", (seconds - raw) * 1e3, "ms")
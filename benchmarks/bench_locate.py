@@ -0,0 +1,57 @@
+# benchmarks/bench_locate.py
+"""Template locate latency per template and screen size."""
+import os
+
+from benchmarks import IMAGES_DIR
+from benchmarks.harness import benchmark, time_call
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+SCREEN_SIZES = [(1280, 720), (1920, 1080), (2560, 1440)]
+
+
+def synthetic_screen(width: int, height: int, template, seed: int = 0):
+    """Return a noisy BGR screen with ``template`` pasted near the centre."""
+    rng = np.random.default_rng(seed)
+    screen = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    th, tw = template.shape[:2]
+    top, left = (height - th) // 2, (width - tw) // 2
+    screen[top:top + th, left:left + tw] = template
+    return screen
+
+
+def _locate(template, screen, confidence: float = 0.9):
+    # Same work pyscreeze does for pyautogui.locateOnScreen when OpenCV is
+    # installed: a colour TM_CCOEFF_NORMED match over the whole screen.
+    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_loc if max_val >= confidence else None
+
+
+def template_paths():
+    return sorted(
+        os.path.join(IMAGES_DIR, name)
+        for name in os.listdir(IMAGES_DIR)
+        if name.endswith(".png")
+    )
+
+
+@benchmark("locate", requires=("numpy", "cv2"))
+def bench_locate(report):
+    for path in template_paths():
+        template = cv2.imread(path, cv2.IMREAD_COLOR)
+        name = os.path.splitext(os.path.basename(path))[0]
+        for width, height in SCREEN_SIZES:
+            if template.shape[0] > height or template.shape[1] > width:
+                continue
+            screen = synthetic_screen(width, height, template)
+            seconds = time_call(lambda: _locate(template, screen), repeat=3)
+            report.add(f"locate.{name}.{width}x{height}", seconds * 1e3, "ms")
@@ -0,0 +1,77 @@
+# benchmarks/bench_map.py
+"""Throughput of map nodes against a node looping over its list serially.
+
+Each element call sleeps for ``ELEMENT_SECONDS``, standing in for a court
+search; the map node runs them in sandbox workers at several concurrencies.
+A second case maps trivial elements to show what chunking saves in
+per-call sandbox overhead.
+"""
+import json
+
+from benchmarks.bench_server import server_client
+from benchmarks.harness import benchmark, time_call
+
+ELEMENTS = 64
+ELEMENT_SECONDS = 0.01
+TRIVIAL_ELEMENTS = 2000
+
+LIST_CODE = "def run(inputs, config):\n    return list(range(config['n']))\n"
+ELEMENT_CODE = (
+    "def run(inputs, config):\n"
+    "    import time\n"
+    "    time.sleep(config['sleep'])\n"
+    "    return inputs[0] * 2\n"
+)
+LOOP_CODE = (
+    "def run(inputs, config):\n"
+    "    import time\n"
+    "    out = []\n"
+    "    for x in inputs[0]:\n"
+    "        time.sleep(config['sleep'])\n"
+    "        out.append(x * 2)\n"
+    "    return out\n"
+)
+
+
+def create_pair_workflow(client, list_config: dict, code: str, config: dict) -> int:
+    """Create ``list -> node`` and return the workflow id."""
+    type_ids = [
+        client.post("/api/node_types", json={"name": name, "code": source}).get_json()["node_type_id"]
+        for name, source in (("list", LIST_CODE), ("element", code))
+    ]
+    workflow_id = client.post("/api/workflows", json={"name": "map"}).get_json()["workflow_id"]
+    client.put(f"/api/workflows/{workflow_id}", json={
+        "nodes": [
+            {"id": "list", "node_type_id": type_ids[0], "config": json.dumps(list_config)},
+            {"id": "node", "node_type_id": type_ids[1], "config": json.dumps(config)},
+        ],
+        "edges": [{"source": "list", "target": "node"}],
+    })
+    return workflow_id
+
+
+@benchmark("map", requires=("flask", "flask_sqlalchemy", "flask_cors", "networkx", "passlib"))
+def bench_map(report):
+    with server_client() as (app, client):
+        items = {"n": ELEMENTS}
+        cases = [("serial_loop", LOOP_CODE, {"sleep": ELEMENT_SECONDS})]
+        cases += [
+            (f"concurrency_{c}", ELEMENT_CODE,
+             {"sleep": ELEMENT_SECONDS, "map": {"concurrency": c, "chunk_size": 1}})
+            for c in (1, 4, 8)
+        ]
+        trivial = {"n": TRIVIAL_ELEMENTS}
+        chunked = [
+            (f"trivial.chunk_{size}", ELEMENT_CODE,
+             {"sleep": 0, "map": {"concurrency": 4, "chunk_size": size}})
+            for size in (1, 50, 500)
+        ]
+        for name, code, config in cases + chunked:
+            list_config = trivial if name.startswith("trivial") else items
+            workflow_id = create_pair_workflow(client, list_config, code, config)
+            url = f"/api/workflows/{workflow_id}/run"
+            body = {"wait": True, "force": True, "pool": "sandbox"}
+            seconds = time_call(lambda: client.post(url, json=body), number=3)
+            report.add(f"map.{name}", seconds * 1e3, "ms")
+    from workflow_executor import shutdown_pools
+    shutdown_pools()
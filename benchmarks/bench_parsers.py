@@ -0,0 +1,63 @@
+# benchmarks/bench_parsers.py
+"""Throughput of ``extract_json`` and the court-page regex parsers."""
+import json
+
+from benchmarks.harness import benchmark, time_call
+from fremen import extract_json
+from fremen.parsers import (
+    extract_between_multilines,
+    extract_first_entry,
+    extract_number,
+)
+
+CONTENT_BEGIN = "\nView\tCase Number\tCase Style\tCase Status\tCase Type\tFiling Date\n"
+CONTENT_END = "\nShowing \n"
+
+
+def llm_json_answer(lawyers: int) -> str:
+    """Return an LLM-style answer wrapping a JSON list in a fenced block."""
+    payload = [
+        {"firstName": f"First{i}", "lastName": f"Last{i}"}
+        for i in range(lawyers)
+    ]
+    return (
+        "Here is the list you asked for:\n\n"
+        "```json\n" + json.dumps(payload, indent=2) + "\n```\n\n"
+        "Let me know if you need anything else."
+    )
+
+
+def court_page(rows: int) -> str:
+    """Return text shaped like a copied scscourt.org party search page."""
+    lines = [
+        "Superior Court of California, County of Santa Clara",
+        "Party Search",
+        CONTENT_BEGIN.strip(),
+    ]
+    for i in range(rows):
+        lines.append(
+            f"View\t23FL{i:06d}\tSMITH VS JONES\tActive\tFamily Law\t01/{i % 28 + 1:02d}/2023"
+        )
+    lines.append(f"Showing 1 to {min(rows, 10)} of {rows} entries")
+    return "\n\n".join(lines)
+
+
+@benchmark("parsers")
+def bench_parsers(report):
+    for lawyers in (10, 1000):
+        text = llm_json_answer(lawyers)
+        seconds = time_call(lambda: extract_json(text), number=20)
+        report.add(f"extract_json.{lawyers}.calls_per_s", 1 / seconds, "calls/s", True)
+        report.add(f"extract_json.{lawyers}.mb_per_s", len(text) / seconds / 1e6, "MB/s", True)
+
+    page = court_page(500)
+    row = "Header\nSMITHJOHNA.SMITH VS JONES23FL000123FL01/02/2023"
+    cases = [
+        ("extract_number", lambda: extract_number(page)),
+        ("extract_first_entry", lambda: extract_first_entry(row)),
+        ("extract_between_multilines",
+         lambda: extract_between_multilines(CONTENT_BEGIN, CONTENT_END, page)),
+    ]
+    for name, func in cases:
+        seconds = time_call(func, number=200)
+        report.add(f"parsers.{name}", seconds * 1e6, "us")
@@ -0,0 +1,37 @@
+# benchmarks/bench_phash.py
+"""Perceptual hashing cost and near-duplicate lookup over a large index."""
+import os
+import random
+
+from benchmarks import IMAGES_DIR
+from benchmarks.harness import benchmark, time_call
+from fremen.phash import HashIndex, dhash, hamming, phash
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+
+@benchmark("phash", requires=("numpy", "cv2"))
+def bench_phash(report):
+    face = cv2.cvtColor(cv2.imread(os.path.join(IMAGES_DIR, "test.png")), cv2.COLOR_BGR2RGB)
+    report.add("phash.dhash", time_call(lambda: dhash(face), number=100) * 1e6, "us")
+    report.add("phash.phash", time_call(lambda: phash(face), number=100) * 1e6, "us")
+
+    rng = random.Random(0)
+    for size in (10_000, 50_000):
+        values = [rng.getrandbits(64) for _ in range(size)]
+        index = HashIndex(max_distance=6)
+        for i, value in enumerate(values):
+            index.add(i, value)
+        queries = [v ^ (1 << rng.randrange(64)) for v in values[:100]]
+        misses = [rng.getrandbits(64) for _ in range(100)]
+
+        seconds = time_call(lambda: [index.find(q) for q in queries]) / len(queries)
+        report.add(f"phash.index_{size}.hit", seconds * 1e6, "us")
+        seconds = time_call(lambda: [index.find(q) for q in misses]) / len(misses)
+        report.add(f"phash.index_{size}.miss", seconds * 1e6, "us")
+        # Reference point: comparing against every stored hash.
+        seconds = time_call(lambda: [hamming(queries[0], v) <= 6 for v in values], repeat=3)
+        report.add(f"phash.linear_scan_{size}", seconds * 1e6, "us")
@@ -0,0 +1,63 @@
+# benchmarks/bench_plans.py
+"""Cost of ordering a workflow: per-run networkx sorting vs. compiled plans.
+
+For random DAGs of 10 to 10,000 nodes, times what each run used to do
+(build an ``nx.DiGraph``, check it is acyclic, sort it and ask every node
+for its predecessors), compiling an execution plan, loading a stored plan
+and a plan cache hit.
+"""
+import random
+import sys
+from types import SimpleNamespace
+
+from benchmarks import SERVER_DIR
+from benchmarks.harness import benchmark, time_call
+
+SIZES = (10, 100, 1000, 10_000)
+
+
+def random_dag(size: int, fan_in: int = 3, seed: int = 0):
+    """Return node ids and edges of a DAG where each node reads a few earlier ones."""
+    rng = random.Random(seed)
+    node_ids = list(range(1, size + 1))
+    edges = [
+        (rng.randrange(1, target), target)
+        for target in node_ids[1:]
+        for _ in range(rng.randint(1, fan_in))
+    ]
+    return node_ids, edges
+
+
+def networkx_order(node_ids, edges):
+    import networkx as nx
+    graph = nx.DiGraph()
+    graph.add_nodes_from(node_ids)
+    graph.add_edges_from(edges)
+    if not nx.is_directed_acyclic_graph(graph):
+        raise ValueError("cycle")
+    return [(n, list(graph.predecessors(n))) for n in nx.topological_sort(graph)]
+
+
+@benchmark("plans", requires=("flask", "flask_sqlalchemy", "networkx"))
+def bench_plans(report):
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+    from execution_plan import ExecutionPlan, PlanCache, compile_plan
+
+    for size in SIZES:
+        node_ids, edges = random_dag(size)
+        plan = compile_plan(node_ids, edges)
+        stored = plan.to_json()
+        workflow = SimpleNamespace(id=1, version=1, plan=stored)
+        cache = PlanCache()
+        cache.get(workflow)
+        number = max(1, 10_000 // size)
+        cases = [
+            ("networkx", lambda: networkx_order(node_ids, edges)),
+            ("compile", lambda: compile_plan(node_ids, edges)),
+            ("load", lambda: ExecutionPlan.from_json(stored)),
+            ("cached", lambda: cache.get(workflow)),
+        ]
+        for name, func in cases:
+            seconds = time_call(func, number=number)
+            report.add(f"plans.{name}.{size}_nodes", seconds * 1e6, "us")
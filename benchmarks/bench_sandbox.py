@@ -0,0 +1,68 @@
+# benchmarks/bench_sandbox.py
+"""Per-call overhead of running node code in the server's sandbox workers.
+
+Compares a trivial node called in the server process, in a warm
+``SandboxPool`` worker, in a ``ProcessPoolExecutor`` worker and in a process
+started for the call, then the cost of moving a large output back.
+"""
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks import SERVER_DIR
+from benchmarks.bench_server import NODE_CODE, create_chain_workflow, server_client
+from benchmarks.harness import benchmark, time_call
+
+PAYLOAD_BYTES = 8 * 1024 * 1024
+LARGE_CODE = "def run(inputs, config):\n    return bytes(config['size'])\n"
+
+
+def _cold_call(code: str) -> None:
+    from workflow_executor import _call_in_process
+    context = multiprocessing.get_context("fork")
+    process = context.Process(target=_call_in_process, args=(1, code, [1], {}))
+    process.start()
+    process.join()
+
+
+@benchmark("sandbox", requires=("flask", "flask_sqlalchemy", "flask_cors", "networkx", "passlib"))
+def bench_sandbox(report):
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+    from function_registry import compile_node_type_code
+    from sandbox import SandboxPool
+    from workflow_executor import _call_in_process, _call_timed
+
+    func = compile_node_type_code(NODE_CODE)
+    large = {"size": PAYLOAD_BYTES}
+    sandbox = SandboxPool(size=2)
+    processes = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("fork"))
+    try:
+        cases = [
+            ("in_process", lambda: _call_timed(func, [1], {}), 1000),
+            ("sandbox", lambda: sandbox.call(_call_in_process, 1, NODE_CODE, [1], {}), 200),
+            ("process_pool",
+             lambda: processes.submit(_call_in_process, 1, NODE_CODE, [1], {}).result(), 200),
+            ("cold_process", lambda: _cold_call(NODE_CODE), 10),
+            ("sandbox_8mb",
+             lambda: sandbox.call(_call_in_process, 2, LARGE_CODE, [], large), 20),
+            ("process_pool_8mb",
+             lambda: processes.submit(_call_in_process, 2, LARGE_CODE, [], large).result(), 20),
+        ]
+        for name, func_call, number in cases:
+            seconds = time_call(func_call, number=number)
+            report.add(f"sandbox.call.{name}", seconds * 1e6, "us")
+    finally:
+        sandbox.shutdown()
+        processes.shutdown()
+
+    # A whole run: nodes executed in the server vs. dispatched to the sandbox.
+    with server_client() as (app, client):
+        workflow_id = create_chain_workflow(client, 20)
+        url = f"/api/workflows/{workflow_id}/run"
+        for pool in ("thread", "sandbox"):
+            body = {"wait": True, "force": True, "pool": pool}
+            seconds = time_call(lambda: client.post(url, json=body), number=5)
+            report.add(f"sandbox.run.20_nodes.{pool}", seconds * 1e3, "ms")
+    from workflow_executor import shutdown_pools
+    shutdown_pools()
@@ -0,0 +1,123 @@
+# benchmarks/bench_server.py
+"""Latency of the Flask workflow endpoints against a throwaway database."""
+import contextlib
+import itertools
+import os
+import sys
+import tempfile
+
+from benchmarks import SERVER_DIR
+from benchmarks.harness import benchmark, time_call
+
+NODE_CODE = "def run(inputs, config):\n    return sum(i or 0 for i in inputs) + 1\n"
+
+
+@contextlib.contextmanager
+def server_client(config: dict = None):
+    """Yield a logged-in Flask test client backed by a temporary SQLite file.
+
+    ``config`` overrides app settings, e.g. ``{"SQLITE_TUNING": False}``.
+    """
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+    from main import create_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp, "bench.db"),
+            "BLOB_DIR": os.path.join(tmp, "blobs"),
+            **(config or {}),
+        })
+        client = app.test_client()
+        client.post("/api/register", json={"username": "bench", "password": "bench"})
+        client.post("/api/login", json={"username": "bench", "password": "bench"})
+        yield app, client
+        app.extensions["run_queue"].shutdown()
+        with app.app_context():
+            from database import db
+            db.engine.dispose()
+
+
+def chain_payload(node_type_id: int, node_ids: list) -> dict:
+    """Return a PUT body linking ``node_ids`` into a single chain.
+
+    Ids that are not stored yet (e.g. strings) are temporary client ids.
+    """
+    return {
+        "name": "bench",
+        "nodes": [
+            {
+                "id": node_id,
+                "node_type_id": node_type_id,
+                "position": {"x": i * 10.0, "y": 0.0},
+                "size": {"width": 200.0, "height": 100.0},
+                "config": "{}",
+            }
+            for i, node_id in enumerate(node_ids)
+        ],
+        "edges": [
+            {"source": a, "target": b}
+            for a, b in zip(node_ids, node_ids[1:])
+        ],
+    }
+
+
+def create_chain_workflow(client, nodes: int) -> int:
+    """Create a workflow of ``nodes`` chained nodes and return its id."""
+    node_type_id = client.post(
+        "/api/node_types", json={"name": "inc", "code": NODE_CODE}
+    ).get_json()["node_type_id"]
+    workflow_id = client.post(
+        "/api/workflows", json={"name": "bench"}
+    ).get_json()["workflow_id"]
+    temp_ids = [f"new-{i}" for i in range(nodes)]
+    client.put(f"/api/workflows/{workflow_id}", json=chain_payload(node_type_id, temp_ids))
+    return workflow_id
+
+
+@benchmark("server", requires=("flask", "flask_sqlalchemy", "flask_cors", "networkx", "passlib"))
+def bench_server(report):
+    with server_client() as (app, client):
+        for _ in range(20):
+            client.post("/api/workflows", json={"name": "filler", "is_public": True})
+
+        for nodes in (10, 100):
+            workflow_id = create_chain_workflow(client, nodes)
+            url = f"/api/workflows/{workflow_id}"
+            detail = client.get(url).get_json()
+            node_type_id = detail["nodes"][0]["node_type_id"]
+            node_ids = [n["id"] for n in detail["nodes"]]
+            # Alternate between two layouts so every save moves all nodes.
+            moved = chain_payload(node_type_id, node_ids)
+            for node in moved["nodes"]:
+                node["position"]["y"] = 50.0
+            bodies = itertools.cycle([moved, chain_payload(node_type_id, node_ids)])
+
+            cases = [
+                ("list", lambda: client.get("/api/workflows")),
+                ("detail", lambda: client.get(url)),
+                ("save", lambda: client.put(url, json=next(bodies))),
+                ("run", lambda: client.post(url + "/run", json={"wait": True})),
+            ]
+            for name, func in cases:
+                seconds = time_call(func, number=5)
+                report.add(f"server.{name}.{nodes}_nodes", seconds * 1e3, "ms")
+
+        seconds = time_call(lambda: client.get("/api/node_types"), number=20)
+        report.add("server.node_types", seconds * 1e3, "ms")
+
+        # A run returning a ~2 MB page dump, inline and spilled to the blob store.
+        dump = client.post("/api/node_types", json={
+            "name": "dump",
+            "code": "def run(inputs, config):\n    return ['<tr><td>cell</td></tr>' * 100] * 1000\n",
+        }).get_json()["node_type_id"]
+        workflow_id = client.post("/api/workflows", json={"name": "dump"}).get_json()["workflow_id"]
+        client.put(f"/api/workflows/{workflow_id}",
+                   json={"nodes": [{"id": "n", "node_type_id": dump}], "edges": []})
+        store = app.extensions["blob_store"]
+        for name, threshold in (("inline", float("inf")), ("spilled", 64 * 1024)):
+            store.threshold = threshold
+            run = lambda: client.post(f"/api/workflows/{workflow_id}/run",
+                                      json={"wait": True, "force": True})
+            report.add(f"server.large_output.{name}", time_call(run, number=3) * 1e3, "ms")
+            report.add(f"server.large_output.{name}.response", len(run().data) / 1024, "KiB")
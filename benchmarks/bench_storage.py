@@ -0,0 +1,85 @@
+# benchmarks/bench_storage.py
+"""Throughput of the Flask server's SQLite storage under concurrent traffic.
+
+Editor threads alternate between loading and saving a workflow while runner
+threads execute workflows through the run queue, all against one database
+file. Each storage configuration is measured for a fixed wall-clock window.
+"""
+import threading
+import time
+
+from benchmarks.bench_server import chain_payload, create_chain_workflow, server_client
+from benchmarks.harness import benchmark
+
+EDITORS = 6
+RUNNERS = 2
+DURATION = 2.0
+NODES = 50
+
+
+def _logged_in(app):
+    client = app.test_client()
+    client.post("/api/login", json={"username": "bench", "password": "bench"})
+    return client
+
+
+def load_test(config: dict) -> dict:
+    """Return reads, writes and runs per second for one app configuration."""
+    counts = {"reads": 0, "writes": 0, "runs": 0, "errors": 0}
+    lock = threading.Lock()
+
+    with server_client(config) as (app, client):
+        workflow_ids = [create_chain_workflow(client, NODES) for _ in range(EDITORS)]
+        stop = time.perf_counter() + DURATION
+
+        def editor(workflow_id):
+            own = _logged_in(app)
+            url = f"/api/workflows/{workflow_id}"
+            detail = own.get(url).get_json()
+            node_type_id = detail["nodes"][0]["node_type_id"]
+            body = chain_payload(node_type_id, [n["id"] for n in detail["nodes"]])
+            reads = writes = errors = 0
+            while time.perf_counter() < stop:
+                reads += own.get(url).status_code == 200
+                for node in body["nodes"]:
+                    node["position"]["y"] += 1.0
+                if own.put(url, json=body).status_code == 200:
+                    writes += 1
+                else:
+                    errors += 1
+            with lock:
+                counts["reads"] += reads
+                counts["writes"] += writes
+                counts["errors"] += errors
+
+        def runner(workflow_id):
+            own = _logged_in(app)
+            url = f"/api/workflows/{workflow_id}/run"
+            runs = 0
+            while time.perf_counter() < stop:
+                response = own.post(url, json={"wait": True, "force": True})
+                runs += response.status_code == 200
+            with lock:
+                counts["runs"] += runs
+
+        threads = [threading.Thread(target=editor, args=(wf,)) for wf in workflow_ids]
+        threads += [threading.Thread(target=runner, args=(workflow_ids[i % EDITORS],))
+                    for i in range(RUNNERS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    return {name: count / elapsed for name, count in counts.items()}
+
+
+@benchmark("storage", requires=("flask", "flask_sqlalchemy", "flask_cors", "networkx", "passlib"))
+def bench_storage(report):
+    for label, config in (("default", {"SQLITE_TUNING": False}), ("tuned", {})):
+        rates = load_test(config)
+        for name in ("reads", "writes", "runs"):
+            report.add(f"storage.{label}.{name}_per_s", rates[name], "ops/s",
+                       higher_is_better=True)
+        report.add(f"storage.{label}.errors_per_s", rates["errors"], "ops/s")
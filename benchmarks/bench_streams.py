@@ -0,0 +1,70 @@
+# benchmarks/bench_streams.py
+"""Scrape-transform-write workflows with streamed and materialized records.
+
+The same three-node pipeline is written once with generator nodes, whose
+records flow through bounded buffers, and once with nodes returning lists.
+Reports throughput per pool and the peak memory the server process
+allocates during a threaded run.
+"""
+from benchmarks.bench_server import server_client
+from benchmarks.harness import benchmark, peak_allocation, time_call
+
+ROWS = 1_000_000
+
+STREAMED = [
+    "def run(inputs, config):\n"
+    "    for i in range(config['rows']):\n"
+    "        yield {'id': i, 'title': 'row %d' % i}\n",
+    "def run(inputs, config):\n"
+    "    for row in inputs[0]:\n"
+    "        yield (row['id'], row['title'].upper())\n",
+]
+MATERIALIZED = [
+    "def run(inputs, config):\n"
+    "    return [{'id': i, 'title': 'row %d' % i} for i in range(config['rows'])]\n",
+    "def run(inputs, config):\n"
+    "    return [(row['id'], row['title'].upper()) for row in inputs[0]]\n",
+]
+WRITE = (
+    "def run(inputs, config):\n"
+    "    written = 0\n"
+    "    for row in inputs[0]:\n"
+    "        written += len(row[1])\n"
+    "    return written\n"
+)
+
+
+def create_pipeline(client, codes: list) -> int:
+    node_types = [
+        client.post("/api/node_types", json={"name": f"stage{i}", "code": code})
+        .get_json()["node_type_id"]
+        for i, code in enumerate([*codes, WRITE])
+    ]
+    workflow_id = client.post("/api/workflows", json={"name": "etl"}).get_json()["workflow_id"]
+    ids = [f"new-{i}" for i in range(len(node_types))]
+    client.put(f"/api/workflows/{workflow_id}", json={
+        "nodes": [
+            {"id": node_id, "node_type_id": type_id,
+             "config": '{"rows": %d}' % ROWS if i == 0 else "{}"}
+            for i, (node_id, type_id) in enumerate(zip(ids, node_types))
+        ],
+        "edges": [{"source": a, "target": b} for a, b in zip(ids, ids[1:])],
+    })
+    return workflow_id
+
+
+@benchmark("streams", requires=("flask", "flask_sqlalchemy", "flask_cors", "networkx", "passlib"))
+def bench_streams(report):
+    with server_client() as (app, client):
+        for name, codes in (("streamed", STREAMED), ("materialized", MATERIALIZED)):
+            url = f"/api/workflows/{create_pipeline(client, codes)}/run"
+            for pool in ("thread", "sandbox"):
+                body = {"wait": True, "force": True, "pool": pool}
+                seconds = time_call(lambda: client.post(url, json=body), repeat=3)
+                report.add(f"streams.{name}.{pool}.rows_per_s", ROWS / seconds,
+                           "rows/s", higher_is_better=True)
+            body = {"wait": True, "force": True, "pool": "thread"}
+            peak = peak_allocation(lambda: client.post(url, json=body))
+            report.add(f"streams.{name}.thread.peak", peak / 2**20, "MiB")
+    from workflow_executor import shutdown_pools
+    shutdown_pools()
@@ -0,0 +1,50 @@
+# benchmarks/bench_templates.py
+"""Startup and lookup cost of the template atlas versus decoding PNGs."""
+import os
+import shutil
+import tempfile
+
+from benchmarks import IMAGES_DIR
+from benchmarks.bench_locate import synthetic_screen, template_paths
+from benchmarks.harness import benchmark, time_call
+from fremen.templates import TemplateRegistry, compile_atlas
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+
+@benchmark("templates", requires=("numpy", "cv2"))
+def bench_templates(report):
+    with tempfile.TemporaryDirectory() as tmp:
+        images = os.path.join(tmp, "images")
+        shutil.copytree(IMAGES_DIR, images)
+        atlas = os.path.join(tmp, "templates.atlas")
+
+        seconds = time_call(lambda: compile_atlas(images, atlas), repeat=3)
+        report.add("templates.compile_atlas", seconds * 1e3, "ms")
+
+        # What every pipeline does today: decode each PNG when it is used.
+        seconds = time_call(
+            lambda: [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in template_paths()]
+        )
+        report.add("templates.decode_all_pngs", seconds * 1e3, "ms")
+
+        seconds = time_call(lambda: TemplateRegistry(images, atlas))
+        report.add("templates.open_atlas_checked", seconds * 1e3, "ms")
+        seconds = time_call(lambda: TemplateRegistry(images, atlas, check=False))
+        report.add("templates.open_atlas_unchecked", seconds * 1e3, "ms")
+
+        registry = TemplateRegistry(images, atlas)
+        name = "new_tab_light"
+        seconds = time_call(lambda: registry[name].gray, number=1000)
+        report.add("templates.lookup", seconds * 1e6, "us")
+
+        from fremen.matching import locate
+        screen = synthetic_screen(1920, 1080, cv2.imread(registry.path(name)))
+        gray = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+        seconds = time_call(lambda: locate(registry.path(name), gray), repeat=3)
+        report.add("templates.locate_from_png", seconds * 1e3, "ms")
+        seconds = time_call(lambda: locate(registry[name], gray), repeat=3)
+        report.add("templates.locate_from_atlas", seconds * 1e3, "ms")
@@ -0,0 +1,179 @@
+# benchmarks/harness.py
+"""Timing helpers, benchmark registry and JSON result history."""
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+# Every registered benchmark, keyed by name, in registration order.
+BENCHMARKS = {}
+
+
+class Benchmark:
+    """A named benchmark function plus the optional modules it needs."""
+
+    def __init__(self, name: str, func, requires=()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+    def missing_requirements(self) -> list:
+        """Return the required modules that cannot be imported here."""
+        missing = []
+        for module in self.requires:
+            try:
+                importlib.import_module(module)
+            except Exception:
+                missing.append(module)
+        return missing
+
+
+def benchmark(name: str, requires=()):
+    """Register the decorated ``func(report)`` under ``name``."""
+    def decorator(func):
+        BENCHMARKS[name] = Benchmark(name, func, requires)
+        return func
+    return decorator
+
+
+class Report:
+    """Collects the metrics emitted by a single benchmark run."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name: str, value: float, unit: str, higher_is_better: bool = False):
+        self.metrics[name] = {
+            "value": float(value),
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+        }
+
+
+def time_call(func, number: int = 1, repeat: int = 5) -> float:
+    """Return the median wall time in seconds of a single ``func()`` call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+
+def peak_allocation(func) -> int:
+    """Return the peak bytes Python allocated while running ``func()`` once.
+
+    NumPy reports its buffers to tracemalloc, so this also counts frames.
+    """
+    tracemalloc.start()
+    try:
+        func()  # warm up lazily created buffers
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(selected=None):
+    """Run the registered benchmarks and return ``(metrics, skipped)``.
+
+    ``selected`` is an optional list of substrings; a benchmark runs when its
+    name contains any of them. ``skipped`` maps benchmark names to the reason
+    they did not run.
+    """
+    metrics, skipped = {}, {}
+    for name, bench in BENCHMARKS.items():
+        if selected and not any(s in name for s in selected):
+            continue
+        missing = bench.missing_requirements()
+        if missing:
+            skipped[name] = "missing " + ", ".join(missing)
+            continue
+        report = Report()
+        try:
+            bench.func(report)
+        except Exception as exc:
+            skipped[name] = f"{type(exc).__name__}: {exc}"
+        metrics.update(report.metrics)
+    return metrics, skipped
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return ""
+
+
+def load_history(path: str) -> list:
+    """Return the list of saved runs, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f).get("runs", [])
+
+
+def save_run(path: str, metrics: dict) -> dict:
+    """Append a run with ``metrics`` to the history file and return it."""
+    runs = load_history(path)
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "metrics": metrics,
+    }
+    runs.append(run)
+    with open(path, "w") as f:
+        json.dump({"runs": runs}, f, indent=2, sort_keys=True)
+    return run
+
+
+def baseline_from(runs: list, window: int = 3) -> dict:
+    """Return per-metric medians over the last ``window`` runs recording them.
+
+    Taking the median of a few runs keeps one noisy run from becoming the
+    reference every later run is judged against.
+    """
+    values, meta = {}, {}
+    for run in reversed(runs):
+        for name, metric in run["metrics"].items():
+            samples = values.setdefault(name, [])
+            if len(samples) < window:
+                samples.append(metric["value"])
+                meta.setdefault(name, metric)
+    return {
+        name: {**meta[name], "value": statistics.median(samples)}
+        for name, samples in values.items()
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return metrics in ``current`` that regressed beyond ``threshold``.
+
+    Both arguments are metric dicts as produced by :class:`Report`. The
+    threshold is relative, so ``0.1`` flags anything more than 10% worse
+    than the baseline. Each regression is ``(name, old, new, change)``.
+    """
+    regressions = []
+    for name, metric in current.items():
+        old = baseline.get(name)
+        if old is None or old["value"] == 0:
+            continue
+        change = (metric["value"] - old["value"]) / old["value"]
+        if metric.get("higher_is_better"):
+            change = -change
+        if change > threshold:
+            regressions.append((name, old["value"], metric["value"], change))
+    return regressions
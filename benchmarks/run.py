@@ -0,0 +1,81 @@
+# benchmarks/run.py
+"""Command line entry point: ``python -m benchmarks.run``.
+
+Runs the registered benchmarks, prints every metric, compares the results
+with the median of the most recent runs stored in the history file and
+appends the new run to it. The exit status is 1 when any tracked metric
+regressed by more than ``--threshold`` relative to that baseline.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+from benchmarks import REPO_ROOT
+from benchmarks.harness import (
+    baseline_from,
+    compare,
+    load_history,
+    run_benchmarks,
+    save_run,
+)
+
+# Modules imported for their @benchmark registrations.
+MODULES = [
+    "benchmarks.bench_locate",
+    "benchmarks.bench_capture",
+    "benchmarks.bench_templates",
+    "benchmarks.bench_parsers",
+    "benchmarks.bench_find_face",
+    "benchmarks.bench_phash",
+    "benchmarks.bench_llm",
+    "benchmarks.bench_server",
+    "benchmarks.bench_storage",
+    "benchmarks.bench_sandbox",
+    "benchmarks.bench_streams",
+    "benchmarks.bench_plans",
+    "benchmarks.bench_map",
+    "benchmarks.bench_answer_cache",
+    "benchmarks.bench_gui_env",
+]
+
+DEFAULT_HISTORY = os.path.join(REPO_ROOT, "benchmarks", "history.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="selected", action="append",
+                        help="only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--history", default=DEFAULT_HISTORY,
+                        help="JSON file holding previous runs (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative regression that fails the run (default: %(default)s)")
+    parser.add_argument("--window", type=int, default=3,
+                        help="number of previous runs forming the baseline (default: %(default)s)")
+    parser.add_argument("--no-save", action="store_true",
+                        help="compare against history without recording this run")
+    args = parser.parse_args(argv)
+
+    for module in MODULES:
+        importlib.import_module(module)
+
+    metrics, skipped = run_benchmarks(args.selected)
+    for name in sorted(metrics):
+        metric = metrics[name]
+        print(f"{name:<60} {metric['value']:>12.3f} {metric['unit']}")
+    for name, reason in skipped.items():
+        print(f"skipped {name}: {reason}")
+
+    history = load_history(args.history)
+    baseline = baseline_from(history, args.window)
+    regressions = compare(metrics, baseline, args.threshold)
+    for name, old, new, change in regressions:
+        print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} ({change:+.0%} worse)")
+
+    if not args.no_save:
+        save_run(args.history, metrics)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
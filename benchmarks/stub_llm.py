@@ -0,0 +1,84 @@
+# benchmarks/stub_llm.py
+"""In-process stand-in for an Ollama server, used to time client overhead."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Like Ollama, answer kept-alive connections without Nagle delays.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # keep benchmark output clean
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests.append(request)
+        if server.delay:
+            time.sleep(server.delay)
+        answer = server.reply(request)
+        if self.path == "/api/generate":
+            payload = {"model": request.get("model"), "response": answer, "done": True}
+        else:
+            payload = {
+                "model": request.get("model"),
+                "message": {"role": "assistant", "content": answer},
+                "done": True,
+            }
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubLLMServer:
+    """Serve canned ``/api/chat`` and ``/api/generate`` answers on localhost.
+
+    ``reply`` maps the decoded request body to the answer text and ``delay``
+    adds a fixed per-request latency in seconds. Use as a context manager::
+
+        with StubLLMServer() as stub:
+            ollama.Client(host=stub.url).chat(...)
+    """
+
+    def __init__(self, reply=None, delay: float = 0.0):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.reply = reply or (lambda request: "Yes, the sky is blue.")
+        self._server.delay = delay
+        self._server.requests = []
+        self._server.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> list:
+        """Decoded JSON bodies of every request received so far."""
+        return self._server.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
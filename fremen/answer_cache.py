@@ -0,0 +1,210 @@
+# fremen/answer_cache.py
+"""Near-duplicate cache of LLM answers to extraction prompts.
+
+Crawls ask the same question ("when is the latest filing date in this
+document: ...") about pages that differ between visits only in whitespace,
+ads or clock times. :class:`AnswerCache` keys each answer by model and
+question template and stores a 64-bit SimHash of the normalized page
+content. A later prompt with the same template whose content lies within
+``max_distance`` bits gets the stored answer without an LLM call.
+Lookups go through a :class:`fremen.phash.HashIndex`, so they compare
+against a handful of candidates even with hundreds of thousands of
+entries. Answers persist in a SQLite file.
+
+A near-duplicate hit returns an answer computed from slightly different
+content. Use the cache only for questions whose answer survives small
+edits. Lower ``max_distance`` (0 still ignores whitespace and clock times)
+when a single changed value on the page matters.
+"""
+import functools
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .phash import HASH_BITS, HashIndex
+
+# Words per shingle fed into the SimHash.
+SHINGLE_WORDS = 3
+
+# Words, keeping colons so that clock times ("10:42", the "t10:22:33z" of
+# an ISO timestamp) stay single tokens that can be dropped.
+_TOKENS = re.compile(r"[\w:]+")
+_CLOCK = re.compile(r"(?:(\d+)t)?\d+(?::\d+)+z?")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    simhash INTEGER NOT NULL,
+    answer TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_answers_digest ON answers (key, digest);
+"""
+
+
+def normalize_content(text: str) -> list:
+    """The words of ``text``, lower-cased, without clock times and punctuation."""
+    words = []
+    for token in _TOKENS.findall(text.lower()):
+        if ":" not in token:
+            words.append(token)
+            continue
+        clock = _CLOCK.fullmatch(token)
+        if clock is None:
+            words.extend(part for part in token.split(":") if part)
+        elif clock.group(1):
+            words.append(clock.group(1))  # the day of "2024-05-01t10:22"
+    return words
+
+
+_MASK = (1 << 64) - 1
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+
+
+def _mix(x: int) -> int:
+    # splitmix64 finalizer, so every bit of a shingle depends on all its words.
+    x ^= x >> 30
+    x = (x * 0xBF58476D1CE4E5B9) & _MASK
+    x ^= x >> 27
+    x = (x * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+def _shingle_values(words: list) -> list:
+    hashes = [_word_hash(w) for w in words] or [0]
+    values = []
+    for i in range(max(1, len(hashes) - SHINGLE_WORDS + 1)):
+        x = 0
+        for j, h in enumerate(hashes[i:i + SHINGLE_WORDS]):
+            shift = 21 * j
+            x ^= ((h << shift) | (h >> (64 - shift))) & _MASK if shift else h
+        values.append(_mix(x))
+    return values
+
+
+def _simhash_numpy(words: list) -> int:
+    hashes = np.fromiter((_word_hash(w) for w in words), dtype=np.uint64, count=len(words))
+    if len(hashes) == 0:
+        hashes = np.zeros(1, dtype=np.uint64)
+    count = max(1, len(hashes) - SHINGLE_WORDS + 1)
+    x = hashes[:count].copy()
+    for j in range(1, min(SHINGLE_WORDS, len(hashes))):
+        h, shift = hashes[j:j + count], np.uint64(21 * j)
+        x ^= (h << shift) | (h >> (np.uint64(64) - shift))
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    bits = np.unpackbits(x.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1)
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - count
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), "little")
+
+
+def simhash(words: list) -> int:
+    """64-bit SimHash of ``words`` over shingles of ``SHINGLE_WORDS`` words."""
+    if np is not None:
+        return _simhash_numpy(words)
+    votes = [0] * HASH_BITS
+    for value in _shingle_values(words):
+        for bit in range(HASH_BITS):
+            votes[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, vote in enumerate(votes) if vote > 0)
+
+
+def template_key(model: str, template: str) -> str:
+    return hashlib.sha256(f"{model}\0{template}".encode()).hexdigest()[:32]
+
+
+def _signed(value: int) -> int:
+    # SQLite integers are signed 64-bit.
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class AnswerCache:
+    """Answers keyed by (model, question template), matched on content SimHash.
+
+    ``path`` is the SQLite file (``":memory:"`` keeps nothing). Identical
+    normalized content is found by digest; otherwise the closest entry
+    within ``max_distance`` bits is used. ``hits``, ``near_hits`` and
+    ``misses`` count lookups.
+    """
+
+    def __init__(self, path: str = ":memory:", max_distance: int = 3):
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._index = HashIndex(max_distance=max_distance)
+        self._exact = {}
+        self._answers = {}
+        for row_id, key, digest, value, answer in self._db.execute(
+            "SELECT id, key, digest, simhash, answer FROM answers ORDER BY id"
+        ):
+            self._insert(row_id, key, digest, value % (1 << 64), answer)
+        self.hits = self.near_hits = self.misses = 0
+
+    def _insert(self, row_id, key, digest, value, answer):
+        self._index.add(key, value, str(row_id))
+        self._exact[key, digest] = row_id
+        self._answers[row_id] = answer
+
+    @staticmethod
+    def _fingerprint(content: str):
+        words = normalize_content(content)
+        digest = hashlib.sha256(" ".join(words).encode()).hexdigest()
+        return digest, words
+
+    def get(self, model: str, template: str, content: str):
+        """The stored answer for a near-duplicate of ``content``, or None."""
+        key = template_key(model, template)
+        digest, words = self._fingerprint(content)
+        with self._lock:
+            row_id = self._exact.get((key, digest))
+            if row_id is not None:
+                self.hits += 1
+                return self._answers[row_id]
+        if self.max_distance:
+            value = simhash(words)
+            with self._lock:
+                matches = self._index.find(value, key=key)
+                if matches:
+                    self.near_hits += 1
+                    return self._answers[int(matches[0][2])]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, model: str, template: str, content: str, answer: str) -> None:
+        key = template_key(model, template)
+        digest, words = self._fingerprint(content)
+        value = simhash(words)
+        with self._lock:
+            if (key, digest) in self._exact:
+                return
+            cursor = self._db.execute(
+                "INSERT INTO answers (key, digest, simhash, answer, created) VALUES (?, ?, ?, ?, ?)",
+                (key, digest, _signed(value), answer, time.time()),
+            )
+            self._db.commit()
+            self._insert(cursor.lastrowid, key, digest, value, answer)
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def close(self) -> None:
+        self._db.close()
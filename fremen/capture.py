@@ -0,0 +1,325 @@
+# fremen/capture.py
+"""Screen capture backends that return NumPy frames.
+
+``pyautogui.screenshot`` shells out to an external tool (or PIL's grab) and
+builds a new PIL image on every call. On Linux, :class:`XShmCapture` instead
+asks the X server to copy the screen into a shared-memory segment that is
+allocated once and exposed as a NumPy array, so a capture costs one X round
+trip and no allocation. :func:`open_capture` picks the fastest backend that
+works on the current machine.
+
+Frames returned by a backend are views onto buffers the backend reuses: the
+next ``grab`` overwrites them. Copy a frame if you need to keep it.
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+try:
+    import pyautogui
+except ImportError:  # pragma: no cover - optional dependency
+    pyautogui = None
+
+# Xlib / SysV IPC constants
+_Z_PIXMAP = 2
+_ALL_PLANES = 0xFFFFFFFF
+_IPC_PRIVATE = 0
+_IPC_CREAT = 0o1000
+_IPC_RMID = 0
+
+# At most this many region sizes keep a shared-memory image around.
+MAX_CACHED_REGIONS = 8
+
+
+class _XImage(ctypes.Structure):
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+        ("obdata", ctypes.c_void_p),
+        # struct funcs: six function pointers we never call directly
+        ("create_image", ctypes.c_void_p),
+        ("destroy_image", ctypes.c_void_p),
+        ("get_pixel", ctypes.c_void_p),
+        ("put_pixel", ctypes.c_void_p),
+        ("sub_image", ctypes.c_void_p),
+        ("add_pixel", ctypes.c_void_p),
+    ]
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
+
+
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+
+def _load(name: str):
+    path = ctypes.util.find_library(name)
+    if not path:
+        raise OSError(f"lib{name} not found")
+    return ctypes.CDLL(path)
+
+
+def _bind(lib, name, restype, *argtypes):
+    func = getattr(lib, name)
+    func.restype = restype
+    func.argtypes = argtypes
+    return func
+
+
+def to_gray(frame, out=None):
+    """Convert a BGR/BGRA frame to grayscale, writing into ``out`` if given.
+
+    Grayscale frames are returned unchanged. Passing a preallocated ``out``
+    of the right shape keeps the conversion allocation free.
+    """
+    if frame.ndim == 2:
+        return frame
+    if cv2 is not None:
+        code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(frame, code, dst=out)
+    # ITU-R BT.601 luma, the same weights OpenCV uses.
+    gray = frame[..., 0] * 0.114 + frame[..., 1] * 0.587 + frame[..., 2] * 0.299
+    if out is None:
+        return gray.astype(np.uint8)
+    np.copyto(out, gray, casting="unsafe")
+    return out
+
+
+class _ShmImage:
+    """One XShm image of a fixed size and its NumPy views."""
+
+    def __init__(self, capture, width: int, height: int):
+        self._capture = capture
+        self.info = _XShmSegmentInfo()
+        self.image = capture._XShmCreateImage(
+            capture._display, capture._visual, capture.depth, _Z_PIXMAP,
+            None, ctypes.byref(self.info), width, height,
+        )
+        if not self.image:
+            raise RuntimeError("XShmCreateImage failed")
+        ximage = self.image.contents
+        size = ximage.bytes_per_line * ximage.height
+        self.info.shmid = capture._shmget(_IPC_PRIVATE, size, _IPC_CREAT | 0o600)
+        if self.info.shmid < 0:
+            capture._XDestroyImage(self.image)
+            raise RuntimeError("shmget failed")
+        address = capture._shmat(self.info.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            capture._shmctl(self.info.shmid, _IPC_RMID, None)
+            capture._XDestroyImage(self.image)
+            raise RuntimeError("shmat failed")
+        self.info.shmaddr = ximage.data = address
+        self.info.readOnly = 0
+        if not capture._XShmAttach(capture._display, ctypes.byref(self.info)):
+            self.close()
+            raise RuntimeError("XShmAttach failed")
+        capture._XSync(capture._display, 0)
+        # Mark the segment for removal now; the kernel frees it once both
+        # this process and the X server have detached.
+        capture._shmctl(self.info.shmid, _IPC_RMID, None)
+
+        raw = (ctypes.c_uint8 * size).from_address(address)
+        rows = np.frombuffer(raw, dtype=np.uint8).reshape(
+            ximage.height, ximage.bytes_per_line // 4, 4
+        )
+        self.bgra = rows[:, :width]
+        self.gray = np.empty((height, width), dtype=np.uint8)
+
+    def close(self):
+        capture = self._capture
+        if self.image:
+            capture._XShmDetach(capture._display, ctypes.byref(self.info))
+            # The pixel data lives in shared memory; keep Xlib from free()ing it.
+            self.image.contents.data = None
+            capture._XDestroyImage(self.image)
+            self.image = None
+        if self.info.shmaddr:
+            capture._shmdt(self.info.shmaddr)
+            self.info.shmaddr = None
+        self.bgra = self.gray = None
+
+
+class XShmCapture:
+    """Capture an X11 screen through the MIT-SHM extension.
+
+    ``grab`` returns a ``(height, width, 4)`` BGRA view of a shared-memory
+    buffer that is allocated on first use and reused afterwards, or the
+    matching ``(height, width)`` grayscale buffer when ``gray=True``.
+    """
+
+    def __init__(self, display: str = None):
+        if np is None:
+            raise ImportError("numpy package is required for this feature")
+        if not sys.platform.startswith("linux"):
+            raise RuntimeError("XShmCapture only works on Linux/X11")
+        display = display or os.environ.get("DISPLAY")
+        if not display:
+            raise RuntimeError("DISPLAY is not set")
+
+        xlib, xext, libc = _load("X11"), _load("Xext"), _load("c")
+        self._XOpenDisplay = _bind(xlib, "XOpenDisplay", ctypes.c_void_p, ctypes.c_char_p)
+        self._XCloseDisplay = _bind(xlib, "XCloseDisplay", ctypes.c_int, ctypes.c_void_p)
+        self._XSync = _bind(xlib, "XSync", ctypes.c_int, ctypes.c_void_p, ctypes.c_int)
+        self._XDestroyImage = _bind(xlib, "XDestroyImage", ctypes.c_int, ctypes.POINTER(_XImage))
+        self._XSetErrorHandler = _bind(xlib, "XSetErrorHandler", ctypes.c_void_p, _X_ERROR_HANDLER)
+        default_screen = _bind(xlib, "XDefaultScreen", ctypes.c_int, ctypes.c_void_p)
+        root_window = _bind(xlib, "XRootWindow", ctypes.c_ulong, ctypes.c_void_p, ctypes.c_int)
+        display_width = _bind(xlib, "XDisplayWidth", ctypes.c_int, ctypes.c_void_p, ctypes.c_int)
+        display_height = _bind(xlib, "XDisplayHeight", ctypes.c_int, ctypes.c_void_p, ctypes.c_int)
+        default_visual = _bind(xlib, "XDefaultVisual", ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int)
+        default_depth = _bind(xlib, "XDefaultDepth", ctypes.c_int, ctypes.c_void_p, ctypes.c_int)
+
+        query = _bind(xext, "XShmQueryExtension", ctypes.c_int, ctypes.c_void_p)
+        self._XShmCreateImage = _bind(
+            xext, "XShmCreateImage", ctypes.POINTER(_XImage),
+            ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+            ctypes.c_char_p, ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint,
+        )
+        self._XShmAttach = _bind(xext, "XShmAttach", ctypes.c_int,
+                                 ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo))
+        self._XShmDetach = _bind(xext, "XShmDetach", ctypes.c_int,
+                                 ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo))
+        self._XShmGetImage = _bind(
+            xext, "XShmGetImage", ctypes.c_int, ctypes.c_void_p, ctypes.c_ulong,
+            ctypes.POINTER(_XImage), ctypes.c_int, ctypes.c_int, ctypes.c_ulong,
+        )
+
+        self._shmget = _bind(libc, "shmget", ctypes.c_int, ctypes.c_int, ctypes.c_size_t, ctypes.c_int)
+        self._shmat = _bind(libc, "shmat", ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_int)
+        self._shmdt = _bind(libc, "shmdt", ctypes.c_int, ctypes.c_void_p)
+        self._shmctl = _bind(libc, "shmctl", ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_void_p)
+
+        # Xlib's default error handler exits the process; record errors instead.
+        self.last_error = None
+        self._error_handler = _X_ERROR_HANDLER(self._on_x_error)
+        self._XSetErrorHandler(self._error_handler)
+
+        self._display = self._XOpenDisplay(display.encode())
+        if not self._display:
+            raise RuntimeError(f"Cannot open display {display!r}")
+        if not query(self._display):
+            self._XCloseDisplay(self._display)
+            self._display = None
+            raise RuntimeError("X server does not support MIT-SHM")
+        screen = default_screen(self._display)
+        self._root = root_window(self._display, screen)
+        self._visual = default_visual(self._display, screen)
+        self.depth = default_depth(self._display, screen)
+        self.width = display_width(self._display, screen)
+        self.height = display_height(self._display, screen)
+        if self.depth not in (24, 32):
+            self.close()
+            raise RuntimeError(f"Unsupported screen depth {self.depth}")
+        self._images = {}
+
+    def _on_x_error(self, display, event):
+        self.last_error = event
+        return 0
+
+    def _image_for(self, width: int, height: int) -> _ShmImage:
+        image = self._images.pop((width, height), None)
+        if image is None:
+            if len(self._images) >= MAX_CACHED_REGIONS:
+                oldest = next(iter(self._images))
+                self._images.pop(oldest).close()
+            image = _ShmImage(self, width, height)
+        # Re-insert so the dict stays in least-recently-used order.
+        self._images[(width, height)] = image
+        return image
+
+    def grab(self, region=None, gray: bool = False):
+        """Capture the screen, or ``region=(left, top, width, height)`` of it."""
+        if self._display is None:
+            raise RuntimeError("capture is closed")
+        left, top, width, height = region or (0, 0, self.width, self.height)
+        image = self._image_for(width, height)
+        if not self._XShmGetImage(self._display, self._root, image.image,
+                                  left, top, _ALL_PLANES):
+            raise RuntimeError(f"XShmGetImage failed for region {region}")
+        if gray:
+            return to_gray(image.bgra, out=image.gray)
+        return image.bgra
+
+    def close(self):
+        for image in self._images.values():
+            image.close()
+        self._images = {}
+        if self._display:
+            self._XCloseDisplay(self._display)
+            self._display = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PyAutoGuiCapture:
+    """Portable fallback that converts ``pyautogui.screenshot`` to NumPy.
+
+    Every grab allocates a new frame; it exists so callers can use the same
+    frame-based API on platforms without :class:`XShmCapture`.
+    """
+
+    def __init__(self):
+        if np is None:
+            raise ImportError("numpy package is required for this feature")
+        if pyautogui is None:
+            raise ImportError("pyautogui package is required for this feature")
+        self.width, self.height = pyautogui.size()
+
+    def grab(self, region=None, gray: bool = False):
+        rgb = np.asarray(pyautogui.screenshot(region=region))
+        if gray:
+            return to_gray(rgb[..., ::-1])
+        return rgb[..., ::-1]  # BGR view, matching OpenCV's channel order
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_capture(display: str = None):
+    """Return the fastest capture backend that works on this machine."""
+    if sys.platform.startswith("linux"):
+        try:
+            return XShmCapture(display)
+        except (OSError, RuntimeError):
+            pass
+    return PyAutoGuiCapture()
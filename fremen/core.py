@@ -12,11 +12,6 @@ try:
 except ImportError:  # pragma: no cover - optional dependency
     gw = None
 
-try:
-    import ollama
-except ImportError:  # pragma: no cover - optional dependency
-    ollama = None
-
 try:
     import pyperclip
 except ImportError:  # pragma: no cover - optional dependency
@@ -42,6 +37,10 @@ try:
 except ImportError:  # pragma: no cover - optional dependency
     np = None
 
+from . import llm, matching, phash
+from .pacing import site_of
+from .templates import DEFAULT_IMAGES_DIR
+
 def clean_string(text):
     # Remove extra newlines and spaces while preserving the JSON structure
     lines = text.split('\n')
@@ -65,8 +64,25 @@ def extract_json(text):
     return None
 
 class Fremen:
-    def __init__(self):
+    def __init__(self, capture=None, templates=None, pacer=None, gateway=None,
+                 answer_cache=None):
         self.name = "Fremen"
+        # Optional fremen.capture backend; without one, screen lookups go
+        # through pyautogui as before.
+        self.capture = capture
+        # Optional fremen.templates.TemplateRegistry; lets every method that
+        # takes an image path also take a template name.
+        self.templates = templates
+        # Optional fremen.pacing.Pacer; open_url waits for the site's slot
+        # and wait_until_ready feeds page latency back to it.
+        self.pacer = pacer
+        # Optional fremen.llm.LLMGateway for ask; defaults to the shared
+        # process-wide gateway.
+        self.gateway = gateway
+        # Optional fremen.answer_cache.AnswerCache; ask reuses answers to
+        # near-identical content passed through its content argument.
+        self.answer_cache = answer_cache
+        self.current_site = None
     
     def greet(self):
         return f"Greetings from {self.name}!"
@@ -85,8 +101,61 @@ class Fremen:
             return False
         
         
-    def click_and_wait(self,image_path: str, wait_time: int, confidence: int =0.9):
-        clickable_area = pyautogui.locateOnScreen(image_path, confidence)
+    def screenshot(self, region=None, gray: bool = False):
+        """Grab a frame from the capture backend.
+
+        The frame is reused by the next grab; pass it to the locate methods
+        through their ``frame`` argument to search it without copying.
+        """
+        if self.capture is None:
+            raise ValueError("Fremen was created without a capture backend")
+        return self.capture.grab(region=region, gray=gray)
+
+    def template_path(self, name: str) -> str:
+        """Return the PNG path for template ``name``.
+
+        Uses the template registry when there is one, otherwise the images/
+        directory shipped with the repository.
+        """
+        if self.templates is not None and name in self.templates:
+            return self.templates.path(name)
+        return os.path.join(DEFAULT_IMAGES_DIR, name + ".png")
+
+    def locate_on_screen(self, image_path: str, confidence: float = 0.9, frame=None, region=None):
+        """Return the box where ``image_path`` appears on screen, or None.
+
+        ``image_path`` may also be the name of a template in the registry.
+        ``frame`` searches an already captured full-screen frame instead of
+        taking a screenshot. ``region=(left, top, width, height)`` limits the
+        search; the returned box is always in screen coordinates.
+        """
+        template = image_path
+        if self.templates is not None and image_path in self.templates:
+            template = self.templates[image_path]
+        if frame is not None:
+            return matching.locate(template, frame, confidence, region=region)
+        if self.capture is not None:
+            frame = self.capture.grab(region=region, gray=True)
+            box = matching.locate(template, frame, confidence)
+            if box is not None and region is not None:
+                box = box._replace(left=box.left + region[0], top=box.top + region[1])
+            return box
+        if template is not image_path:
+            image_path = template.path
+        return pyautogui.locateOnScreen(image_path, confidence=confidence, region=region)
+
+    def wait_for_image(self, image_path: str, timeout: float = 10, interval: float = 0.25,
+                       confidence: float = 0.9, region=None):
+        """Poll the screen until ``image_path`` appears; return its box or None."""
+        deadline = time.monotonic() + timeout
+        while True:
+            box = self.locate_on_screen(image_path, confidence, region=region)
+            if box is not None or time.monotonic() >= deadline:
+                return box
+            time.sleep(interval)
+
+    def click_and_wait(self,image_path: str, wait_time: int, confidence: int =0.9, frame=None):
+        clickable_area = self.locate_on_screen(image_path, confidence, frame=frame)
         if clickable_area:
             new_clickable_center = pyautogui.center(clickable_area)
             pyautogui.click(new_clickable_center)
@@ -94,30 +163,62 @@ class Fremen:
         else:
             print(image_path, "not found on page")
 
-    def if_image_exists(self, image_path: str, confidence: float = 0.7) -> bool:
+    def click(self, image_path: str, confidence: float = 0.9, frame=None) -> bool:
+        """Click the center of ``image_path`` on screen; return whether it was found."""
+        box = self.locate_on_screen(image_path, confidence, frame=frame)
+        if box is None:
+            return False
+        pyautogui.click(pyautogui.center(box))
+        return True
+
+    def type_text(self, text: str, interval: float = 0.05, clear: bool = False):
+        """Type ``text`` into the focused field, replacing its content if ``clear``."""
+        if clear:
+            pyautogui.hotkey('ctrl', 'a')
+            pyautogui.press('backspace')
+        pyautogui.typewrite(text, interval=interval)
+
+    def if_image_exists(self, image_path: str, confidence: float = 0.7, frame=None) -> bool:
         """Check if an image exists on screen."""
-        return pyautogui.locateOnScreen(image_path, confidence) is not None
+        return self.locate_on_screen(image_path, confidence, frame=frame) is not None
         
     def wait(self, seconds: int):
         time.sleep(seconds)
     def press(self, key: str):
         pyautogui.press(key)
 
-    def find_face(self, outputfile: str, name:str) -> None: 
-        pyautogui.screenshot("delete_later.png")
-        
-        # Load the image
-        image = cv2.imread("delete_later.png")
+    def find_face(self, outputfile: str, name:str, attorney_id=None, hash_index=None) -> bool:
+        """Find the first face on screen and save it through Chrome's Save-As.
+
+        With a ``hash_index`` (a :class:`fremen.phash.HashIndex`) the crop is
+        hashed in memory first; if an equivalent image is already indexed for
+        ``attorney_id`` the slow Save-As round trip is skipped. Returns True
+        when the image was saved and False when it was skipped or not found.
+        """
+        if self.capture is not None:
+            image = np.ascontiguousarray(self.capture.grab()[..., :3])
+        else:
+            pyautogui.screenshot("delete_later.png")
+            # Load the image
+            image = cv2.imread("delete_later.png")
         if image is None:
             raise ValueError("Invalid image path provided!")
     
-        faces = RetinaFace.extract_faces(img_path="delete_later.png", align=False)
+        faces = RetinaFace.extract_faces(img_path=image, align=False)
         if len(faces) == 0:
            raise ValueError("No faces detected in the image!")
     
-        cropped_image = Image.fromarray(faces[0].astype("uint8"))
+        face = faces[0].astype("uint8")
+        face_hash = None
+        if hash_index is not None:
+            face_hash = phash.dhash(face)
+            if hash_index.contains(face_hash, key=attorney_id):
+                print(name, "already saved, skipping")
+                return False
+
+        cropped_image = Image.fromarray(face)
         cropped_image.save(outputfile)
-        clickable_area = pyautogui.locateOnScreen(outputfile, .9)
+        clickable_area = self.locate_on_screen(outputfile, .9)
 
         if clickable_area:
             new_clickable_center = pyautogui.center(clickable_area)
@@ -126,18 +227,27 @@ class Fremen:
             
             base_dir = 'C:\\Users\\farid\\Desktop\\attorney_images\\'
 
-            self.click_and_wait('C:\\Users\\farid\\Desktop\\Fremen\\images\\chrome_save_image_as.png',1,.9)
+            save_as = 'chrome_save_image_as'
+            if self.templates is None or save_as not in self.templates:
+                save_as = self.template_path(save_as)
+            self.click_and_wait(save_as,1,.9)
             pyautogui.typewrite(base_dir+name, interval=0.1)
             pyautogui.press('enter')
             time.sleep(1)
+            if hash_index is not None:
+                # Chrome adds the extension; index_directory matches without it.
+                hash_index.add(attorney_id if attorney_id is not None else name,
+                               face_hash, base_dir + name)
+            return True
         else:
             print(outputfile, "not found on page")
+            return False
 
 
 
-    def find_on_screen_and_fill_with_text(self,image_path: str, text_content: str):
+    def find_on_screen_and_fill_with_text(self,image_path: str, text_content: str, frame=None):
         # Locate the address bar on the screen using the screenshot
-        new_tab_location = pyautogui.locateOnScreen(image_path, confidence=0.8)
+        new_tab_location = self.locate_on_screen(image_path, confidence=0.8, frame=frame)
         if new_tab_location:
             # Get the center of the located address bar
             new_tab_center = pyautogui.center(new_tab_location)
@@ -156,8 +266,8 @@ class Fremen:
         else:
             print(image_path, " not found")
 
-    def open_new_tab_on_chrome(self, image_path: str):
-        new_tab_location = pyautogui.locateOnScreen(image_path, confidence=0.7)
+    def open_new_tab_on_chrome(self, image_path: str, frame=None):
+        new_tab_location = self.locate_on_screen(image_path, confidence=0.7, frame=frame)
         if new_tab_location:
             # Get the center of the located address bar
             new_tab_center = pyautogui.center(new_tab_location)
@@ -167,19 +277,51 @@ class Fremen:
 
 
     def open_url(self, url: str):
+        self.current_site = site_of(url)
+        if self.pacer is not None:
+            self.pacer.pace(self.current_site)
         pyautogui.typewrite(url, interval=0.1)
         pyautogui.press('enter')
 
-    def ask(self, model:str = 'llama3.1:8b', question:str = "Is the sky blue?", ollama_url:str = "http://localhost:11434/api/generate"):
-        response = ollama.chat(model=model, messages=[
-        {
-            'role': 'user',
-            'content': question,
-        },
-        ])
-        print(response['message']['content'])
-        return response['message']['content']
-    
+    def wait_until_ready(self, image_path: str, timeout: float = None,
+                         confidence: float = 0.9, site: str = None) -> bool:
+        """Wait until ``image_path`` shows up on the page opened last.
+
+        With a pacer the observed latency (or a timeout as a failure) is
+        recorded against ``site``, which defaults to the last opened URL's.
+        """
+        if self.pacer is None:
+            return self.wait_for_image(image_path, timeout or 30, confidence=confidence) is not None
+        return self.pacer.wait_until_ready(
+            site or self.current_site,
+            lambda: self.if_image_exists(image_path, confidence),
+            timeout,
+        )
+
+    def ask(self, model:str = 'llama3.1:8b', question:str = "Is the sky blue?", ollama_url:str = "http://localhost:11434/api/generate",
+            priority: int = llm.BATCH, content: str = None):
+        """Ask ``model`` through the LLM gateway and return its answer.
+
+        Crawl extraction runs at ``llm.BATCH``; interactive callers pass
+        ``llm.INTERACTIVE`` to be served first. ``ollama_url`` is ignored;
+        the gateway's server is set with ``FREMEN_LLM_URL``.
+
+        With ``content``, ``question`` is a template whose ``{content}`` is
+        replaced by it, and an answer cache, if set, returns the answer
+        given earlier for the same template and near-identical content.
+        """
+        if content is not None and "{content}" not in question:
+            raise ValueError("question needs a {content} placeholder when content is given")
+        cache = self.answer_cache if content is not None else None
+        answer = cache.get(model, question, content) if cache is not None else None
+        if answer is None:
+            prompt = question if content is None else question.replace("{content}", content)
+            gateway = self.gateway or llm.default_gateway()
+            answer = gateway.ask(model, prompt, priority=priority)
+            if cache is not None:
+                cache.put(model, question, content, answer)
+        print(answer)
+        return answer
 
     def select_all_and_return(self):
         pyautogui.hotkey('ctrl','a')
@@ -0,0 +1,315 @@
+# fremen/gui_env.py
+"""Simulated GUI pages as a batched, gym-style training environment.
+
+Every real ``Fremen`` step costs seconds on a live screen, too slow to train
+the Q-learning or policy-gradient agents of ``tutorials/``.
+:class:`VectorGUIEnv` runs many simulated browsers at once. A site is a few
+:class:`Page` objects whose elements are the PNG templates of ``images/``:
+buttons that lead to another page, fields to type into and static text.
+The agent's actions mirror ``Fremen``:
+
+* ``locate`` a template: the observation then shows its box, as
+  ``Fremen.locate_on_screen`` would;
+* ``click`` a template: follows a button, which may require a field to be
+  filled first;
+* ``type`` into a template: fills a field, like the ``fill`` action;
+* ``capture`` the page text: ends the episode with success on a goal page.
+
+An action is ``verb * len(templates) + template``. Sites are compiled into
+arrays and pages are rendered once up front, so :meth:`VectorGUIEnv.step`
+advances every instance with a handful of NumPy indexing operations. Tens
+of thousands of environment steps per second run on a single CPU core.
+"""
+import os
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+try:
+    from gymnasium import spaces
+except ImportError:  # pragma: no cover - optional dependency
+    spaces = None
+
+from .templates import DEFAULT_IMAGES_DIR
+
+LOCATE, CLICK, TYPE, CAPTURE = range(4)
+VERBS = ("locate", "click", "type", "capture")
+
+NONE, BUTTON, FIELD, TEXT = range(4)
+KINDS = {"button": BUTTON, "field": FIELD, "text": TEXT}
+
+# Height and width of the simulated screen in pixels.
+SCREEN = (800, 1280)
+
+STEP_REWARD = -0.01
+INVALID_REWARD = -0.1
+SUCCESS_REWARD = 1.0
+
+# Per template: located, box (x, y, width, height as screen fractions), filled.
+ELEMENT_FEATURES = 6
+
+# ``kind`` is "button", "field" or "text". A button leads to page ``target``
+# (a page name) once the field template ``requires`` has been typed into.
+# ``box`` is (x, y, width, height) in screen pixels; laid out if None.
+Element = namedtuple("Element", "template kind target requires box",
+                     defaults=(None, None, None))
+Page = namedtuple("Page", "name elements goal", defaults=(False,))
+
+
+def template_names(directory: str = DEFAULT_IMAGES_DIR) -> list:
+    """Names of the PNG templates in ``directory``, sorted."""
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(directory)
+                  if name.lower().endswith(".png"))
+
+
+def _load_gray(path: str):
+    if cv2 is not None:
+        return cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    with Image.open(path) as img:
+        return np.asarray(img.convert("L"))
+
+
+def _resize(image, width: int, height: int):
+    if cv2 is not None:
+        return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    return np.asarray(Image.fromarray(image).resize((width, height), Image.BILINEAR))
+
+
+def template_sizes(names: list, directory: str = DEFAULT_IMAGES_DIR) -> dict:
+    """``(width, height)`` of each template, capped to fit several on one screen."""
+    sizes = {}
+    for name in names:
+        path = os.path.join(directory, name + ".png")
+        if Image is not None:
+            with Image.open(path) as img:
+                width, height = img.size
+        else:
+            height, width = _load_gray(path).shape[:2]
+        sizes[name] = (min(width, SCREEN[1] // 4), min(height, SCREEN[0] // 8))
+    return sizes
+
+
+def layout(elements: list, sizes: dict, rng) -> list:
+    """Give elements without a box one: one per row, at a random x."""
+    placed, y = [], 40
+    for element in elements:
+        if element.box is None:
+            width, height = sizes.get(element.template, (120, 40))
+            x = int(rng.integers(20, max(21, SCREEN[1] - width - 20)))
+            element = element._replace(box=(x, y, width, height))
+            y = min(y + height + 20, SCREEN[0] - height)
+        placed.append(element)
+    return placed
+
+
+def random_site(rng, templates: list, pages: int = 4, distractors: int = 2,
+                field_chance: float = 0.5) -> list:
+    """A chain of ``pages`` pages ending on a goal page.
+
+    Each page has a button to the next page, behind a required field with
+    probability ``field_chance``, and ``distractors`` buttons leading back to
+    the first page or staying put. Templates are drawn from ``templates``.
+    """
+    site = []
+    for index in range(pages):
+        drawn = [str(name) for name in rng.choice(
+            templates, size=min(len(templates), 2 + distractors), replace=False)]
+        if index == pages - 1:
+            elements = [Element(drawn[0], "text")]
+        else:
+            field = drawn[1] if rng.random() < field_chance else None
+            elements = [Element(drawn[0], "button", f"page{index + 1}", field)]
+            if field is not None:
+                elements.append(Element(field, "field"))
+        for name in drawn[2:]:
+            target = "page0" if rng.random() < 0.5 else f"page{index}"
+            elements.append(Element(name, "button", target))
+        order = rng.permutation(len(elements))
+        site.append(Page(f"page{index}", [elements[i] for i in order], index == pages - 1))
+    return site
+
+
+class VectorGUIEnv:
+    """``num_envs`` simulated browsers, stepped together.
+
+    ``sites`` is a list of sites, each a list of :class:`Page`; every
+    episode starts on the first page of a randomly drawn site. Follows the
+    Gymnasium vector API: ``reset`` returns ``(observations, info)`` and
+    ``step(actions)`` returns ``(observations, rewards, terminated,
+    truncated, info)``. Finished instances are reset within the same step,
+    so the returned observation is the first of their next episode.
+
+    ``observation="elements"`` gives a ``(num_envs, len(templates), 6)``
+    float array (see ``ELEMENT_FEATURES``). ``"pixels"`` gives the rendered
+    grayscale page at ``pixel_scale``, ``(num_envs, height, width)`` uint8.
+    """
+
+    def __init__(self, sites: list, num_envs: int = 64, max_steps: int = 50,
+                 observation: str = "elements", pixel_scale: float = 0.1,
+                 templates: list = None, images_dir: str = DEFAULT_IMAGES_DIR,
+                 seed=None):
+        if np is None:
+            raise ImportError("numpy package is required for this feature")
+        if observation not in ("elements", "pixels"):
+            raise ValueError("observation must be 'elements' or 'pixels'")
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.observation = observation
+        self.rng = np.random.default_rng(seed)
+        self.templates = list(templates or template_names(images_dir))
+        self._index = {name: k for k, name in enumerate(self.templates)}
+        self.images_dir = images_dir
+        sizes = template_sizes(self.templates, images_dir)
+        self.sites = [[page._replace(elements=layout(page.elements, sizes, self.rng))
+                       for page in site] for site in sites]
+        self._compile()
+        if observation == "pixels":
+            self._render(pixel_scale)
+
+        self.num_actions = len(VERBS) * len(self.templates)
+        if spaces is not None:
+            self.single_action_space = spaces.Discrete(self.num_actions)
+            self.action_space = spaces.MultiDiscrete([self.num_actions] * num_envs)
+
+        self._arange = np.arange(num_envs)
+        self.site = np.zeros(num_envs, dtype=np.int64)
+        self.page = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.located = np.zeros((num_envs, len(self.templates)), dtype=bool)
+        self.filled = np.zeros((num_envs, len(self.templates)), dtype=bool)
+
+    def _compile(self):
+        sites, templates = len(self.sites), len(self.templates)
+        pages = max(len(site) for site in self.sites)
+        self.kind = np.zeros((sites, pages, templates), dtype=np.int8)
+        self.target = np.full((sites, pages, templates), -1, dtype=np.int64)
+        self.requires = np.full((sites, pages, templates), -1, dtype=np.int64)
+        self.boxes = np.zeros((sites, pages, templates, 4), dtype=np.float32)
+        self.goal = np.zeros((sites, pages), dtype=bool)
+        scale = np.array([SCREEN[1], SCREEN[0], SCREEN[1], SCREEN[0]], dtype=np.float32)
+        for s, site in enumerate(self.sites):
+            names = {page.name: p for p, page in enumerate(site)}
+            for p, page in enumerate(site):
+                self.goal[s, p] = page.goal
+                for element in page.elements:
+                    k = self._index[element.template]
+                    self.kind[s, p, k] = KINDS[element.kind]
+                    self.boxes[s, p, k] = np.asarray(element.box, dtype=np.float32) / scale
+                    if element.kind == "button":
+                        self.target[s, p, k] = names[element.target]
+                    if element.requires is not None:
+                        self.requires[s, p, k] = self._index[element.requires]
+        self.visible = self.kind != NONE
+
+    def _render(self, scale: float):
+        height, width = round(SCREEN[0] * scale), round(SCREEN[1] * scale)
+        images = {}
+        self.pixels = np.full(self.kind.shape[:2] + (height, width), 255, dtype=np.uint8)
+        for s, site in enumerate(self.sites):
+            for p, page in enumerate(site):
+                for element in page.elements:
+                    x, y, w, h = (round(v * scale) for v in element.box)
+                    w, h = max(1, min(w, width - x)), max(1, min(h, height - y))
+                    if element.template not in images:
+                        images[element.template] = _load_gray(
+                            os.path.join(self.images_dir, element.template + ".png"))
+                    self.pixels[s, p, y:y + h, x:x + w] = _resize(images[element.template], w, h)
+
+    def _reset_envs(self, envs):
+        self.site[envs] = self.rng.integers(len(self.sites), size=len(envs))
+        self.page[envs] = 0
+        self.steps[envs] = 0
+        self.located[envs] = False
+        self.filled[envs] = False
+
+    def _observe(self):
+        if self.observation == "pixels":
+            return self.pixels[self.site, self.page]
+        obs = np.empty((self.num_envs, len(self.templates), ELEMENT_FEATURES), dtype=np.float32)
+        obs[..., 0] = self.located
+        obs[..., 1:5] = self.boxes[self.site, self.page] * self.located[..., None]
+        obs[..., 5] = self.filled
+        return obs
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._reset_envs(self._arange)
+        return self._observe(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        verb, k = np.divmod(actions, len(self.templates))
+        i, s, p = self._arange, self.site, self.page
+        kind = self.kind[s, p, k]
+        visible = kind != NONE
+
+        found = (verb == LOCATE) & visible
+        self.located[i[found], k[found]] = True
+
+        typed = (verb == TYPE) & (kind == FIELD)
+        self.filled[i[typed], k[typed]] = True
+
+        click = verb == CLICK
+        required = self.requires[s, p, k]
+        ready = (required < 0) | self.filled[i, np.maximum(required, 0)]
+        moves = click & (kind == BUTTON) & ready
+        success = (verb == CAPTURE) & self.goal[s, p]
+
+        invalid = ((click & ~visible) | (click & (kind == BUTTON) & ~ready)
+                   | ((verb == TYPE) & ~typed) | ((verb == CAPTURE) & ~success))
+        rewards = np.full(self.num_envs, STEP_REWARD, dtype=np.float32)
+        rewards[invalid] += INVALID_REWARD
+        rewards[success] += SUCCESS_REWARD
+
+        moved = np.flatnonzero(moves)
+        self.page[moved] = self.target[s[moved], p[moved], k[moved]]
+        self.located[moved] = False
+        self.filled[moved] = False
+
+        self.steps += 1
+        terminated = success
+        truncated = ~terminated & (self.steps >= self.max_steps)
+        done = np.flatnonzero(terminated | truncated)
+        if done.size:
+            self._reset_envs(done)
+        return self._observe(), rewards, terminated, truncated, {}
+
+    def action(self, verb: str, template: str = None) -> int:
+        """The action id of ``verb`` ("locate", "click", "type", "capture") on ``template``."""
+        return VERBS.index(verb) * len(self.templates) + (
+            self._index[template] if template is not None else 0)
+
+    def describe(self, action: int) -> tuple:
+        """``(verb, template)`` of an action id."""
+        verb, k = divmod(int(action), len(self.templates))
+        return VERBS[verb], (self.templates[k] if verb != CAPTURE else None)
+
+
+def apply(fremen, verb: str, template: str = None, text: str = ""):
+    """Carry out a described action on a real ``Fremen``, e.g. a trained policy's choice."""
+    if verb == "locate":
+        return fremen.locate_on_screen(template)
+    if verb == "click":
+        return fremen.click(template)
+    if verb == "type":
+        if not fremen.click(template):
+            return False
+        fremen.type_text(text, clear=True)
+        return True
+    if verb == "capture":
+        return fremen.select_all_and_return()
+    raise ValueError(f"Unknown action {verb!r}")
@@ -0,0 +1,376 @@
+# fremen/llm.py
+"""Shared gateway in front of the local model server.
+
+Every LLM call in the project (``Fremen.ask``, ``StepExtractor``, workflow
+nodes, crawl pipelines) goes through an :class:`LLMGateway` instead of
+talking to Ollama directly. The gateway
+
+* coalesces identical in-flight requests (same model, messages and
+  options): later callers get the future of the request already queued or
+  running, so a prompt is sent once however many callers want it;
+* caps the requests running at once per model, queueing the rest;
+* serves each model's queue by priority, then arrival, so an
+  ``INTERACTIVE`` request overtakes queued ``BATCH`` crawl extraction; a
+  coalesced caller with a higher priority promotes the queued request;
+* keeps queue depth, wait and service time statistics (:meth:`LLMGateway.stats`).
+
+Within one process, use :func:`default_gateway`. Separate processes (crawl
+scripts, screen sessions) share one queue by pointing ``FREMEN_LLM_URL`` at a
+:class:`GatewayServer`, which speaks Ollama's ``/api/chat``::
+
+    python -m fremen.llm --port 11500 --upstream http://localhost:11434
+"""
+import hashlib
+import heapq
+import http.client
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+INTERACTIVE = 0
+NORMAL = 5
+BATCH = 10
+
+DEFAULT_URL = "http://localhost:11434"
+DEFAULT_TIMEOUT = 300.0
+
+# Recent wait and service times kept per model for the percentiles.
+LATENCY_SAMPLES = 1000
+
+
+class LLMError(Exception):
+    """The model server failed or returned an unusable answer."""
+
+
+class OllamaTransport:
+    """POST ``/api/chat`` over keep-alive connections, one per thread."""
+
+    def __init__(self, base_url: str = DEFAULT_URL, timeout: float = DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def __call__(self, model: str, messages: list, options: dict = None,
+                 priority: int = NORMAL) -> str:
+        body = {"model": model, "messages": messages, "stream": False}
+        if options:
+            body["options"] = options
+        data = json.dumps(body).encode()
+        headers = {"Content-Type": "application/json", "X-Priority": str(priority)}
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request("POST", "/api/chat", body=data, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException, OSError) as exc:
+                # A kept-alive connection the server closed; retry once on a new one.
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise LLMError(f"Model server unreachable: {exc}") from exc
+        if response.status != 200:
+            raise LLMError(f"Model server returned {response.status}: {payload[:200]!r}")
+        try:
+            return json.loads(payload)["message"]["content"]
+        except (ValueError, KeyError, TypeError) as exc:
+            raise LLMError(f"Unexpected model server reply: {payload[:200]!r}") from exc
+
+
+class _Request:
+    __slots__ = ("key", "model", "messages", "options", "priority", "future",
+                 "enqueued", "started", "callers")
+
+    def __init__(self, key, model, messages, options, priority):
+        self.key = key
+        self.model = model
+        self.messages = messages
+        self.options = options
+        self.priority = priority
+        self.future = Future()
+        self.enqueued = time.monotonic()
+        self.started = None
+        self.callers = 1
+
+
+class _ModelState:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        self.queue = []           # heap of (priority, seq, request)
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.waits = deque(maxlen=LATENCY_SAMPLES)
+        self.services = deque(maxlen=LATENCY_SAMPLES)
+
+
+def _percentile(samples, fraction: float):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def request_key(model: str, messages: list, options: dict = None) -> str:
+    """Digest identifying requests that must get the same answer."""
+    text = json.dumps([model, messages, options or {}], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class LLMGateway:
+    """Priority queue per model in front of a chat ``transport``.
+
+    ``transport(model, messages, options, priority)`` returns the answer
+    text; it defaults to :class:`OllamaTransport` on ``base_url``.
+    ``concurrency`` is the default number of requests a model may have
+    running, ``model_limits`` overrides it per model.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_URL, concurrency: int = 1,
+                 model_limits: dict = None, transport=None, timeout: float = DEFAULT_TIMEOUT,
+                 max_workers: int = 32):
+        self.transport = transport or OllamaTransport(base_url, timeout)
+        self.concurrency = concurrency
+        self.model_limits = dict(model_limits or {})
+        self.timeout = timeout
+        self._models = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    def _model(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            state = self._models[model] = _ModelState(self.model_limits.get(model, self.concurrency))
+        return state
+
+    def submit(self, model: str, messages: list, options: dict = None,
+               priority: int = NORMAL) -> Future:
+        """Queue a chat request and return a future of the answer text."""
+        key = request_key(model, messages, options)
+        with self._lock:
+            state = self._model(model)
+            request = self._inflight.get(key)
+            if request is not None:
+                request.callers += 1
+                state.coalesced += 1
+                if request.started is None and priority < request.priority:
+                    # Promote; the old heap entry is skipped when popped.
+                    request.priority = priority
+                    heapq.heappush(state.queue, (priority, next(self._seq), request))
+                return request.future
+            request = _Request(key, model, messages, options, priority)
+            self._inflight[key] = request
+            heapq.heappush(state.queue, (priority, next(self._seq), request))
+            state.queued += 1
+            self._dispatch(state)
+        return request.future
+
+    def chat(self, model: str, messages: list, options: dict = None,
+             priority: int = NORMAL, timeout: float = None) -> str:
+        """Return the answer to ``messages``, waiting for a slot if needed."""
+        return self.submit(model, messages, options, priority).result(timeout or self.timeout)
+
+    def ask(self, model: str, question: str, priority: int = NORMAL, **kwargs) -> str:
+        """Answer a single user message."""
+        return self.chat(model, [{"role": "user", "content": question}], priority=priority,
+                         **kwargs)
+
+    def _dispatch(self, state: _ModelState) -> None:
+        # Called with the lock held.
+        while state.running < state.limit and state.queue:
+            priority, _, request = heapq.heappop(state.queue)
+            if request.started is not None or priority != request.priority:
+                continue
+            request.started = time.monotonic()
+            state.queued -= 1
+            state.running += 1
+            state.waits.append(request.started - request.enqueued)
+            self._executor.submit(self._run, state, request)
+
+    def _run(self, state: _ModelState, request: _Request) -> None:
+        try:
+            answer = self.transport(request.model, request.messages, request.options,
+                                    request.priority)
+            error = None
+        except BaseException as exc:
+            answer, error = None, exc
+        finished = time.monotonic()
+        with self._lock:
+            self._inflight.pop(request.key, None)
+            state.running -= 1
+            state.services.append(finished - request.started)
+            if error is None:
+                state.completed += 1
+            else:
+                state.failed += 1
+            self._dispatch(state)
+        if error is None:
+            request.future.set_result(answer)
+        else:
+            request.future.set_exception(error)
+
+    def stats(self) -> dict:
+        """Queue depth, counters and latency percentiles (seconds) per model."""
+        with self._lock:
+            models = {}
+            for name, state in self._models.items():
+                by_priority = {}
+                for priority, _, request in state.queue:
+                    if request.started is None and priority == request.priority:
+                        by_priority[priority] = by_priority.get(priority, 0) + 1
+                models[name] = {
+                    "limit": state.limit,
+                    "running": state.running,
+                    "queued": state.queued,
+                    "queued_by_priority": by_priority,
+                    "completed": state.completed,
+                    "failed": state.failed,
+                    "coalesced": state.coalesced,
+                    "wait_p50": _percentile(state.waits, 0.5),
+                    "wait_p95": _percentile(state.waits, 0.95),
+                    "service_p50": _percentile(state.services, 0.5),
+                    "service_p95": _percentile(state.services, 0.95),
+                }
+            return {
+                "queued": sum(m["queued"] for m in models.values()),
+                "running": sum(m["running"] for m in models.values()),
+                "models": models,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_gateway() -> LLMGateway:
+    """The process-wide gateway, configured from the environment.
+
+    ``FREMEN_LLM_URL`` is the model server (or a :class:`GatewayServer`),
+    ``FREMEN_LLM_CONCURRENCY`` the requests each model may run at once.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LLMGateway(
+                os.getenv("FREMEN_LLM_URL", DEFAULT_URL),
+                concurrency=int(os.getenv("FREMEN_LLM_CONCURRENCY", "1")),
+            )
+        return _default
+
+
+class _GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Like Ollama, answer kept-alive connections without Nagle delays.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, self.server.gateway.stats())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            priority = int(self.headers.get("X-Priority", request.get("priority", NORMAL)))
+            model, messages = request["model"], request["messages"]
+        except (ValueError, KeyError, TypeError):
+            self._send(400, {"error": "expected model and messages"})
+            return
+        if self.path != "/api/chat":
+            self._send(404, {"error": "only /api/chat is served"})
+            return
+        try:
+            answer = self.server.gateway.chat(model, messages, request.get("options"), priority)
+        except Exception as exc:
+            self._send(502, {"error": str(exc)})
+            return
+        self._send(200, {"model": model, "message": {"role": "assistant", "content": answer},
+                         "done": True})
+
+
+class GatewayServer:
+    """Serve ``gateway`` as an Ollama-compatible ``/api/chat`` endpoint.
+
+    Clients pass their priority in an ``X-Priority`` header (as
+    :class:`OllamaTransport` does) or a ``priority`` body field.
+    ``GET /stats`` returns :meth:`LLMGateway.stats`.
+    """
+
+    def __init__(self, gateway: LLMGateway, host: str = "127.0.0.1", port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), _GatewayHandler)
+        self._server.daemon_threads = True
+        self._server.gateway = gateway
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the shared LLM gateway.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--upstream", default=os.getenv("FREMEN_LLM_UPSTREAM", DEFAULT_URL))
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="requests each model may run at once")
+    args = parser.parse_args()
+    server = GatewayServer(LLMGateway(args.upstream, concurrency=args.concurrency),
+                           args.host, args.port)
+    print(f"LLM gateway on {server.url}, forwarding to {args.upstream}")
+    server.start()._thread.join()
@@ -0,0 +1,91 @@
+# fremen/matching.py
+"""Template matching on NumPy frames.
+
+These helpers do what ``pyautogui.locateOnScreen`` does, but against a frame
+the caller already holds (for example one returned by
+:mod:`fremen.capture`), so no screenshot or copy is made per lookup.
+"""
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+from .capture import to_gray
+
+# Same fields as pyscreeze.Box, so results work with pyautogui.center().
+Box = namedtuple("Box", "left top width height")
+
+
+def load_template(image_path: str, grayscale: bool = True):
+    """Decode a template image from disk."""
+    if cv2 is None:
+        raise ImportError("opencv-python package is required for this feature")
+    flag = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+    template = cv2.imread(image_path, flag)
+    if template is None:
+        raise ValueError(f"Cannot read template {image_path!r}")
+    return template
+
+
+def _best_match(haystack, needle, std=None):
+    """Return ``(score, (x, y))`` of the best match of ``needle``."""
+    if std is None:
+        std = float(needle.std())
+    if std < 1e-6:
+        # Normalised correlation is undefined for a flat template; fall back
+        # to squared differences so solid-colour buttons can still match.
+        scores = cv2.matchTemplate(haystack, needle, cv2.TM_SQDIFF_NORMED)
+        best, _, loc, _ = cv2.minMaxLoc(scores)
+        return 1.0 - best, loc
+    scores = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+    _, best, _, loc = cv2.minMaxLoc(scores)
+    return best, loc
+
+
+def locate(template, frame, confidence: float = 0.9, region=None):
+    """Return the best match of ``template`` in ``frame`` as a :class:`Box`.
+
+    ``template`` is an image path, an array or a
+    :class:`fremen.templates.Template`; for the latter the original size is
+    tried first and the precomputed scaled variants only if it is not found.
+    ``frame`` is a BGR, BGRA or grayscale array and is searched in place;
+    ``region=(left, top, width, height)`` restricts the search to a slice of
+    it. Matching is done in grayscale with normalised cross-correlation.
+    Returns ``None`` when the best score is below ``confidence``.
+    """
+    if cv2 is None:
+        raise ImportError("opencv-python package is required for this feature")
+    if isinstance(template, str):
+        template = load_template(template)
+    left, top = 0, 0
+    if region is not None:
+        left, top, width, height = region
+        frame = frame[top:top + height, left:left + width]
+    haystack = to_gray(frame)
+
+    if hasattr(template, "variants"):
+        scales = sorted(template.variants, key=lambda scale: scale != 1.0)
+        candidates = [(template.variants[s], template.stats[s][1]) for s in scales]
+    else:
+        candidates = [(to_gray(template), None)]
+
+    for needle, std in candidates:
+        th, tw = needle.shape[:2]
+        if th > haystack.shape[0] or tw > haystack.shape[1]:
+            continue
+        best, (x, y) = _best_match(haystack, needle, std)
+        if best >= confidence:
+            return Box(left + x, top + y, tw, th)
+    return None
+
+
+def center(box):
+    """Return the ``(x, y)`` centre of a :class:`Box`."""
+    return box.left + box.width // 2, box.top + box.height // 2
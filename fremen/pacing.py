@@ -0,0 +1,161 @@
+# fremen/pacing.py
+"""Adaptive per-site pacing for crawlers.
+
+Instead of fixed ``wait()`` calls between requests, a :class:`Pacer` keeps,
+for every site, the delay to leave between requests and adjusts it from what
+it observes. Each request either succeeds (the page became ready) or fails
+(timeout, error, throttling page). The delay moves AIMD-style:
+
+* on success it shrinks by ``decrease_step`` seconds (additive speed-up),
+* on failure, or when page-ready latency jumps well above the best seen so
+  far, it grows by ``backoff_factor`` (multiplicative slow-down),
+
+and always stays within the site's ``[min_delay, max_delay]`` bounds. A fast
+site converges to its minimum delay while a throttling one backs off quickly.
+Backing off starts from at least ``decrease_step`` (``BACKOFF_FLOOR`` when
+that is zero), so a delay of zero still grows.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Seconds a zero delay grows from when decrease_step is zero too.
+BACKOFF_FLOOR = 0.1
+
+
+def site_of(url: str) -> str:
+    """Return the host part of ``url``, which is what pacing is keyed by."""
+    host = urlsplit(url if "//" in url else "//" + url).hostname or url
+    return host[4:] if host.startswith("www.") else host
+
+
+class SitePace:
+    """Pacing state and statistics for a single site."""
+
+    def __init__(self, min_delay: float, max_delay: float, initial_delay: float,
+                 ready_timeout: float):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min(max(initial_delay, min_delay), max_delay)
+        self.ready_timeout = ready_timeout
+        self.latency = None        # EWMA of page-ready latency, seconds
+        self.best_latency = None   # lowest latency observed
+        self.failure_rate = 0.0    # EWMA of failures, 0..1
+        self.successes = 0
+        self.failures = 0
+        self.next_request = 0.0    # monotonic time the next request may start
+
+    def snapshot(self) -> dict:
+        return {
+            "delay": self.delay,
+            "requests_per_min": 60.0 / self.delay if self.delay else None,
+            "latency": self.latency,
+            "failure_rate": self.failure_rate,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class Pacer:
+    """AIMD pacing controller shared by every request a crawler makes.
+
+    ``sites`` optionally maps a site to a dict of per-site overrides for
+    ``min_delay``, ``max_delay``, ``initial_delay`` and ``ready_timeout``.
+    ``clock`` and ``sleep`` can be replaced in tests.
+    """
+
+    def __init__(self, min_delay: float = 0.5, max_delay: float = 60.0,
+                 initial_delay: float = 2.0, ready_timeout: float = 30.0,
+                 decrease_step: float = 0.25, backoff_factor: float = 2.0,
+                 slow_factor: float = 3.0, smoothing: float = 0.2, sites: dict = None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.defaults = {
+            "min_delay": min_delay,
+            "max_delay": max_delay,
+            "initial_delay": initial_delay,
+            "ready_timeout": ready_timeout,
+        }
+        self.decrease_step = decrease_step
+        self.backoff_factor = backoff_factor
+        self.slow_factor = slow_factor
+        self.smoothing = smoothing
+        self.overrides = dict(sites or {})
+        self._clock = clock
+        self._sleep = sleep
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def configure(self, site: str, **bounds):
+        """Set per-site bounds, e.g. ``configure("scscourt.org", min_delay=4)``."""
+        with self._lock:
+            self.overrides.setdefault(site, {}).update(bounds)
+            self._sites.pop(site, None)
+
+    def _site(self, site: str) -> SitePace:
+        state = self._sites.get(site)
+        if state is None:
+            state = SitePace(**{**self.defaults, **self.overrides.get(site, {})})
+            self._sites[site] = state
+        return state
+
+    def pace(self, site: str) -> float:
+        """Block until a request to ``site`` is allowed; return seconds slept."""
+        with self._lock:
+            state = self._site(site)
+            now = self._clock()
+            start = max(now, state.next_request)
+            # Reserve the slot before sleeping so concurrent callers queue up.
+            state.next_request = start + state.delay
+        waited = start - now
+        if waited > 0:
+            self._sleep(waited)
+        return waited
+
+    def record(self, site: str, latency: float = None, ok: bool = True):
+        """Feed back the outcome of one request and adjust the site's delay."""
+        with self._lock:
+            state = self._site(site)
+            alpha = self.smoothing
+            state.failure_rate += alpha * ((0.0 if ok else 1.0) - state.failure_rate)
+            slow = False
+            if ok and latency is not None:
+                state.latency = latency if state.latency is None else (
+                    state.latency + alpha * (latency - state.latency))
+                if state.best_latency is None or latency < state.best_latency:
+                    state.best_latency = latency
+                slow = latency > self.slow_factor * max(state.best_latency, 1e-3)
+            if ok:
+                state.successes += 1
+            else:
+                state.failures += 1
+            if ok and not slow:
+                state.delay = max(state.min_delay, state.delay - self.decrease_step)
+            else:
+                floor = self.decrease_step or BACKOFF_FLOOR
+                state.delay = min(state.max_delay,
+                                  max(state.delay, floor) * self.backoff_factor)
+
+    def wait_until_ready(self, site: str, is_ready, timeout: float = None,
+                         interval: float = 0.25) -> bool:
+        """Poll ``is_ready()`` until it is true, recording the page latency.
+
+        Times out after ``timeout`` seconds (the site's ``ready_timeout`` by
+        default) and records a failure. Returns whether the page got ready.
+        """
+        with self._lock:
+            if timeout is None:
+                timeout = self._site(site).ready_timeout
+        start = self._clock()
+        while True:
+            ready = is_ready()
+            elapsed = self._clock() - start
+            if ready or elapsed >= timeout:
+                break
+            self._sleep(interval)
+        self.record(site, elapsed if ready else None, ok=ready)
+        return ready
+
+    def rates(self) -> dict:
+        """Return the current delay, rate and error statistics per site."""
+        with self._lock:
+            return {site: state.snapshot() for site, state in self._sites.items()}
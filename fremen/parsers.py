@@ -0,0 +1,54 @@
+# fremen/parsers.py
+"""Regex helpers for the court search pages scraped by the pipelines."""
+import re
+
+# Compiled once at import time; these run once per scraped page.
+_ENTRIES_PATTERN = re.compile(r'of (\d+) entries')
+_FIRST_ENTRY_PATTERN = re.compile(
+    r'([A-Za-z]+)([A-Za-z]+)([A-Za-z.]+)([A-Za-z\s]+VS [A-Za-z]+)([0-9A-Z]+)([A-Z]+)(\d{2}/\d{2}/\d{4})'
+)
+
+
+def extract_number(text):
+    """Return the total from a "Showing 1 to 10 of N entries" footer."""
+    match = _ENTRIES_PATTERN.search(text)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def extract_first_entry(text):
+    """Parse the first data row of a party search result table."""
+    # Skip the header line
+    lines = text.split('\n')
+    if len(lines) < 2:
+        return None
+
+    # Get the first data line
+    data_line = lines[1]
+
+    match = _FIRST_ENTRY_PATTERN.search(data_line)
+    if match:
+        return {
+            'LastName': match.group(1),
+            'FirstName': match.group(2),
+            'MiddleName': match.group(3),
+            'CaseName': match.group(4).strip(),
+            'CaseNumber': match.group(5),
+            'Type': match.group(6),
+            'DateFiled': match.group(7)
+        }
+    return None
+
+
+def extract_between_multilines(start: str, end: str, large_string: str):
+    """Return every block of ``large_string`` found between ``start`` and ``end``."""
+    # Escape special regex characters in the multiline strings
+    start_pattern = re.escape(start.strip())
+    end_pattern = re.escape(end.strip())
+
+    # Create a regex pattern to find text between the start and end patterns
+    pattern = rf"{start_pattern}(.*?){end_pattern}"
+
+    # Use re.DOTALL to match across multiple lines
+    return re.findall(pattern, large_string, re.DOTALL)
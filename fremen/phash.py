@@ -0,0 +1,198 @@
+# fremen/phash.py
+"""Perceptual hashes and a near-duplicate index for saved images.
+
+``dhash`` and ``phash`` reduce an image to a 64-bit integer that changes
+little under re-encoding, small crops or resizing, so two captures of the
+same attorney photo end up a few bits apart. :class:`HashIndex` stores those
+hashes keyed by an id (the attorney id for face crops) and answers "is there
+a saved image within N bits of this one" without scanning every entry.
+"""
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+HASH_BITS = 64
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+
+def _gray_resized(image, width: int, height: int):
+    """Return ``image`` (path, PIL image or RGB/gray array) as a small float array."""
+    if isinstance(image, str):
+        if Image is None:
+            raise ImportError("Pillow package is required for this feature")
+        with Image.open(image) as img:
+            image = np.asarray(img.convert("L"))
+    elif Image is not None and isinstance(image, Image.Image):
+        image = np.asarray(image.convert("L"))
+    image = np.asarray(image)
+    if image.ndim == 3:
+        image = image[..., :3] @ np.array([0.299, 0.587, 0.114])
+    image = image.astype(np.float32)
+    if cv2 is not None:
+        return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    return np.asarray(Image.fromarray(image).resize((width, height), Image.BILINEAR))
+
+
+def _to_int(bits) -> int:
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def dhash(image) -> int:
+    """Difference hash: compares each pixel of a 9x8 thumbnail with its neighbour."""
+    pixels = _gray_resized(image, 9, 8)
+    return _to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+_DCT_CACHE = {}
+
+
+def _dct_matrix(n: int):
+    matrix = _DCT_CACHE.get(n)
+    if matrix is None:
+        k = np.arange(n)[:, None]
+        matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+        _DCT_CACHE[n] = matrix
+    return matrix
+
+
+def phash(image) -> int:
+    """DCT hash: thresholds the lowest 8x8 frequencies of a 32x32 thumbnail."""
+    pixels = _gray_resized(image, 32, 32)
+    dct = _dct_matrix(32)
+    low = (dct @ pixels @ dct.T)[:8, :8]
+    return _to_int(low > np.median(low))
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def _without_extension(image_path: str) -> str:
+    path = os.path.normcase(image_path)
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        path = os.path.splitext(path)[0]
+    return path
+
+
+class HashIndex:
+    """Near-duplicate index over 64-bit perceptual hashes.
+
+    Uses multi-index hashing: each hash is split into ``max_distance + 1``
+    chunks and every chunk is indexed in its own table. Two hashes at most
+    ``max_distance`` bits apart must agree exactly on at least one chunk, so
+    a lookup only compares against entries sharing a chunk with the query
+    instead of every stored hash.
+
+    With ``path`` set, entries are loaded from and appended to a TSV file of
+    ``key, hash, image path`` rows.
+    """
+
+    def __init__(self, path: str = None, max_distance: int = 6):
+        if not 0 <= max_distance < HASH_BITS:
+            raise ValueError("max_distance must be between 0 and 63")
+        self.path = path
+        self.max_distance = max_distance
+        chunks = max_distance + 1
+        bounds = [round(i * HASH_BITS / chunks) for i in range(chunks + 1)]
+        self._chunks = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        self._tables = [{} for _ in self._chunks]
+        self.entries = []  # (key, hash, image path)
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    key, value, image_path = line.rstrip("\n").split("\t")
+                    self._insert(key, int(value, 16), image_path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _insert(self, key: str, value: int, image_path: str):
+        position = len(self.entries)
+        self.entries.append((key, value, image_path))
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            table.setdefault((value >> shift) & mask, []).append(position)
+
+    def add(self, key, value: int, image_path: str = ""):
+        """Index ``value`` under ``key`` and persist it if the index has a path."""
+        key = str(key)
+        self._insert(key, value, image_path)
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(f"{key}\t{value:016x}\t{image_path}\n")
+
+    def find(self, value: int, key=None, max_distance: int = None) -> list:
+        """Return ``(distance, key, image path)`` matches, closest first.
+
+        ``key`` restricts matches to one id; ``max_distance`` may be lowered
+        per query but not raised above the index's own.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        elif max_distance > self.max_distance:
+            raise ValueError(f"index was built for max_distance <= {self.max_distance}")
+        key = None if key is None else str(key)
+        seen, matches = set(), []
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            for position in table.get((value >> shift) & mask, ()):
+                if position in seen:
+                    continue
+                seen.add(position)
+                entry_key, entry_value, image_path = self.entries[position]
+                if key is not None and entry_key != key:
+                    continue
+                distance = hamming(value, entry_value)
+                if distance <= max_distance:
+                    matches.append((distance, entry_key, image_path))
+        matches.sort()
+        return matches
+
+    def contains(self, value: int, key=None, max_distance: int = None) -> bool:
+        return bool(self.find(value, key, max_distance))
+
+    def index_directory(self, directory: str, hash_func=dhash,
+                        key_pattern: str = r"id-(\d+)") -> int:
+        """Hash every image in ``directory`` not indexed yet; return how many.
+
+        The key is the first group of ``key_pattern`` in the file name, or the
+        first number in it when the pattern does not match. Images that
+        ``hash_func`` cannot handle (unreadable, or no face found by a
+        face-cropping hash function) are skipped. Indexed paths are compared
+        without their image extension, which a browser adds to the name typed
+        into its Save-As dialog.
+        """
+        known = {_without_extension(image_path) for _, _, image_path in self.entries}
+        added = 0
+        for name in sorted(os.listdir(directory)):
+            image_path = os.path.join(directory, name)
+            if (not name.lower().endswith(IMAGE_EXTENSIONS)
+                    or _without_extension(image_path) in known):
+                continue
+            match = re.search(key_pattern, name) or re.search(r"\d+", name)
+            if match is None:
+                continue
+            key = match.group(match.lastindex or 0)
+            try:
+                value = hash_func(image_path)
+            except (OSError, ValueError, IndexError):
+                continue
+            self.add(key, value, image_path)
+            added += 1
+        return added
@@ -0,0 +1,239 @@
+# fremen/templates.py
+"""Template registry backed by a memory-mapped atlas file.
+
+Decoding a PNG and converting it to grayscale on every lookup adds up when
+a crawler clicks through the same handful of buttons thousands of times.
+:class:`TemplateRegistry` compiles a directory of template PNGs once into a
+single atlas file holding, for each template, grayscale pixels at several
+scales plus their mean and standard deviation. Later processes only map that
+file; templates are then looked up by name (the PNG file name without its
+extension) and their pixels are read straight from the page cache.
+
+The atlas records the size and modification time of every source PNG and is
+rebuilt automatically when a PNG is added, removed or changed.
+
+Atlas layout: an 8-byte magic, a little-endian uint64 header length, a JSON
+header and then the pixel data, aligned to 64 bytes.
+"""
+import json
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    cv2 = None
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+# The images/ directory that ships next to the fremen package.
+DEFAULT_IMAGES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images"
+)
+ATLAS_FILENAME = ".templates.atlas"
+DEFAULT_SCALES = (0.8, 1.0, 1.25)
+
+_MAGIC = b"FRMATLS1"
+_ALIGN = 64
+
+
+class Template:
+    """A named template with grayscale variants read from an atlas."""
+
+    def __init__(self, name: str, path: str, variants: dict, stats: dict):
+        self.name = name
+        self.path = path
+        # scale -> (height, width) uint8 array, a view into the atlas
+        self.variants = variants
+        # scale -> (mean, std) of the grayscale pixels
+        self.stats = stats
+
+    @property
+    def gray(self):
+        """The grayscale template at its original size."""
+        return self.variants[1.0]
+
+    def __repr__(self) -> str:
+        return f"<Template {self.name} {self.gray.shape[1]}x{self.gray.shape[0]}>"
+
+
+def _decode_gray(path: str):
+    if cv2 is not None:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Cannot read template {path!r}")
+        return image
+    if Image is not None:
+        with Image.open(path) as image:
+            return np.asarray(image.convert("L"))
+    raise ImportError("opencv-python or Pillow is required for this feature")
+
+
+def _resize(image, scale: float):
+    height = max(1, round(image.shape[0] * scale))
+    width = max(1, round(image.shape[1] * scale))
+    if cv2 is not None:
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        return cv2.resize(image, (width, height), interpolation=interpolation)
+    return np.asarray(Image.fromarray(image).resize((width, height), Image.BILINEAR))
+
+
+def _scan_sources(directory: str) -> dict:
+    """Return ``{name: {file, mtime_ns, size}}`` for the PNGs in ``directory``."""
+    sources = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name, ext = os.path.splitext(entry.name)
+            if ext.lower() != ".png" or not entry.is_file():
+                continue
+            stat = entry.stat()
+            sources[name] = {
+                "file": entry.name,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+            }
+    return sources
+
+
+def compile_atlas(directory: str, atlas_path: str, scales=DEFAULT_SCALES) -> dict:
+    """Decode every PNG in ``directory`` and write the atlas; return its header."""
+    if np is None:
+        raise ImportError("numpy package is required for this feature")
+    scales = sorted(set(scales) | {1.0})
+    sources = _scan_sources(directory)
+    entries, chunks, offset = {}, [], 0
+    for name in sorted(sources):
+        gray = _decode_gray(os.path.join(directory, sources[name]["file"]))
+        variants = []
+        for scale in scales:
+            pixels = gray if scale == 1.0 else _resize(gray, scale)
+            pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+            variants.append({
+                "scale": scale,
+                "offset": offset,
+                "shape": list(pixels.shape),
+                "mean": float(pixels.mean()),
+                "std": float(pixels.std()),
+            })
+            chunks.append(pixels.tobytes())
+            offset += pixels.size
+        entries[name] = variants
+
+    header = json.dumps({
+        "version": 1,
+        "scales": scales,
+        "sources": sources,
+        "entries": entries,
+    }).encode()
+    data_offset = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+    # Write to a temporary file and rename so readers never map a partial atlas.
+    tmp_path = f"{atlas_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * (data_offset - f.tell()))
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, atlas_path)
+    return json.loads(header)
+
+
+def _read_header(atlas_path: str):
+    with open(atlas_path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{atlas_path!r} is not a template atlas")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+    data_offset = -(-(len(_MAGIC) + 8 + length) // _ALIGN) * _ALIGN
+    return header, data_offset
+
+
+class TemplateRegistry:
+    """Look up templates by name from a compiled, memory-mapped atlas.
+
+    ``directory`` holds the source PNGs. The atlas is written next to them
+    unless ``atlas_path`` says otherwise. With ``check=False`` the registry
+    trusts an existing atlas without stat-ing the sources.
+    """
+
+    def __init__(self, directory: str = DEFAULT_IMAGES_DIR, atlas_path: str = None,
+                 scales=DEFAULT_SCALES, check: bool = True):
+        self.directory = directory
+        self.atlas_path = atlas_path or os.path.join(directory, ATLAS_FILENAME)
+        self.scales = tuple(scales)
+        self.rebuilds = 0
+        self._templates = {}
+        self._load(check)
+
+    def _load(self, check: bool):
+        header = None
+        if os.path.exists(self.atlas_path):
+            try:
+                header, data_offset = _read_header(self.atlas_path)
+            except (ValueError, OSError, struct.error):
+                header = None
+        stale = header is None or sorted(header["scales"]) != sorted(set(self.scales) | {1.0})
+        if check and not stale:
+            stale = header["sources"] != _scan_sources(self.directory)
+        if stale:
+            compile_atlas(self.directory, self.atlas_path, self.scales)
+            self.rebuilds += 1
+            header, data_offset = _read_header(self.atlas_path)
+
+        self._header = header
+        self._templates = {}
+        total = sum(
+            v["shape"][0] * v["shape"][1] for vs in header["entries"].values() for v in vs
+        )
+        if total == 0:
+            self._data = np.zeros(0, dtype=np.uint8)
+        else:
+            self._data = np.memmap(self.atlas_path, dtype=np.uint8, mode="r",
+                                   offset=data_offset, shape=(total,))
+
+    def refresh(self) -> bool:
+        """Rebuild and remap the atlas if any source PNG changed.
+
+        Returns True when a rebuild happened. Long-running crawlers can call
+        this between batches to pick up edited templates.
+        """
+        if self._header["sources"] == _scan_sources(self.directory):
+            return False
+        self._load(check=True)
+        return True
+
+    def names(self) -> list:
+        return sorted(self._header["entries"])
+
+    def path(self, name: str) -> str:
+        """Return the source PNG path of template ``name``."""
+        return os.path.join(self.directory, self._header["sources"][name]["file"])
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and name in self._header["entries"]
+
+    def __len__(self) -> int:
+        return len(self._header["entries"])
+
+    def __getitem__(self, name: str) -> Template:
+        template = self._templates.get(name)
+        if template is None:
+            variants, stats = {}, {}
+            for v in self._header["entries"][name]:
+                height, width = v["shape"]
+                start = v["offset"]
+                variants[v["scale"]] = self._data[start:start + height * width].reshape(height, width)
+                stats[v["scale"]] = (v["mean"], v["std"])
+            template = Template(name, self.path(name), variants, stats)
+            self._templates[name] = template
+        return template
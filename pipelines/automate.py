@@ -2,11 +2,13 @@
 import time
 import os
 from fremen import Fremen
+from fremen.templates import TemplateRegistry
+from fremen.answer_cache import AnswerCache
 
-base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'images')
-print(base_dir)
 
-fremen = Fremen()
+# Re-crawls of unchanged pages reuse earlier answers instead of asking again.
+answers = AnswerCache(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'answers.sqlite'))
+fremen = Fremen(templates=TemplateRegistry(), answer_cache=answers)
 fremen.activate_chrome()
 print(fremen.greet())
 
@@ -20,12 +22,12 @@ if not chrome_activated:
 
 # Brief pause to ensure Chrome window is active
 fremen.wait(2)
-fremen.open_new_tab_on_chrome(os.path.join(base_dir, 'new_tab_light.png'))
+fremen.open_new_tab_on_chrome('new_tab_light')
 fremen.wait(2)
 fremen.open_url("https://en.wikipedia.org/wiki/Robert_Weisberg")
 content = fremen.select_all_and_return()
 
-speciality = fremen.ask(model="llama3.1:8b", question=f"find the specility of the lawyer in the following text, your answer should be in one sentence: {content}")
+speciality = fremen.ask(model="llama3.1:8b", question="find the specility of the lawyer in the following text, your answer should be in one sentence: {content}", content=content)
 print(speciality)
 
 exit()
@@ -3,17 +3,16 @@
 # 
 import os
 from fremen import Fremen, extract_json
+from fremen.templates import TemplateRegistry
 import pandas as pd
 from typing import Tuple, Set
 import re 
 
-base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'images')
 
-
-fremen = Fremen()
+fremen = Fremen(templates=TemplateRegistry())
 while True:
     
-    fremen.find_on_screen_and_fill_with_text(os.path.join(base_dir, "reply-to-claude.png"), "Please continue")
+    fremen.find_on_screen_and_fill_with_text('reply-to-claude', "Please continue")
     fremen.press('enter')
     fremen.wait(5*60)
 
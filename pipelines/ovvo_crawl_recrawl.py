@@ -1,11 +1,14 @@
 
 import os
 from fremen import Fremen, extract_json
+from fremen.templates import TemplateRegistry
+from fremen.pacing import Pacer
+from fremen.phash import HashIndex, dhash
+from retinaface import RetinaFace
 import pandas as pd
 from typing import Tuple, Set
 import re 
 
-base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'images')
 attorney_list = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data\\attorney_list.tsv')
 data = pd.read_csv(attorney_list, sep='\t')
 folder_path = "C:\\Users\\farid\\Desktop\\Fremen\\ovvo-recrawl-set"
@@ -38,7 +41,18 @@ for item in ids:
     print(item)
 
 
-fremen = Fremen()
+pacer = Pacer(sites={'avvo.com': {'min_delay': 1, 'initial_delay': 2}})
+fremen = Fremen(templates=TemplateRegistry(), pacer=pacer)
+
+# Hashes of the face crops already saved, so find_face can skip attorneys
+# whose photo we have. New saves are appended to face_hashes.tsv.
+def face_crop_hash(image_path):
+    return dhash(RetinaFace.extract_faces(img_path=image_path, align=False)[0])
+
+images_dir = "C:\\Users\\farid\\Desktop\\attorney_images"
+face_index = HashIndex(os.path.join(images_dir, "face_hashes.tsv"))
+face_index.index_directory(images_dir, hash_func=face_crop_hash)
+
 fremen.activate_chrome()
 chrome_activated = fremen.activate_chrome()
 if not chrome_activated:
@@ -52,17 +66,17 @@ with open("ovvo-attorney-data.tsv", "a") as file:
         if id not in ids:
             continue
         try:
-            fremen.wait(2)
-            fremen.open_new_tab_on_chrome(os.path.join(base_dir, 'new_tab_light.png'))
+            fremen.open_new_tab_on_chrome('new_tab_light')
             fremen.wait(2)
             fremen.open_url("https://www.avvo.com/")
-            fremen.click_and_wait(os.path.join(base_dir, "ovvo_search.png"),1, confidence=0.7)
-            fremen.find_on_screen_and_fill_with_text(os.path.join(base_dir, "ovvo_search_box.png"), name)
+            fremen.wait_until_ready('ovvo_search', timeout=20)
+            fremen.click_and_wait('ovvo_search',1, confidence=0.7)
+            fremen.find_on_screen_and_fill_with_text('ovvo_search_box', name)
             fremen.press('enter')
             fremen.wait(3)
-            fremen.click_and_wait(os.path.join(base_dir, "ovvo_view_profile.png"),2)
+            fremen.click_and_wait('ovvo_view_profile',2)
             filename = "-".join(name.split(" "))+"-id-"+str(id)
-            fremen.find_face(os.path.join(base_dir, "test.png"),filename )
+            fremen.find_face(fremen.template_path("test"),filename, attorney_id=id, hash_index=face_index)
             content = fremen.select_all_and_return()
             free_consultation = True if 'Free Consultation' in content else False
             file.write(f"{id}\tSuccess\t{name}\t{free_consultation}\t{filename}\n")
@@ -2,42 +2,9 @@
 import time
 import os
 from fremen import Fremen, extract_json
-import re
-
-base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'images')
-
-def extract_number(text):
-    # Find number between "of" and "entries"
-    match = re.search(r'of (\d+) entries', text)
-    if match:
-        return int(match.group(1))
-    return None
-
-
-def extract_first_entry(text):
-    # Skip the header line
-    lines = text.split('\n')
-    if len(lines) < 2:
-        return None
-    
-    # Get the first data line
-    data_line = lines[1]
-    
-    # Define the pattern to match the structure
-    pattern = r'([A-Za-z]+)([A-Za-z]+)([A-Za-z.]+)([A-Za-z\s]+VS [A-Za-z]+)([0-9A-Z]+)([A-Z]+)(\d{2}/\d{2}/\d{4})'
-    
-    match = re.search(pattern, data_line)
-    if match:
-        return {
-            'LastName': match.group(1),
-            'FirstName': match.group(2),
-            'MiddleName': match.group(3),
-            'CaseName': match.group(4).strip(),
-            'CaseNumber': match.group(5),
-            'Type': match.group(6),
-            'DateFiled': match.group(7)
-        }
-    return None
+from fremen.templates import TemplateRegistry
+from fremen.answer_cache import AnswerCache
+from fremen.parsers import extract_number
 
 lawyers = [{'firstName': 'Donna', 'lastName': 'Gibbs'},
 {'firstName': 'Katharine', 'lastName': 'Hooker'},
@@ -60,7 +27,9 @@ lawyers = [{'firstName': 'Donna', 'lastName': 'Gibbs'},
 """
 
 
-fremen = Fremen()
+# Re-crawls of unchanged pages reuse earlier answers instead of asking again.
+answers = AnswerCache(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'answers.sqlite'))
+fremen = Fremen(templates=TemplateRegistry(), answer_cache=answers)
 fremen.wait(20)
 results = []
 
@@ -69,17 +38,17 @@ for lawyer in lawyers:
     last_name = lawyer['lastName']
     print(f"searching for {lawyer['firstName']} {lawyer['lastName']}")
 
-    fremen.find_on_screen_and_fill_with_text(os.path.join(base_dir, 'first_name.png'), first_name)
-    fremen.find_on_screen_and_fill_with_text(os.path.join(base_dir, 'last_name.png'), last_name)
-    fremen.click_and_wait(os.path.join(base_dir, 'submit.png'), 10)
+    fremen.find_on_screen_and_fill_with_text('first_name', first_name)
+    fremen.find_on_screen_and_fill_with_text('last_name', last_name)
+    fremen.click_and_wait('submit', 10)
     fremen.wait(20)
-    fremen.click_and_wait(os.path.join(base_dir, 'name_search.png'), 10)
+    fremen.click_and_wait('name_search', 10)
     content = fremen.select_all_and_return()
     print(content)
     cases = extract_number(content)
 
     print(f"{first_name} {last_name}: has {cases} cases")
-    datefiled = fremen.ask(model="llama3.1:8b", question=f"when is the lastest filing date in this document: {content}")
+    datefiled = fremen.ask(model="llama3.1:8b", question="when is the lastest filing date in this document: {content}", content=content)
     results.append({"firstName": first_name, "lastName": last_name, "cases": cases, "lastCaseFiled": datefiled})
 
 
@@ -99,16 +68,16 @@ if not chrome_activated:
     print("Failed to activate Chrome window.")
 
 fremen.wait(2)
-fremen.open_new_tab_on_chrome(os.path.join(base_dir, 'new_tab_light.png'))
+fremen.open_new_tab_on_chrome('new_tab_light')
 fremen.wait(2)
 fremen.open_url("https://www.google.com/")
 query = "family lawyer in alameda county"
-fremen.find_on_screen_and_fill_with_text(os.path.join(base_dir, 'google_search.png'), query)
+fremen.find_on_screen_and_fill_with_text('google_search', query)
 fremen.press('enter')
 fremen.wait(3)
 content = fremen.select_all_and_return()
 print(content)
-lawyers = fremen.ask(model="llama3.1:8b", question=f"find the first name and the last name of every laywer presented in the folloiwng content and return as list of first names and last names: {content}")
+lawyers = fremen.ask(model="llama3.1:8b", question="find the first name and the last name of every laywer presented in the folloiwng content and return as list of first names and last names: {content}", content=content)
 print(lawyers)
 json_lawyers = fremen.ask(model="llama3.1:8b", question=f"convert the following list of first names and last names to json format: {lawyers}")
 print(json_lawyers)
@@ -119,6 +88,6 @@ for lawyer in lawyers_list:
 fremen.wait(10)
 fremen.open_new_tab_on_chrome("https://eportal.alameda.courts.ca.gov/?q=Login")
 fremen.wait(2)
-fremen.click_and_wait(os.path.join(base_dir, 'alameda_county_login.png'), 5)
+fremen.click_and_wait('alameda_county_login', 5)
 
 
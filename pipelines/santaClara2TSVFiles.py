@@ -1,6 +1,9 @@
 
 import os
 from fremen import Fremen, extract_json
+from fremen.templates import TemplateRegistry
+from fremen.pacing import Pacer
+from fremen.parsers import extract_between_multilines
 import pandas as pd
 
 contentbegin = """
@@ -10,29 +13,13 @@ contentend = """
 Showing 
 """
 
-
-def extract_between_multilines(start: str, end: str, large_string: str):
-    import re
-
-    # Escape special regex characters in the multiline strings
-    start_pattern = re.escape(start.strip())
-    end_pattern = re.escape(end.strip())
-
-    # Create a regex pattern to find text between the start and end patterns
-    pattern = rf"{start_pattern}(.*?){end_pattern}"
-
-    # Use re.DOTALL to match across multiple lines
-    matches = re.findall(pattern, large_string, re.DOTALL)
-
-    return matches
-
-base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'images')
 attorney_list = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data\\attorney_list.tsv')
 data = pd.read_csv(attorney_list, sep='\t')
 
 
 
-fremen = Fremen()
+pacer = Pacer(sites={'portal.scscourt.org': {'min_delay': 1, 'initial_delay': 2}})
+fremen = Fremen(templates=TemplateRegistry(), pacer=pacer)
 fremen.activate_chrome()
 chrome_activated = fremen.activate_chrome()
 if not chrome_activated:
@@ -46,13 +33,13 @@ with open("santa-clara-attorney-data.tsv", "a") as file:
     
         try:
             firstName, lastName = name.replace("\n","").split(" ")
-            fremen.wait(2)
-            fremen.open_new_tab_on_chrome(os.path.join(base_dir, 'new_tab_light.png'))
+            fremen.open_new_tab_on_chrome('new_tab_light')
             fremen.wait(2)
             print(f"Collecting fisrtName={firstName} and lastName={lastName}")
             fremen.open_url(f'https://portal.scscourt.org/search/party?firstName={firstName}&lastName={lastName}')
-            fremen.wait(4)
-            # fremen.click_and_wait(os.path.join(base_dir, 'party_search_request.png'), 4, confidence=.7)
+            if not fremen.wait_until_ready('party_search_request', timeout=20):
+                raise TimeoutError("party search page did not load")
+            # fremen.click_and_wait('party_search_request', 4, confidence=.7)
             content = fremen.select_all_and_return()
             filename = f"attorney_tsv_cases\\Attorney_{str(id)}.tsv"
             with open(filename, 'w') as tsvfile:
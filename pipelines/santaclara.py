@@ -1,47 +1,15 @@
 import os
 import random
 from fremen import Fremen, extract_json
-import re
-
-base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'images')
-
-def extract_number(text):
-    # Find number between "of" and "entries"
-    match = re.search(r'of (\d+) entries', text)
-    if match:
-        return int(match.group(1))
-    return None
-
-
-def extract_first_entry(text):
-    # Skip the header line
-    lines = text.split('\n')
-    if len(lines) < 2:
-        return None
-    
-    # Get the first data line
-    data_line = lines[1]
-    
-    # Define the pattern to match the structure
-    pattern = r'([A-Za-z]+)([A-Za-z]+)([A-Za-z.]+)([A-Za-z\s]+VS [A-Za-z]+)([0-9A-Z]+)([A-Z]+)(\d{2}/\d{2}/\d{4})'
-    
-    match = re.search(pattern, data_line)
-    if match:
-        return {
-            'LastName': match.group(1),
-            'FirstName': match.group(2),
-            'MiddleName': match.group(3),
-            'CaseName': match.group(4).strip(),
-            'CaseNumber': match.group(5),
-            'Type': match.group(6),
-            'DateFiled': match.group(7)
-        }
-    return None
-
-base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'images')
-
-
-fremen = Fremen()
+from fremen.templates import TemplateRegistry
+from fremen.answer_cache import AnswerCache
+from fremen.pacing import Pacer
+from fremen.parsers import extract_number
+
+pacer = Pacer(sites={'portal.scscourt.org': {'min_delay': 2, 'initial_delay': 5}})
+# Re-crawls of unchanged pages reuse earlier answers instead of asking again.
+answers = AnswerCache(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'answers.sqlite'))
+fremen = Fremen(templates=TemplateRegistry(), pacer=pacer, answer_cache=answers)
 fremen.activate_chrome()
 chrome_activated = fremen.activate_chrome()
 fremen.wait(2)
@@ -54,27 +22,28 @@ with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data/names.
     random.shuffle(lines)
     
     for nameString in lines:
-        fremen.wait(5)
-
-        file_path = os.path.join(base_dir,'new_tab_light.png')
+        file_path = 'new_tab_light'
         fremen.open_new_tab_on_chrome(file_path)
         fremen.wait(2)
 
         firstName, lastName = nameString.replace("\n","").split(" ")
         print(f"Collecting fisrtName={firstName} and lastName={lastName}")
         fremen.open_url(f'https://portal.scscourt.org/search/party?firstName={firstName}&lastName={lastName}')
-        fremen.wait(20)
-        fremen.click_and_wait(os.path.join(base_dir, 'party_search_request.png'), 10)
+        if not fremen.wait_until_ready('party_search_request', timeout=40):
+            print(f"{firstName} {lastName}: page did not load")
+            continue
+        fremen.click_and_wait('party_search_request', 10)
         content = fremen.select_all_and_return()
         cases = extract_number(content)
 
         print(f"{firstName} {lastName}: has {cases} cases")
         if cases==0:
             continue
-        datefiled = fremen.ask(model="llama3.1:8b", question=f"when is the lastest filing date in this document: {content}")
+        datefiled = fremen.ask(model="llama3.1:8b", question="when is the lastest filing date in this document: {content}", content=content)
         results.append({"firstName": firstName, "lastName": lastName, "cases": cases, "lastCaseFiled": datefiled})
 
 
+print(pacer.rates())
 for result in results:
     for key, value in result.items():
         print(f"{key}: {value}")
@@ -0,0 +1,109 @@
+# tests/server_support.py
+"""Helpers for tests of the Flask workflow server in ui/my_fremen_project/server."""
+import importlib.util
+import os
+import sys
+import tempfile
+
+SERVER_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "ui", "my_fremen_project", "server",
+)
+
+# The server modules import each other as top-level modules.
+HAVE_SERVER_DEPS = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("flask", "flask_sqlalchemy", "flask_cors", "networkx", "passlib")
+)
+
+
+
+def server_app_factory():
+    """Return the server's ``create_app``.
+
+    The repository root also has a ``main`` module, so put the server
+    directory first on ``sys.path`` and drop the root ``main`` from
+    ``sys.modules`` if another test imported it first.
+    """
+    if sys.path[0] != SERVER_DIR:
+        if SERVER_DIR in sys.path:
+            sys.path.remove(SERVER_DIR)
+        sys.path.insert(0, SERVER_DIR)
+    loaded = sys.modules.get("main")
+    if loaded is not None and os.path.dirname(os.path.abspath(loaded.__file__)) != SERVER_DIR:
+        del sys.modules["main"]
+    from main import create_app
+    return create_app
+
+
+NODE_CODE = "def run(inputs, config):\n    return sum(i or 0 for i in inputs) + config.get('add', 1)\n"
+
+
+class ServerTestMixin:
+    """Creates an app on a temporary SQLite database and logs a user in."""
+
+    # Extra app settings of a test class.
+    app_config = {}
+
+    def setUp(self):
+        create_app = server_app_factory()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = create_app({
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(self.tmp.name, "test.db"),
+            "BLOB_DIR": os.path.join(self.tmp.name, "blobs"),
+            "TESTING": True,
+            **self.app_config,
+        })
+        self.client = self.app.test_client()
+        self.client.post("/api/register", json={"username": "alice", "password": "pw"})
+        self.client.post("/api/login", json={"username": "alice", "password": "pw"})
+
+    def tearDown(self):
+        from database import db
+        self.app.extensions["run_queue"].shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        self.tmp.cleanup()
+
+    def run_workflow(self, workflow_id, **options):
+        """Run a workflow to completion and return the response body."""
+        response = self.client.post(
+            f"/api/workflows/{workflow_id}/run", json={"wait": True, **options}
+        )
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+
+    def create_node_type(self, code=NODE_CODE, name="inc", is_public=False):
+        response = self.client.post(
+            "/api/node_types", json={"name": name, "code": code, "is_public": is_public}
+        )
+        return response.get_json()["node_type_id"]
+
+    def create_workflow(self, nodes, edges=(), name="wf", **fields):
+        """Create a workflow from ``(node_type_id, config)`` pairs.
+
+        ``edges`` are ``(source_index, target_index)`` pairs into ``nodes``.
+        Returns the workflow id and the stored node ids in ``nodes`` order.
+        """
+        workflow_id = self.client.post(
+            "/api/workflows", json={"name": name, **fields}
+        ).get_json()["workflow_id"]
+        from database import db
+        from models import WorkflowEdge, WorkflowNode
+        with self.app.app_context():
+            rows = [
+                WorkflowNode(workflow_id=workflow_id, node_type_id=node_type_id,
+                             config=config)
+                for node_type_id, config in nodes
+            ]
+            db.session.add_all(rows)
+            db.session.flush()
+            node_ids = [row.id for row in rows]
+            db.session.add_all(
+                WorkflowEdge(workflow_id=workflow_id, source_node_id=node_ids[a],
+                             target_node_id=node_ids[b])
+                for a, b in edges
+            )
+            db.session.commit()
+        return workflow_id, node_ids
@@ -1,10 +1,53 @@
+import threading
+import time
 import unittest
+from types import SimpleNamespace
 from agentstudio.step_extractor import StepExtractor
+from fremen.llm import BATCH, INTERACTIVE, LLMGateway
+
+class FakeOpenAI:
+    """Stands in for ``openai.OpenAI``: answers, raises, or blocks until released.
+
+    With a ``barrier`` each request waits for the others to arrive first.
+    """
+
+    def __init__(self, error=None, blocked=False, barrier=None):
+        self.error = error
+        self.barrier = barrier
+        self.released = threading.Event()
+        if not blocked:
+            self.released.set()
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages):
+        self.prompts.append(messages[0]["content"])
+        if self.barrier is not None:
+            self.barrier.wait()
+        self.released.wait(10)
+        if self.error:
+            raise self.error
+        message = SimpleNamespace(content=f" 1. open {model}\n2. done ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
 
 class TestStepExtractor(unittest.TestCase):
     def setUp(self):
+        self.local_calls = []
+        self.lock = threading.Lock()
+
+        def transport(model, messages, options, priority):
+            with self.lock:
+                self.local_calls.append(priority)
+            return f"1. ask {model}"
+
+        self.gateway = LLMGateway("", concurrency=4, transport=transport)
+        self.addCleanup(self.gateway.shutdown)
         self.extractor = StepExtractor()
 
+    def extractor_with(self, client, **kwargs):
+        return StepExtractor(model="gpt", local_model="local", client=client,
+                             gateway=self.gateway, **kwargs)
+
     def test_parse_steps(self):
         text = """1- open chrome\n2- browse to chase.com\n3- login"""
         steps = self.extractor.parse_steps(text)
@@ -14,5 +57,70 @@ class TestStepExtractor(unittest.TestCase):
             "login",
         ])
 
+    def test_instructions_are_cached_by_normalized_description(self):
+        client = FakeOpenAI()
+        extractor = self.extractor_with(client)
+        first = extractor.generate_instructions("Log in to  Chase")
+        self.assertEqual(first, "1. open gpt\n2. done")
+        self.assertEqual(extractor.generate_instructions(" log in to chase\n"), first)
+        self.assertEqual(len(client.prompts), 1)
+        self.assertEqual(extractor.generate_instructions("log in to chase", use_openai=False),
+                         "1. ask local")
+        self.assertEqual(self.local_calls, [INTERACTIVE])
+
+    def test_slow_openai_is_hedged_with_the_local_model(self):
+        client = FakeOpenAI(blocked=True)
+        self.addCleanup(client.released.set)
+        extractor = self.extractor_with(client, hedge_after=0.05)
+        self.assertEqual(extractor.generate_instructions("task"), "1. ask local")
+        self.assertEqual(len(self.local_calls), 1)
+        # The local answer is cached for the local model only.
+        self.assertEqual(extractor.generate_instructions("task", use_openai=False),
+                         "1. ask local")
+        self.assertEqual(len(self.local_calls), 1)
+        client.released.set()
+        self.assertEqual(extractor.generate_instructions("task"), "1. open gpt\n2. done")
+        self.assertEqual(len(client.prompts), 2)
+
+        fast = self.extractor_with(FakeOpenAI(), hedge_after=10)
+        self.assertEqual(fast.generate_instructions("task"), "1. open gpt\n2. done")
+        self.assertEqual(len(self.local_calls), 1)
+
+    def test_timeout_covers_both_models(self):
+        client = FakeOpenAI(blocked=True)
+        gateway = LLMGateway("", transport=lambda *args: client.released.wait(10) and "late")
+        self.addCleanup(gateway.shutdown)
+        self.addCleanup(client.released.set)
+        extractor = StepExtractor(client=client, gateway=gateway, hedge_after=0.05, timeout=0.2)
+        with self.assertRaises(TimeoutError):
+            extractor.generate_instructions("task")
+
+    def test_failures_fall_back_and_surface(self):
+        # A failed request is hedged at once, not after ``hedge_after``.
+        extractor = self.extractor_with(FakeOpenAI(error=RuntimeError("quota")), hedge_after=60)
+        start = time.perf_counter()
+        self.assertEqual(extractor.generate_instructions("task"), "1. ask local")
+        self.assertLess(time.perf_counter() - start, 30)
+
+        def broken(model, messages, options, priority):
+            raise ConnectionError("no model server")
+
+        gateway = LLMGateway("", transport=broken)
+        self.addCleanup(gateway.shutdown)
+        extractor = StepExtractor(client=FakeOpenAI(error=RuntimeError("quota")), gateway=gateway)
+        with self.assertRaises(ConnectionError):
+            extractor.generate_instructions("task")
+
+    def test_generate_many(self):
+        # Each request waits until all four unique ones are in flight.
+        client = FakeOpenAI(barrier=threading.Barrier(4, timeout=10))
+        extractor = self.extractor_with(client, hedge_after=60)
+        texts = extractor.generate_many(["a", "b", "A ", "c", "d"], concurrency=4)
+        self.assertEqual(texts, ["1. open gpt\n2. done"] * 5)
+        self.assertEqual(len(client.prompts), 4)
+        self.assertEqual(self.local_calls, [])
+        extractor.generate_many(["e", "f"], use_openai=False)
+        self.assertEqual(self.local_calls, [BATCH, BATCH])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,95 @@
+# tests/test_answer_cache.py
+import os
+import random
+import tempfile
+import unittest
+from fremen import Fremen
+from fremen import answer_cache
+from fremen.answer_cache import AnswerCache, normalize_content, simhash
+from fremen.llm import LLMGateway
+from fremen.phash import hamming
+
+MODEL = "llama3.1:8b"
+TEMPLATE = "when is the lastest filing date in this document: {content}"
+
+def docket(seed=0, rows=40):
+    rng = random.Random(seed)
+    lines = ["Superior Court of California, County of Santa Clara", "Case 24CV123456"]
+    for i in range(rows):
+        lines.append(f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                     f"{rng.choice(['Motion', 'Order', 'Notice', 'Declaration'])} "
+                     f"filed by {rng.choice(['plaintiff', 'defendant', 'court'])} item {i}")
+    return "\n".join(lines)
+
+class TestAnswerCache(unittest.TestCase):
+    def test_normalization_ignores_whitespace_case_and_clock_times(self):
+        self.assertEqual(normalize_content("Page  loaded at 10:42 AM\n\nHello, World"),
+                         ["page", "loaded", "at", "am", "hello", "world"])
+        self.assertEqual(normalize_content("Updated 2024-05-01T10:22:33Z, see: x.com"),
+                         ["updated", "2024", "05", "01", "see", "x", "com"])
+
+    def test_simhash_is_close_for_small_edits(self):
+        page = normalize_content(docket())
+        edited = normalize_content(docket() + "\nAdvertisement: call now")
+        other = normalize_content(docket(seed=1))
+        self.assertLessEqual(hamming(simhash(page), simhash(edited)), 3)
+        self.assertGreater(hamming(simhash(page), simhash(other)), 10)
+
+    @unittest.skipIf(answer_cache.np is None, "numpy is not installed")
+    def test_numpy_and_python_simhash_agree(self):
+        words = normalize_content(docket())
+        for n in (0, 1, 2, 3, len(words)):
+            values = [simhash(words[:n])]
+            numpy, answer_cache.np = answer_cache.np, None
+            try:
+                values.append(simhash(words[:n]))
+            finally:
+                answer_cache.np = numpy
+            self.assertEqual(values[0], values[1])
+
+    def test_near_duplicates_hit_and_persist(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "answers.sqlite")
+            cache = AnswerCache(path)
+            page = docket()
+            self.assertIsNone(cache.get(MODEL, TEMPLATE, page))
+            cache.put(MODEL, TEMPLATE, page, "2024-12-27")
+            self.assertEqual(cache.get(MODEL, TEMPLATE, "  " + page.upper() + " 09:15 "),
+                             "2024-12-27")
+            self.assertEqual(cache.get(MODEL, TEMPLATE, page + "\nAdvertisement: call now"),
+                             "2024-12-27")
+            self.assertIsNone(cache.get(MODEL, TEMPLATE, docket(seed=1)))
+            self.assertIsNone(cache.get(MODEL, "who is the judge: {content}", page))
+            self.assertIsNone(cache.get("other", TEMPLATE, page))
+            self.assertEqual((cache.hits, cache.near_hits, cache.misses), (1, 1, 4))
+            cache.close()
+
+            reopened = AnswerCache(path, max_distance=0)
+            self.assertEqual(len(reopened), 1)
+            self.assertEqual(reopened.get(MODEL, TEMPLATE, page + " "), "2024-12-27")
+            self.assertIsNone(reopened.get(MODEL, TEMPLATE, page + "\nAdvertisement"))
+            reopened.close()
+
+    def test_fremen_ask_uses_the_cache(self):
+        prompts = []
+
+        def transport(model, messages, options, priority):
+            prompts.append(messages[0]["content"])
+            return "2024-12-27"
+
+        gateway = LLMGateway("", transport=transport)
+        self.addCleanup(gateway.shutdown)
+        fremen = Fremen(gateway=gateway, answer_cache=AnswerCache())
+        page = docket()
+        for content in (page, page + "\n\nPrinted 10:01"):
+            self.assertEqual(fremen.ask(model=MODEL, question=TEMPLATE, content=content),
+                             "2024-12-27")
+        self.assertEqual(prompts, [TEMPLATE.replace("{content}", page)])
+        fremen.ask(model=MODEL, question="Is the sky blue?")
+        self.assertEqual(len(prompts), 2)
+        with self.assertRaises(ValueError):
+            fremen.ask(model=MODEL, question="When was this filed?", content=page)
+        self.assertEqual(len(prompts), 2)
+
+if __name__ == '__main__':
+    unittest.main()
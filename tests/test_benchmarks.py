@@ -0,0 +1,31 @@
+# tests/test_benchmarks.py
+import os
+import tempfile
+import unittest
+from benchmarks.harness import Report, baseline_from, compare, load_history, save_run
+
+def metrics(**values):
+    report = Report()
+    for name, value in values.items():
+        report.add(name, value, "ms", higher_is_better=name.endswith("per_s"))
+    return report.metrics
+
+class TestBenchmarkHistory(unittest.TestCase):
+    def test_compare_respects_direction(self):
+        baseline = metrics(latency=10.0, calls_per_s=100.0)
+        current = metrics(latency=13.0, calls_per_s=70.0)
+        names = [r[0] for r in compare(current, baseline, threshold=0.2)]
+        self.assertEqual(sorted(names), ["calls_per_s", "latency"])
+        self.assertEqual(compare(metrics(latency=11.0), baseline, threshold=0.2), [])
+
+    def test_history_round_trip_and_median_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history.json")
+            for value in (10.0, 50.0, 12.0, 11.0):
+                save_run(path, metrics(latency=value))
+            runs = load_history(path)
+            self.assertEqual(len(runs), 4)
+            self.assertEqual(baseline_from(runs, window=3)["latency"]["value"], 12.0)
+
+if __name__ == '__main__':
+    unittest.main()
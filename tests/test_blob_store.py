@@ -0,0 +1,69 @@
+# tests/test_blob_store.py
+import json
+import os
+import time
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, ServerTestMixin
+
+BIG_CODE = "def run(inputs, config):\n    return ['row %d' % i for i in range(config['rows'])]\n"
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestBlobSpill(ServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = self.app.extensions["blob_store"]
+        self.store.threshold = 1024
+        node_type_id = self.create_node_type(BIG_CODE)
+        self.workflow_id, node_ids = self.create_workflow(
+            [(node_type_id, '{"rows": 1000}'), (node_type_id, '{"rows": 3}')]
+        )
+        self.big, self.small = (str(n) for n in node_ids)
+
+    def test_large_outputs_are_spilled_and_deduplicated(self):
+        first = self.run_workflow(self.workflow_id, force=True)["result"]
+        self.assertEqual(first[self.small], ["row 0", "row 1", "row 2"])
+        ref = first[self.big]
+        self.assertIn("$blob", ref)
+        body = self.client.get(ref["url"])
+        self.assertEqual(body.status_code, 200)
+        self.assertEqual(json.loads(body.data), ["row %d" % i for i in range(1000)])
+        self.assertEqual(len(body.data), ref["size"])
+
+        second = self.run_workflow(self.workflow_id, force=True)["result"]
+        self.assertEqual(second[self.big]["$blob"], ref["$blob"])
+        self.assertEqual(len(list(self.store.files())), 1)
+
+    def test_range_and_revalidation(self):
+        ref = self.run_workflow(self.workflow_id)["result"][self.big]
+        partial = self.client.get(ref["url"], headers={"Range": "bytes=0-9"})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.data, b'["row 0", ')
+        cached = self.client.get(ref["url"], headers={"If-None-Match": f'"{ref["$blob"]}"'})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_access_is_limited_to_the_run_owner(self):
+        result = self.run_workflow(self.workflow_id)
+        ref = result["result"][self.big]
+        unknown = f"/api/runs/{result['run_id']}/blobs/{'0' * 64}"
+        self.assertEqual(self.client.get(unknown).status_code, 404)
+        self.client.post("/api/register", json={"username": "bob", "password": "pw"})
+        self.client.post("/api/login", json={"username": "bob", "password": "pw"})
+        self.assertEqual(self.client.get(ref["url"]).status_code, 403)
+
+    def test_garbage_collection_follows_retention(self):
+        from blob_store import collect_garbage
+        ref = self.run_workflow(self.workflow_id)["result"][self.big]
+        with self.app.app_context():
+            kept = collect_garbage(self.store, retention_days=1, grace=0)
+            self.assertEqual(kept["deleted"], 0)
+            expired = collect_garbage(self.store, retention_days=1,
+                                      now=time.time() + 2 * 86400, grace=0)
+        self.assertEqual(expired, {"released": 1, "deleted": 1,
+                                   "freed_bytes": ref["size"]})
+        self.assertFalse(os.path.exists(self.store.path(ref["$blob"])))
+        expired = self.client.get(ref["url"])
+        self.assertEqual(expired.status_code, 410)
+        self.assertEqual(expired.get_json(), {"error": "Blob expired"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# tests/test_execution_plan.py
+import sys
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, SERVER_DIR, ServerTestMixin
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestCompilePlan(unittest.TestCase):
+    def setUp(self):
+        if SERVER_DIR not in sys.path:
+            sys.path.append(SERVER_DIR)
+
+    def test_topological_order_and_input_order(self):
+        from execution_plan import ExecutionPlan, compile_plan
+        plan = compile_plan([1, 2, 3, 4], [(3, 4), (1, 3), (2, 4), (1, 3)])
+        self.assertEqual(plan.order, [1, 2, 3, 4])
+        # Inputs keep edge order: node 4 gets 3 before 2.
+        self.assertEqual(plan.predecessors(4), [3, 2])
+        self.assertEqual(plan.successors(1), [3])
+        again = ExecutionPlan.from_json(plan.to_json())
+        self.assertEqual((again.order, again.preds), (plan.order, plan.preds))
+
+    def test_cycle_and_unknown_node(self):
+        from execution_plan import CycleError, compile_plan
+        with self.assertRaises(CycleError):
+            compile_plan([1, 2, 3], [(1, 2), (2, 3), (3, 2)])
+        with self.assertRaises(ValueError):
+            compile_plan([1], [(1, 5)])
+
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestStoredPlans(ServerTestMixin, unittest.TestCase):
+    def save(self, workflow_id, node_type_id, edges):
+        return self.client.put(f"/api/workflows/{workflow_id}", json={
+            "nodes": [{"id": f"n{i}", "node_type_id": node_type_id} for i in range(3)],
+            "edges": [{"source": f"n{a}", "target": f"n{b}"} for a, b in edges],
+        })
+
+    def test_cycle_is_rejected_at_save(self):
+        workflow_id, _ = self.create_workflow([])
+        response = self.save(workflow_id, self.create_node_type(), [(0, 1), (1, 2), (2, 0)])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Cyclic", response.get_json()["error"])
+        self.assertEqual(self.client.get(f"/api/workflows/{workflow_id}").get_json()["nodes"], [])
+
+    def test_runs_reuse_the_stored_plan(self):
+        workflow_id, _ = self.create_workflow([])
+        response = self.save(workflow_id, self.create_node_type(), [(0, 1), (1, 2)])
+        node_ids = list(response.get_json()["node_ids"].values())
+        plans = self.app.extensions["plan_cache"]
+        for _ in range(3):
+            result = self.run_workflow(workflow_id, force=True)["result"]
+        self.assertEqual(result[str(node_ids[2])], 3)
+        self.assertEqual(plans.stats()["loads"], 1)
+        self.assertEqual(plans.stats()["hits"], 2)
+        self.assertEqual(plans.stats()["compiles"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
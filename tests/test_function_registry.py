@@ -0,0 +1,63 @@
+# tests/test_function_registry.py
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, NODE_CODE, ServerTestMixin
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestCompiledFunctionCache(ServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        from function_registry import node_function_cache
+        self.cache = node_function_cache
+        self.cache.clear()
+
+    def test_reused_node_type_is_compiled_once(self):
+        node_type_id = self.create_node_type()
+        nodes = [(node_type_id, None)] * 5
+        workflow_id, _ = self.create_workflow(nodes, edges=[(0, 1), (1, 2), (2, 3), (3, 4)])
+        before = self.cache.stats()
+        self.assertEqual(self.run_workflow(workflow_id, pool="thread")["status"], "success")
+        self.run_workflow(workflow_id, pool="thread")
+        stats = self.client.get("/api/node_types/cache").get_json()
+        self.assertEqual(stats["compiles"] - before["compiles"], 1)
+        self.assertEqual(stats["hits"] - before["hits"], 9)
+
+    def test_sandbox_worker_caches_are_reported(self):
+        # Code no other test uses, so the long-lived workers start cold.
+        code = NODE_CODE + "# sandbox cache test\n"
+        nodes = [(self.create_node_type(code), None)] * 5
+        workflow_id, _ = self.create_workflow(nodes, edges=[(0, 1), (1, 2), (2, 3), (3, 4)])
+        before = self.client.get("/api/node_types/cache").get_json()
+        self.run_workflow(workflow_id, force=True)
+        self.run_workflow(workflow_id, force=True)
+        stats = self.client.get("/api/node_types/cache").get_json()
+        # Node code never runs in the server process.
+        self.assertEqual(stats["hits"] + stats["misses"], before["hits"] + before["misses"])
+        workers, earlier = stats["sandbox"], before["sandbox"]
+        self.assertEqual(workers["hits"] + workers["misses"]
+                         - earlier["hits"] - earlier["misses"], 10)
+        self.assertGreaterEqual(workers["compiles"] - earlier["compiles"], 1)
+        self.assertLessEqual(workers["compiles"] - earlier["compiles"], workers["workers"])
+
+    def test_update_invalidates_and_recompiles(self):
+        node_type_id = self.create_node_type()
+        workflow_id, node_ids = self.create_workflow([(node_type_id, None)])
+        result = self.run_workflow(workflow_id, pool="thread")["result"]
+        self.assertEqual(result[str(node_ids[0])], 1)
+
+        self.client.put(f"/api/node_types/{node_type_id}",
+                        json={"code": "def run(inputs, config):\n    return 42\n"})
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+        result = self.run_workflow(workflow_id, pool="thread")["result"]
+        self.assertEqual(result[str(node_ids[0])], 42)
+
+    def test_lru_bound(self):
+        from function_registry import CompiledFunctionCache
+        cache = CompiledFunctionCache(max_size=2)
+        for i in range(3):
+            cache.get(i, f"def run(inputs, config):\n    return {i}\n")
+        cache.get(2, "def run(inputs, config):\n    return 2\n")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
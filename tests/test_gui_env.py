@@ -0,0 +1,115 @@
+# tests/test_gui_env.py
+import time
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from fremen.gui_env import (
+    INVALID_REWARD, STEP_REWARD, SUCCESS_REWARD, Element, Page, VectorGUIEnv, apply,
+    random_site, template_names,
+)
+
+# Search form -> results list -> profile page to capture.
+SEARCH_SITE = [
+    Page("search", [
+        Element("first_name", "field"),
+        Element("google_search", "button", "results", "first_name"),
+        Element("amazon", "button", "search"),
+    ]),
+    Page("results", [
+        Element("ovvo_view_profile", "button", "profile"),
+        Element("new_tab", "button", "search"),
+    ]),
+    Page("profile", [Element("back_to_account", "text")], goal=True),
+]
+
+SCRIPT = [("type", "first_name"), ("click", "google_search"),
+          ("click", "ovvo_view_profile"), ("capture", None)]
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestVectorGUIEnv(unittest.TestCase):
+    def setUp(self):
+        self.env = VectorGUIEnv([SEARCH_SITE], num_envs=3, max_steps=6, seed=0)
+        self.obs, _ = self.env.reset()
+
+    def actions(self, *described):
+        return [self.env.action(verb, template) for verb, template in described]
+
+    def test_scripted_episode_succeeds(self):
+        total = np.zeros(3, dtype=np.float32)
+        for step in SCRIPT:
+            _, rewards, terminated, truncated, _ = self.env.step(self.actions(*[step] * 3))
+            total += rewards
+        self.assertTrue(terminated.all())
+        self.assertFalse(truncated.any())
+        np.testing.assert_allclose(total, 4 * STEP_REWARD + SUCCESS_REWARD, rtol=1e-6)
+        # Finished instances start over on the first page.
+        self.assertEqual(self.env.page.tolist(), [0, 0, 0])
+        self.assertEqual(self.env.describe(self.env.action("click", "amazon")), ("click", "amazon"))
+
+    def test_actions_mirror_fremen(self):
+        k = self.env.templates.index("google_search")
+        self.assertEqual(self.obs[:, k].sum(), 0)
+        obs, rewards, *_ = self.env.step(self.actions(
+            ("locate", "google_search"),         # found: its box shows up
+            ("click", "google_search"),          # required field still empty
+            ("click", "ovvo_view_profile"),      # not on this page
+        ))
+        self.assertEqual(obs[0, k, 0], 1.0)
+        self.assertTrue((obs[0, k, 1:5] > 0).all())
+        np.testing.assert_allclose(rewards, [STEP_REWARD, STEP_REWARD + INVALID_REWARD,
+                                             STEP_REWARD + INVALID_REWARD])
+        self.assertEqual(self.env.page.tolist(), [0, 0, 0])
+
+        obs, rewards, *_ = self.env.step(self.actions(
+            ("click", "amazon"), ("type", "first_name"), ("capture", None)))
+        self.assertEqual(obs[0, k, 0], 0.0)  # a page load forgets located boxes
+        self.assertEqual(obs[1, self.env.templates.index("first_name"), 5], 1.0)
+        self.assertAlmostEqual(float(rewards[2]), STEP_REWARD + INVALID_REWARD)
+
+    def test_episodes_are_truncated(self):
+        locate = self.actions(*[("locate", "amazon")] * 3)
+        for _ in range(5):
+            _, _, terminated, truncated, _ = self.env.step(locate)
+            self.assertFalse(truncated.any())
+        _, _, terminated, truncated, _ = self.env.step(locate)
+        self.assertTrue(truncated.all())
+        self.assertFalse(terminated.any())
+        self.assertEqual(self.env.steps.tolist(), [0, 0, 0])
+
+    def test_pixels_and_random_sites(self):
+        rng = np.random.default_rng(1)
+        sites = [random_site(rng, template_names(), pages=3) for _ in range(4)]
+        env = VectorGUIEnv(sites, num_envs=256, observation="pixels", seed=2)
+        obs, _ = env.reset()
+        self.assertEqual(obs.shape, (256, 80, 128))
+        self.assertTrue((obs < 255).any(axis=(1, 2)).all())  # every page shows templates
+        actions = env.rng.integers(env.num_actions, size=(200, env.num_envs))
+        start = time.perf_counter()
+        for batch in actions:
+            env.step(batch)
+        steps_per_second = actions.size / (time.perf_counter() - start)
+        self.assertGreater(steps_per_second, 5000)
+
+    def test_apply_drives_a_real_fremen(self):
+        class FakeFremen:
+            def __init__(self):
+                self.calls = []
+
+            def click(self, template):
+                self.calls.append(("click", template))
+                return True
+
+            def type_text(self, text, clear=False):
+                self.calls.append(("type", text))
+
+        fremen = FakeFremen()
+        self.assertTrue(apply(fremen, *self.env.describe(self.env.action("type", "first_name")),
+                              text="Ada"))
+        self.assertEqual(fremen.calls, [("click", "first_name"), ("type", "Ada")])
+
+if __name__ == '__main__':
+    unittest.main()
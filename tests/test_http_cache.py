@@ -0,0 +1,77 @@
+# tests/test_http_cache.py
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, ServerTestMixin
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestPagination(ServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(7):
+            self.client.post("/api/workflows", json={"name": f"flow {i}", "is_public": i % 3 == 0})
+
+    def collect(self, url, **params):
+        names, cursor, pages = [], None, 0
+        while True:
+            query = dict(params, **({"cursor": cursor} if cursor else {}))
+            response = self.client.get(url, query_string=query)
+            self.assertEqual(response.status_code, 200)
+            names += [item["name"] for item in response.get_json()]
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return names, pages
+
+    def test_cursor_walks_every_row_once(self):
+        everything = [wf["name"] for wf in self.client.get("/api/workflows").get_json()]
+        names, pages = self.collect("/api/workflows", limit=2)
+        self.assertEqual(names, everything)
+        self.assertEqual(len(names), 7)
+        self.assertEqual(pages, 4)
+
+    def test_filters(self):
+        public, _ = self.collect("/api/workflows", public="true", limit=1)
+        self.assertEqual(public, ["flow 0", "flow 3", "flow 6"])
+        named, _ = self.collect("/api/workflows", q="flow 5")
+        self.assertEqual(named, ["flow 5"])
+
+    def test_bad_cursor(self):
+        response = self.client.get("/api/workflows", query_string={"cursor": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_cache_is_invalidated_on_write(self):
+        self.assertEqual(len(self.client.get("/api/workflows").get_json()), 7)
+        self.client.post("/api/workflows", json={"name": "new"})
+        self.assertEqual(len(self.client.get("/api/workflows").get_json()), 8)
+
+    def test_list_etag(self):
+        first = self.client.get("/api/node_types")
+        again = self.client.get("/api/node_types", headers={"If-None-Match": first.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestConditionalDetail(ServerTestMixin, unittest.TestCase):
+    def test_workflow_detail_revalidates(self):
+        workflow_id = self.client.post("/api/workflows", json={"name": "wf"}).get_json()["workflow_id"]
+        url = f"/api/workflows/{workflow_id}"
+        first = self.client.get(url)
+        etag = first.headers["ETag"]
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+        self.client.put(url, json={"name": "renamed"})
+        changed = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.get_json()["name"], "renamed")
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+    def test_node_type_detail_revalidates(self):
+        node_type_id = self.create_node_type()
+        url = f"/api/node_types/{node_type_id}"
+        etag = self.client.get(url).headers["ETag"]
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+        self.client.put(url, json={"code": "def run(inputs, config):\n    return 0\n"})
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("return 0", response.get_json()["code"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# tests/test_llm.py
+import threading
+import unittest
+from benchmarks.stub_llm import StubLLMServer
+from fremen import Fremen
+from fremen.llm import BATCH, INTERACTIVE, GatewayServer, LLMError, LLMGateway
+
+def prompt_of(request):
+    return request["messages"][-1]["content"]
+
+class ConcurrencyProbe:
+    """Records how many transport calls ran at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def leave(self):
+        with self.lock:
+            self.active -= 1
+
+class TestLLMGateway(unittest.TestCase):
+    def start_stub(self, delay=0.1, reply=None):
+        stub = StubLLMServer(reply=reply or (lambda r: "re: " + prompt_of(r)), delay=delay)
+        stub.start()
+        self.addCleanup(stub.stop)
+        return stub
+
+    def gateway(self, url, **kwargs):
+        gateway = LLMGateway(url, **kwargs)
+        self.addCleanup(gateway.shutdown)
+        return gateway
+
+    def test_identical_requests_are_coalesced(self):
+        stub = self.start_stub()
+        gateway = self.gateway(stub.url, concurrency=4)
+        futures = [gateway.submit("m", [{"role": "user", "content": "hi"}]) for _ in range(5)]
+        self.assertEqual({f.result(5) for f in futures}, {"re: hi"})
+        self.assertEqual(len(stub.requests), 1)
+        stats = gateway.stats()["models"]["m"]
+        self.assertEqual((stats["completed"], stats["coalesced"]), (1, 4))
+        # Once answered, the same prompt is sent again.
+        gateway.ask("m", "hi")
+        self.assertEqual(len(stub.requests), 2)
+
+    def test_concurrency_is_capped_per_model(self):
+        probe = ConcurrencyProbe()
+
+        def transport(model, messages, options, priority):
+            probe.enter()
+            try:
+                threading.Event().wait(0.05)
+                return model
+            finally:
+                probe.leave()
+
+        gateway = self.gateway("", concurrency=2, model_limits={"big": 1}, transport=transport)
+        futures = [gateway.submit("small", [{"role": "user", "content": str(i)}]) for i in range(6)]
+        for future in futures:
+            future.result(5)
+        self.assertEqual(probe.peak, 2)
+        probe.peak = 0
+        futures = [gateway.submit("big", [{"role": "user", "content": str(i)}]) for i in range(3)]
+        for future in futures:
+            future.result(5)
+        self.assertEqual(probe.peak, 1)
+        self.assertEqual(gateway.stats()["models"]["big"]["limit"], 1)
+
+    def test_interactive_requests_go_first(self):
+        stub = self.start_stub(delay=0.15)
+        gateway = self.gateway(stub.url)
+        message = lambda text: [{"role": "user", "content": text}]
+        busy = gateway.submit("m", message("busy"))
+        batch = [gateway.submit("m", message(f"crawl {i}"), priority=BATCH) for i in range(2)]
+        promoted = gateway.submit("m", message("shared"), priority=BATCH)
+        stats = gateway.stats()
+        self.assertEqual((stats["running"], stats["queued"]), (1, 3))
+        self.assertEqual(stats["models"]["m"]["queued_by_priority"], {BATCH: 3})
+        urgent = gateway.submit("m", message("now"), priority=INTERACTIVE)
+        # An interactive caller of a queued prompt promotes it.
+        self.assertIs(gateway.submit("m", message("shared"), priority=INTERACTIVE), promoted)
+        for future in [busy, urgent, promoted, *batch]:
+            future.result(5)
+        self.assertEqual([prompt_of(r) for r in stub.requests],
+                         ["busy", "now", "shared", "crawl 0", "crawl 1"])
+        stats = gateway.stats()["models"]["m"]
+        self.assertEqual(stats["queued"], 0)
+        self.assertGreaterEqual(stats["service_p50"], 0.15)
+        self.assertGreaterEqual(stats["wait_p95"], 0.3)
+
+    def test_errors_reach_every_caller(self):
+        calls = []
+
+        def transport(model, messages, options, priority):
+            calls.append(messages)
+            if messages[0]["content"] == "bad":
+                threading.Event().wait(0.05)
+                raise LLMError("model not found")
+            return "ok"
+
+        gateway = self.gateway("", transport=transport)
+        futures = [gateway.submit("m", [{"role": "user", "content": "bad"}]) for _ in range(2)]
+        for future in futures:
+            with self.assertRaises(LLMError):
+                future.result(5)
+        self.assertEqual(gateway.ask("m", "good"), "ok")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(gateway.stats()["models"]["m"]["failed"], 1)
+
+    def test_gateway_server_shares_one_queue(self):
+        stub = self.start_stub(delay=0.05)
+        shared = self.gateway(stub.url)
+        with GatewayServer(shared) as server:
+            client = self.gateway(server.url, concurrency=4)
+            fremen = Fremen(gateway=client)
+            answers = [None] * 3
+
+            def ask(i):
+                answers[i] = fremen.ask(model="m", question="q", priority=INTERACTIVE)
+
+            threads = [threading.Thread(target=ask, args=(i,)) for i in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+            self.assertEqual(answers, ["re: q"] * 3)
+            self.assertEqual(client.ask("m", "other"), "re: other")
+        self.assertEqual(len(stub.requests), 2)
+        self.assertEqual(shared.stats()["models"]["m"]["completed"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# tests/test_map_node.py
+import json
+import os
+import sys
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, SERVER_DIR, ServerTestMixin
+
+LIST_CODE = "def run(inputs, config):\n    return list(range(config['n']))\n"
+# Each element marks itself in config['dir'] and waits for config['peers']
+# marks, so it only succeeds if that many elements run at the same time.
+RENDEZVOUS_CODE = (
+    "def run(inputs, config):\n"
+    "    import os, time\n"
+    "    open(os.path.join(config['dir'], str(inputs[0])), 'w').close()\n"
+    "    deadline = time.time() + 10\n"
+    "    while len(os.listdir(config['dir'])) < config['peers']:\n"
+    "        if time.time() > deadline:\n"
+    "            raise TimeoutError('elements did not run in parallel')\n"
+    "        time.sleep(0.01)\n"
+    "    return inputs[0] * 10 + inputs[1]\n"
+)
+# Multiples of 3 fail on their first attempt, 7 always fails.
+FLAKY_CODE = (
+    "def run(inputs, config, _attempts={}):\n"
+    "    x = inputs[0]\n"
+    "    _attempts[x] = _attempts.get(x, 0) + 1\n"
+    "    if x == 7 or (x % 3 == 0 and _attempts[x] == 1):\n"
+    "        raise ValueError('bad %d' % x)\n"
+    "    return x\n"
+)
+FAILING_CODE = (
+    "def run(inputs, config):\n"
+    "    if inputs[0] in (2, 7):\n"
+    "        raise ValueError('bad %d' % inputs[0])\n"
+    "    return inputs[0]\n"
+)
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestMapSpec(unittest.TestCase):
+    def setUp(self):
+        if SERVER_DIR not in sys.path:
+            sys.path.append(SERVER_DIR)
+
+    def test_validation(self):
+        from map_node import MapSpec
+        self.assertIsNone(MapSpec.from_config({"add": 1}))
+        spec = MapSpec.from_config({"map": {"chunk_size": 5, "on_error": "report"}})
+        self.assertEqual((spec.input, spec.chunk_size, spec.on_error), (0, 5, "report"))
+        for bad in ([1], {"chunk_size": 0}, {"retries": 1.5}, {"on_error": "ignore"},
+                    {"threads": 2}):
+            with self.assertRaises(ValueError):
+                MapSpec.from_config({"map": bad})
+
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestMapNode(ServerTestMixin, unittest.TestCase):
+    def create_map(self, code, map_settings, n=8, **config):
+        """Workflow of a list of ``n`` numbers, a constant 1 and a map node over both."""
+        list_type = self.create_node_type(LIST_CODE, name="list")
+        const_type = self.create_node_type("def run(inputs, config):\n    return 1\n")
+        map_type = self.create_node_type(code, name="element")
+        map_config = json.dumps({"map": map_settings, **config})
+        workflow_id, node_ids = self.create_workflow(
+            [(list_type, '{"n": %d}' % n), (const_type, "{}"), (map_type, map_config)],
+            edges=[(0, 2), (1, 2)],
+        )
+        return workflow_id, str(node_ids[2])
+
+    def test_results_are_ordered_and_parallel(self):
+        for pool in ("sandbox", "thread"):
+            with self.subTest(pool=pool):
+                marks = os.path.join(self.tmp.name, pool)
+                os.mkdir(marks)
+                workflow_id, node = self.create_map(
+                    RENDEZVOUS_CODE, {"concurrency": 4, "chunk_size": 1}, dir=marks, peers=4
+                )
+                result = self.run_workflow(workflow_id, pool=pool)["result"]
+                self.assertEqual(result[node], [i * 10 + 1 for i in range(8)])
+
+    def test_chunks_and_retries_report_partial_failures(self):
+        workflow_id, node = self.create_map(
+            FLAKY_CODE, {"chunk_size": 3, "retries": 1, "on_error": "report"}, n=9
+        )
+        output = self.run_workflow(workflow_id)["result"][node]
+        self.assertEqual(output["results"], [0, 1, 2, 3, 4, 5, 6, None, 8])
+        self.assertEqual(output["errors"],
+                         [{"index": 7, "error": "ValueError: bad 7", "attempts": 2}])
+
+    def test_failures_fail_the_node_by_default(self):
+        workflow_id, _ = self.create_map(FAILING_CODE, {"concurrency": 2, "retries": 2}, n=9)
+        response = self.client.post(f"/api/workflows/{workflow_id}/run", json={"wait": True})
+        self.assertEqual(response.status_code, 500)
+        error = response.get_json()["error"]
+        self.assertIn("2 of 9 elements failed", error)
+        self.assertIn("[2] ValueError: bad 2; [7] ValueError: bad 7", error)
+
+def tearDownModule():
+    if HAVE_SERVER_DEPS:
+        from workflow_executor import shutdown_pools
+        shutdown_pools()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+# tests/test_matching.py
+import unittest
+from unittest import mock
+
+try:
+    import numpy as np
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    np = cv2 = None
+
+from fremen import Fremen
+from fremen.capture import XShmCapture, to_gray
+from fremen.matching import locate
+
+@unittest.skipIf(np is None or cv2 is None, "numpy and opencv are required")
+class TestMatching(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame = rng.integers(0, 256, size=(300, 400, 4), dtype=np.uint8)
+        self.template = self.frame[120:150, 200:250, :3].copy()
+
+    def test_locate_in_bgra_frame(self):
+        box = locate(self.template, self.frame)
+        self.assertEqual(tuple(box), (200, 120, 50, 30))
+
+    def test_locate_in_region_reports_screen_coordinates(self):
+        box = locate(self.template, self.frame, region=(150, 100, 150, 100))
+        self.assertEqual(tuple(box), (200, 120, 50, 30))
+        self.assertIsNone(locate(self.template, self.frame, region=(0, 0, 100, 100)))
+
+    def test_to_gray_writes_into_buffer(self):
+        out = np.empty(self.frame.shape[:2], dtype=np.uint8)
+        self.assertIs(to_gray(self.frame, out=out), out)
+
+    def test_fremen_uses_given_frame(self):
+        fremen = Fremen()
+        self.assertTrue(fremen.if_image_exists(self.template, frame=self.frame))
+
+class TestCapture(unittest.TestCase):
+    def test_xshm_requires_display(self):
+        with mock.patch.dict("os.environ", {"DISPLAY": ""}):
+            with self.assertRaises((RuntimeError, ImportError)):
+                XShmCapture()
+
+if __name__ == '__main__':
+    unittest.main()
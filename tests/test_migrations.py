@@ -0,0 +1,73 @@
+# tests/test_migrations.py
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, SERVER_DIR, server_app_factory
+
+def schema(path):
+    """Columns and index names per table of a SQLite file."""
+    conn = sqlite3.connect(path)
+    tables = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+    result = {}
+    for table in tables:
+        columns = sorted(r[1] for r in conn.execute(f'PRAGMA table_info("{table}")'))
+        indexes = sorted(r[1] for r in conn.execute(f'PRAGMA index_list("{table}")')
+                         if not r[1].startswith("sqlite_autoindex"))
+        result[table] = (columns, indexes)
+    conn.close()
+    return result
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.create_app = server_app_factory()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_app(self, path):
+        app = self.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path})
+        from database import db
+        with app.app_context():
+            db.engine.dispose()
+        return app
+
+    def test_original_database_matches_fresh_schema(self):
+        from migrations import LATEST_VERSION
+        old = os.path.join(self.tmp.name, "old.db")
+        shutil.copy(os.path.join(SERVER_DIR, "app.db"), old)
+        fresh = os.path.join(self.tmp.name, "fresh.db")
+        self.open_app(old)
+        self.open_app(fresh)
+        self.assertEqual(schema(old), schema(fresh))
+        for path in (old, fresh):
+            version = sqlite3.connect(path).execute("PRAGMA user_version").fetchone()[0]
+            self.assertEqual(version, LATEST_VERSION)
+
+    def test_upgrade_is_idempotent(self):
+        from database import db
+        from migrations import upgrade
+        path = os.path.join(self.tmp.name, "old.db")
+        shutil.copy(os.path.join(SERVER_DIR, "app.db"), path)
+        app = self.open_app(path)
+        with app.app_context():
+            self.assertEqual(upgrade(db.engine, db.metadata), [])
+            db.engine.dispose()
+
+    def test_wal_and_pragmas(self):
+        from database import db
+        from sqlalchemy import text
+        path = os.path.join(self.tmp.name, "tuned.db")
+        app = self.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path})
+        with app.app_context():
+            with db.engine.connect() as conn:
+                self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+                self.assertEqual(conn.execute(text("PRAGMA foreign_keys")).scalar(), 1)
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()
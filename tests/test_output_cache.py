@@ -0,0 +1,80 @@
+# tests/test_output_cache.py
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, ServerTestMixin
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestIncrementalRuns(ServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        node_type_id = self.create_node_type()
+        # a -> b -> c, plus d -> c
+        self.workflow_id, self.node_ids = self.create_workflow(
+            [(node_type_id, '{"add": 1}'), (node_type_id, '{"add": 2}'),
+             (node_type_id, '{"add": 3}'), (node_type_id, '{"add": 4}')],
+            edges=[(0, 1), (1, 2), (3, 2)],
+        )
+
+    def set_config(self, index, config):
+        from database import db
+        from models import WorkflowNode
+        with self.app.app_context():
+            db.session.get(WorkflowNode, self.node_ids[index]).config = config
+            db.session.commit()
+
+    def test_rerun_reuses_unchanged_nodes(self):
+        first = self.run_workflow(self.workflow_id)
+        self.assertEqual(first["reused"], [])
+        self.assertEqual(first["result"][str(self.node_ids[2])], 1 + 2 + 4 + 3)
+
+        second = self.run_workflow(self.workflow_id)
+        self.assertEqual(sorted(second["reused"]), sorted(self.node_ids))
+        self.assertEqual(second["result"], first["result"])
+
+        self.set_config(1, '{"add": 20}')
+        third = self.run_workflow(self.workflow_id)
+        self.assertEqual(sorted(third["reused"]), sorted([self.node_ids[0], self.node_ids[3]]))
+        self.assertEqual(third["result"][str(self.node_ids[2])], 1 + 20 + 4 + 3)
+
+    def test_force_recomputes(self):
+        self.run_workflow(self.workflow_id)
+        self.assertEqual(self.run_workflow(self.workflow_id, force=True)["reused"], [])
+        self.assertEqual(len(self.run_workflow(self.workflow_id)["reused"]), 4)
+
+    def test_nodes_can_opt_out(self):
+        self.set_config(0, '{"add": 1, "cache": false}')
+        self.run_workflow(self.workflow_id)
+        reused = self.run_workflow(self.workflow_id)["reused"]
+        self.assertEqual(sorted(reused), sorted(self.node_ids[1:]))
+
+    def test_parallel_runs_reuse_too(self):
+        self.run_workflow(self.workflow_id)
+        reused = self.run_workflow(self.workflow_id, max_parallelism=4)["reused"]
+        self.assertEqual(len(reused), 4)
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestNodeOutputCache(unittest.TestCase):
+    def test_bounded_by_bytes_and_entries(self):
+        from tests.server_support import server_app_factory
+        server_app_factory()
+        from output_cache import NodeOutputCache, serialize_output
+        cache = NodeOutputCache(max_entries=3, max_bytes=250)
+        for i in range(3):
+            cache.put(str(i), *serialize_output(b"x" * 100))
+        self.assertEqual(cache.stats()["size"], 2)
+        for i in range(3, 6):
+            cache.put(str(i), *serialize_output(i))
+        self.assertEqual(cache.stats()["size"], 3)
+        self.assertEqual(cache.get("5")[0], 5)
+        self.assertIsNone(cache.get("0"))
+
+    def test_stored_outputs_are_copies(self):
+        from tests.server_support import server_app_factory
+        server_app_factory()
+        from output_cache import NodeOutputCache, serialize_output
+        cache = NodeOutputCache()
+        cache.put("k", *serialize_output([1, 2]))
+        cache.get("k")[0].append(3)
+        self.assertEqual(cache.get("k")[0], [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# tests/test_pacing.py
+import unittest
+from fremen.pacing import Pacer, site_of
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class TestPacer(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.pacer = Pacer(min_delay=1.0, max_delay=16.0, initial_delay=4.0,
+                           decrease_step=1.0, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_site_of(self):
+        self.assertEqual(site_of("https://www.avvo.com/attorneys"), "avvo.com")
+        self.assertEqual(site_of("portal.scscourt.org/search"), "portal.scscourt.org")
+
+    def test_pace_spaces_requests_by_delay(self):
+        self.assertEqual(self.pacer.pace("a.com"), 0)
+        self.assertEqual(self.pacer.pace("a.com"), 4.0)
+        self.assertEqual(self.pacer.pace("b.com"), 0)
+
+    def test_aimd_within_bounds(self):
+        for _ in range(10):
+            self.pacer.record("a.com", latency=0.5)
+        self.assertEqual(self.pacer.rates()["a.com"]["delay"], 1.0)
+        for _ in range(10):
+            self.pacer.record("a.com", ok=False)
+        rates = self.pacer.rates()["a.com"]
+        self.assertEqual(rates["delay"], 16.0)
+        self.assertEqual(rates["failures"], 10)
+        self.assertGreater(rates["failure_rate"], 0.8)
+
+    def test_zero_delay_backs_off(self):
+        pacer = Pacer(min_delay=0.0, initial_delay=0.0, decrease_step=0.5)
+        pacer.record("a.com", ok=False)
+        self.assertEqual(pacer.rates()["a.com"]["delay"], 1.0)
+        pacer.record("a.com", ok=False)
+        self.assertEqual(pacer.rates()["a.com"]["delay"], 2.0)
+        pacer = Pacer(min_delay=0.0, initial_delay=0.0, decrease_step=0.0)
+        pacer.record("a.com", ok=False)
+        self.assertGreater(pacer.rates()["a.com"]["delay"], 0.0)
+
+    def test_slow_page_backs_off(self):
+        self.pacer.record("a.com", latency=1.0)
+        self.pacer.record("a.com", latency=5.0)
+        self.assertEqual(self.pacer.rates()["a.com"]["delay"], 6.0)
+
+    def test_per_site_bounds(self):
+        self.pacer.configure("slow.org", min_delay=8.0)
+        self.pacer.record("slow.org", latency=0.1)
+        self.assertEqual(self.pacer.rates()["slow.org"]["delay"], 8.0)
+
+    def test_wait_until_ready_records_latency_or_timeout(self):
+        ready_at = 2.0
+        self.assertTrue(self.pacer.wait_until_ready("a.com", lambda: self.clock.now >= ready_at))
+        self.assertAlmostEqual(self.pacer.rates()["a.com"]["latency"], 2.0)
+        self.assertFalse(self.pacer.wait_until_ready("a.com", lambda: False, timeout=3))
+        self.assertEqual(self.pacer.rates()["a.com"]["failures"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+# tests/test_parsers.py
+import unittest
+from fremen.parsers import (
+    extract_between_multilines,
+    extract_first_entry,
+    extract_number,
+)
+
+class TestParsers(unittest.TestCase):
+    def test_extract_number(self):
+        self.assertEqual(extract_number("Showing 1 to 10 of 42 entries"), 42)
+        self.assertIsNone(extract_number("No matching records found"))
+
+    def test_extract_first_entry(self):
+        text = "Header\nSMITHJOHNA.SMITH VS JONES23FL000123FL01/02/2023"
+        entry = extract_first_entry(text)
+        self.assertEqual(entry["DateFiled"], "01/02/2023")
+        self.assertIsNone(extract_first_entry("Header only"))
+
+    def test_extract_between_multilines(self):
+        text = "junk\nView\tCase\nrow 1\nrow 2\nShowing 1 to 2"
+        self.assertEqual(
+            extract_between_multilines("\nView\tCase\n", "\nShowing \n", text),
+            ["\nrow 1\nrow 2\n"],
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# tests/test_phash.py
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from fremen.phash import HashIndex, dhash, hamming, phash
+
+class TestHashIndex(unittest.TestCase):
+    def test_finds_near_duplicates_within_distance(self):
+        rng = random.Random(0)
+        index = HashIndex(max_distance=4)
+        values = [rng.getrandbits(64) for _ in range(2000)]
+        for i, value in enumerate(values):
+            index.add(i, value)
+        query = values[42] ^ 0b1011  # flip three bits
+        self.assertEqual(index.find(query)[0][:2], (3, "42"))
+        self.assertEqual(index.find(query, key=7), [])
+        self.assertFalse(index.contains(values[42] ^ 0b11111))
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(1)
+        index = HashIndex(max_distance=6)
+        values = [rng.getrandbits(64) for _ in range(500)]
+        for i, value in enumerate(values):
+            index.add(i, value)
+        for base in values[:50]:
+            query = base ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64))
+            expected = sorted(
+                (hamming(query, v), str(i)) for i, v in enumerate(values)
+                if hamming(query, v) <= 6
+            )
+            self.assertEqual([m[:2] for m in index.find(query)], expected)
+
+    def test_persists_to_tsv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "hashes.tsv")
+            HashIndex(path).add(123, 0xDEADBEEF, "Jane-Doe-id-123.jpg")
+            index = HashIndex(path)
+            self.assertEqual(index.find(0xDEADBEEF, key=123), [(0, "123", "Jane-Doe-id-123.jpg")])
+
+    def test_index_directory_skips_saved_paths(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = HashIndex(os.path.join(tmp, "index.tsv"))
+            # Saved through a dialog: indexed before the browser added ".png".
+            index.add("1", 0, os.path.join(tmp, "id-1"))
+            for name in ("id-1.png", "id-2.png"):
+                open(os.path.join(tmp, name), "wb").close()
+            self.assertEqual(index.index_directory(tmp, hash_func=lambda path: 7), 1)
+            self.assertEqual(index.index_directory(tmp, hash_func=lambda path: 7), 0)
+            self.assertEqual(len(HashIndex(index.path)), 2)
+
+@unittest.skipIf(np is None, "numpy is required")
+class TestPerceptualHashes(unittest.TestCase):
+    def test_hash_survives_small_changes(self):
+        rng = np.random.default_rng(0)
+        face = rng.integers(0, 256, size=(16, 12, 3)).repeat(8, 0).repeat(8, 1).astype(np.uint8)
+        noisy = np.clip(face.astype(int) + rng.integers(-6, 7, face.shape), 0, 255).astype(np.uint8)
+        other = rng.integers(0, 256, size=face.shape, dtype=np.uint8)
+        for hash_func in (dhash, phash):
+            self.assertLessEqual(hamming(hash_func(face), hash_func(noisy)), 6)
+            self.assertGreater(hamming(hash_func(face), hash_func(other)), 12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import json
+import os
+import tempfile
+import unittest
+from agentstudio.plan_compiler import (
+    Action, PlanCompiler, PlanError, PlanRunner, PlanStore, StepFailed, execute,
+)
+from agentstudio.step_extractor import StepExtractor
+from fremen.llm import LLMGateway
+
+TEMPLATES = ["google_search", "search", "first_name", "submit", "continue"]
+
+class FakeFremen:
+    """Records calls; only templates in ``visible`` can be clicked."""
+
+    templates = None
+    gateway = None
+
+    def __init__(self, visible=TEMPLATES):
+        self.visible = set(visible)
+        self.calls = []
+
+    def activate_chrome(self):
+        self.calls.append(("activate",))
+        return True
+
+    def open_url(self, url):
+        self.calls.append(("open_url", url))
+
+    def click(self, template, confidence=0.9):
+        self.calls.append(("click", template))
+        return template in self.visible
+
+    def type_text(self, text, interval=0.05, clear=False):
+        self.calls.append(("type", text))
+
+    def press(self, key):
+        self.calls.append(("press", key))
+
+    def wait(self, seconds):
+        self.calls.append(("wait", seconds))
+
+    def select_all_and_return(self):
+        return "page text"
+
+class OfflineOpenAI:
+    """OpenAI client stand-in that always fails, so steps come from the local model."""
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages):
+        raise ConnectionError("offline")
+
+class ScriptedModel:
+    """Gateway transport answering each prompt with the next canned reply."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def __call__(self, model, messages, options, priority):
+        self.prompts.append(messages[0]["content"])
+        return self.replies.pop(0)
+
+def fenced(*actions):
+    return "```json\n" + json.dumps(list(actions)) + "\n```"
+
+class TestPlanCompiler(unittest.TestCase):
+    def setUp(self):
+        self.model = ScriptedModel()
+        self.gateway = LLMGateway("", transport=self.model)
+        self.addCleanup(self.gateway.shutdown)
+        self.compiler = PlanCompiler(TEMPLATES, gateway=self.gateway)
+
+    def test_rules_compile_common_phrasings(self):
+        steps = ["Open Chrome", "Browse to Chase.com/login.",
+                 "Type 'Ada Lovelace' into the first name field",
+                 "Click the Google Search button", "press enter", "Wait 2 seconds",
+                 "Copy the page text"]
+        plan = self.compiler.compile(steps)
+        self.assertEqual([(a.kind, a.params) for a in plan], [
+            ("activate", {}),
+            ("open_url", {"url": "Chase.com/login"}),
+            ("fill", {"template": "first_name", "text": "Ada Lovelace"}),
+            ("click", {"template": "google_search"}),
+            ("press", {"key": "enter"}),
+            ("wait", {"seconds": 2.0}),
+            ("capture", {}),
+        ])
+        self.assertEqual(self.compiler.llm_calls, 0)
+
+    def test_unmatched_steps_share_one_model_request(self):
+        self.model.replies.append(fenced({"action": "click", "template": "continue"},
+                                         {"action": "press", "key": "tab"}))
+        plan = self.compiler.compile(["open chrome", "accept the cookie banner",
+                                      "move to the next field"])
+        self.assertEqual([a.kind for a in plan], ["activate", "click", "press"])
+        self.assertEqual(plan[1].step, "accept the cookie banner")
+        self.assertEqual(self.compiler.llm_calls, 1)
+        self.assertIn("2. move to the next field", self.model.prompts[0])
+
+        self.model.replies.append(fenced({"action": "scroll"}))
+        with self.assertRaises(PlanError):
+            self.compiler.compile(["scroll down"])
+
+    def test_execute_reports_missing_templates(self):
+        fremen = FakeFremen(visible=[])
+        with self.assertRaises(StepFailed):
+            execute(fremen, Action("fill", {"template": "search", "text": "x"}, "fill"))
+        self.assertNotIn(("type", "x"), fremen.calls)
+
+class TestPlanRunner(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "plans.json")
+        self.model = ScriptedModel(
+            "1. Open Chrome\n2. Go to example.com\n3. Click submit\n4. Copy the page text",
+        )
+        self.gateway = LLMGateway("", transport=self.model)
+        self.addCleanup(self.gateway.shutdown)
+
+    def runner(self, fremen):
+        extractor = StepExtractor(local_model="local", client=OfflineOpenAI(),
+                                  gateway=self.gateway)
+        compiler = PlanCompiler(TEMPLATES, gateway=self.gateway)
+        return PlanRunner(fremen, PlanStore(self.path), compiler, extractor), extractor, compiler
+
+    def test_repeat_tasks_replay_without_model_requests(self):
+        fremen = FakeFremen()
+        runner, _, _ = self.runner(fremen)
+        self.assertEqual(runner.run("Check Example"), ["page text"])
+        self.assertEqual(len(self.model.prompts), 1)
+
+        fremen = FakeFremen()
+        runner, _, _ = self.runner(fremen)
+        self.assertEqual(runner.run("check  example"), ["page text"])
+        self.assertEqual(len(self.model.prompts), 1)
+        self.assertEqual(fremen.calls, [("activate",), ("open_url", "example.com"),
+                                        ("click", "submit")])
+
+    def test_failed_steps_are_repaired_and_stored(self):
+        store = PlanStore(self.path)
+        store.put("sign up", [Action("click", {"template": "submit"}, "click submit")])
+        self.model.replies[:] = [fenced({"action": "click", "template": "continue"})]
+        fremen = FakeFremen(visible=["continue"])
+        runner, _, compiler = self.runner(fremen)
+        self.assertEqual(runner.run("sign up"), [])
+        self.assertEqual(compiler.llm_calls, 1)
+        self.assertIn("submit not found on screen", self.model.prompts[0])
+        self.assertEqual(PlanStore(self.path).get("Sign Up"),
+                         [Action("click", {"template": "continue"}, "click submit")])
+
+        self.model.replies[:] = [fenced({"action": "click", "template": "submit"})]
+        runner, _, _ = self.runner(FakeFremen(visible=[]))
+        with self.assertRaises(PlanError):
+            runner.run("sign up")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# tests/test_queries.py
+import contextlib
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, ServerTestMixin
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestQueryCounts(ServerTestMixin, unittest.TestCase):
+    @contextlib.contextmanager
+    def count_queries(self):
+        from sqlalchemy import event
+        from database import db
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    def chain(self, size):
+        node_types = [self.create_node_type(name=f"t{i}") for i in range(size)]
+        return self.create_workflow([(nt, None) for nt in node_types],
+                                    edges=[(i, i + 1) for i in range(size - 1)])
+
+    def detail_queries(self, workflow_id):
+        with self.count_queries() as statements:
+            response = self.client.get(f"/api/workflows/{workflow_id}")
+        self.assertEqual(response.status_code, 200)
+        return len(statements)
+
+    def execute_queries(self, workflow_id):
+        from queries import load_workflow
+        from workflow_executor import execute_workflow
+        with self.app.app_context(), self.count_queries() as statements:
+            execute_workflow(load_workflow(workflow_id))
+        return len(statements)
+
+    def test_constant_in_workflow_size(self):
+        small, _ = self.chain(2)
+        large, _ = self.chain(30)
+        self.assertEqual(self.detail_queries(small), self.detail_queries(large))
+        self.assertEqual(self.execute_queries(small), self.execute_queries(large))
+        self.assertLessEqual(self.execute_queries(large), 4)
+
+    def test_listing_is_one_query(self):
+        for i in range(5):
+            self.client.post("/api/workflows", json={"name": f"w{i}", "is_public": i % 2 == 0})
+        for url in ("/api/workflows", "/api/node_types"):
+            with self.count_queries() as statements:
+                self.client.get(url)
+            self.assertEqual(len(statements), 1, url)
+
+    def test_listing_keeps_public_first(self):
+        self.client.post("/api/workflows", json={"name": "mine"})
+        self.client.post("/api/workflows", json={"name": "shared", "is_public": True})
+        names = [wf["name"] for wf in self.client.get("/api/workflows").get_json()]
+        self.assertEqual(names, ["shared", "mine"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+# tests/test_run_queue.py
+import json
+import os
+import time
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, ServerTestMixin, server_app_factory
+
+SLEEP_CODE = (
+    "def run(inputs, config):\n"
+    "    import time\n"
+    "    time.sleep(config.get('sleep', 0))\n"
+    "    return config.get('value')\n"
+)
+# Waits until the file config['gate'] exists.
+GATE_CODE = (
+    "def run(inputs, config):\n"
+    "    import os, time\n"
+    "    deadline = time.time() + 10\n"
+    "    while not os.path.exists(config['gate']) and time.time() < deadline:\n"
+    "        time.sleep(0.01)\n"
+    "    return config.get('value')\n"
+)
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestRunQueue(ServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.node_type_id = self.create_node_type(SLEEP_CODE)
+
+    def sleeping_workflow(self, sleep, count=1):
+        nodes = [(self.node_type_id, json.dumps({"sleep": sleep, "value": i})) for i in range(count)]
+        edges = [(i, i + 1) for i in range(count - 1)]
+        return self.create_workflow(nodes, edges)
+
+    def submit(self, workflow_id):
+        response = self.client.post(f"/api/workflows/{workflow_id}/run")
+        self.assertEqual(response.status_code, 202)
+        return response.get_json()["run_id"]
+
+    def wait_for(self, run_id, statuses=("succeeded", "failed", "cancelled"), timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            run = self.client.get(f"/api/runs/{run_id}").get_json()
+            if run["status"] in statuses:
+                return run
+            time.sleep(0.01)
+        self.fail(f"run {run_id} did not reach {statuses}")
+
+    def test_submit_returns_immediately_and_stores_result(self):
+        gate = os.path.join(self.tmp.name, "gate")
+        gate_type = self.create_node_type(GATE_CODE, name="gate")
+        workflow_id, node_ids = self.create_workflow(
+            [(gate_type, json.dumps({"gate": gate, "value": 0}))]
+        )
+        run_id = self.submit(workflow_id)
+        # The node cannot finish before the gate opens.
+        self.assertIn(self.client.get(f"/api/runs/{run_id}").get_json()["status"],
+                      ("queued", "running"))
+        open(gate, "w").close()
+        run = self.wait_for(run_id)
+        self.assertEqual(run["status"], "succeeded")
+        self.assertEqual(run["result"], {str(node_ids[0]): 0})
+        self.assertIn(str(node_ids[0]), run["timings"])
+
+    def test_event_stream(self):
+        workflow_id, node_ids = self.sleeping_workflow(0, count=2)
+        run_id = self.submit(workflow_id)
+        response = self.client.get(f"/api/runs/{run_id}/events")
+        self.assertEqual(response.mimetype, "text/event-stream")
+        events = [json.loads(line[len("data: "):])
+                  for line in response.get_data(as_text=True).splitlines()
+                  if line.startswith("data: ")]
+        finished = [e["node_id"] for e in events if e["type"] == "node_finished"]
+        self.assertEqual(finished, node_ids)
+        self.assertEqual(events[0]["status"], "queued")
+        self.assertEqual(events[-1]["status"], "succeeded")
+
+    def test_cancel_running_and_queued(self):
+        slow_id, _ = self.sleeping_workflow(0.1, count=10)
+        runs = [self.submit(slow_id) for _ in range(3)]
+        self.wait_for(runs[0], statuses=("running",))
+        # RUNS_PER_USER is 2, so the third run is still queued.
+        self.assertEqual(self.client.get(f"/api/runs/{runs[2]}").get_json()["status"], "queued")
+        for run_id in runs:
+            self.assertEqual(self.client.post(f"/api/runs/{run_id}/cancel").status_code, 202)
+        for run_id in runs:
+            run = self.wait_for(run_id)
+            self.assertEqual(run["status"], "cancelled")
+        self.assertEqual(self.client.post(f"/api/runs/{runs[0]}/cancel").status_code, 409)
+
+    def test_cancel_requested_elsewhere(self):
+        from database import db
+        from models import WorkflowRun
+        slow_id, _ = self.sleeping_workflow(0.05, count=100)
+        run_id = self.submit(slow_id)
+        self.wait_for(run_id, statuses=("running",))
+        # As written by cancel() in another server process.
+        with self.app.app_context():
+            db.session.get(WorkflowRun, run_id).cancel_requested = True
+            db.session.commit()
+        self.assertEqual(self.wait_for(run_id)["status"], "cancelled")
+
+    def test_per_user_limit(self):
+        workflow_id, _ = self.sleeping_workflow(0.1)
+        runs = [self.submit(workflow_id) for _ in range(4)]
+        finished = [self.wait_for(run_id) for run_id in runs]
+        spans = [(run["started_at"], run["finished_at"]) for run in finished]
+        for start, _ in spans:
+            concurrent = sum(1 for s, e in spans if s <= start < e)
+            self.assertLessEqual(concurrent, 2)
+
+    def test_failure_is_recorded(self):
+        node_type_id = self.create_node_type("def run(inputs, config):\n    raise ValueError('boom')\n", name="bad")
+        workflow_id, _ = self.create_workflow([(node_type_id, None)])
+        run = self.wait_for(self.submit(workflow_id))
+        self.assertEqual(run["status"], "failed")
+        self.assertEqual(run["error"], "boom")
+
+    def test_unstorable_result_fails_the_run(self):
+        code = "def run(inputs, config):\n    return {(1, 2): 3}\n"
+        workflow_id, _ = self.create_workflow([(self.create_node_type(code, name="tuple"), None)])
+        run = self.wait_for(self.submit(workflow_id))
+        self.assertEqual(run["status"], "failed")
+        self.assertIn("Could not store the run's result", run["error"])
+        # The worker survived and serves the next run.
+        workflow_id, _ = self.sleeping_workflow(0)
+        self.assertEqual(self.wait_for(self.submit(workflow_id))["status"], "succeeded")
+
+    def test_restart_picks_up_queued_runs(self):
+        from database import db
+        from models import WorkflowRun
+        workflow_id, node_ids = self.sleeping_workflow(0)
+        with self.app.app_context():
+            run = WorkflowRun(workflow_id=workflow_id, user_id=1, status="queued",
+                              created_at=time.time())
+            db.session.add(run)
+            db.session.commit()
+            run_id = run.id
+        # A new app on the same database, as after a server restart.
+        restarted = server_app_factory()(dict(self.app.config))
+        self.addCleanup(restarted.extensions["run_queue"].shutdown)
+        self.assertEqual(self.wait_for(run_id)["result"], {str(node_ids[0]): 0})
+
+    def test_runs_are_private(self):
+        workflow_id, _ = self.sleeping_workflow(0)
+        run_id = self.submit(workflow_id)
+        self.client.post("/api/logout")
+        self.client.post("/api/register", json={"username": "bob", "password": "pw"})
+        self.client.post("/api/login", json={"username": "bob", "password": "pw"})
+        self.assertEqual(self.client.get(f"/api/runs/{run_id}").status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# tests/test_sandbox.py
+import os
+import sys
+import time
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, SERVER_DIR, ServerTestMixin
+
+if SERVER_DIR not in sys.path:
+    sys.path.append(SERVER_DIR)
+
+HAVE_FORK = hasattr(os, "fork")
+
+
+def echo(value):
+    return value
+
+
+def pid():
+    return os.getpid()
+
+
+def fail(message):
+    raise KeyError(message)
+
+
+def hang():
+    time.sleep(60)
+
+
+def crash():
+    os._exit(3)
+
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+@unittest.skipUnless(HAVE_FORK, "the sandbox needs os.fork")
+class TestSandboxPool(unittest.TestCase):
+    def setUp(self):
+        from sandbox import SandboxPool
+        self.pool = SandboxPool(size=2, timeout=2.0, memory_limit=256 * 1024 * 1024)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_workers_are_prestarted_and_reused(self):
+        pids = set(self.pool.pids())
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+        seen = {self.pool.submit(pid).result() for _ in range(10)}
+        self.assertLessEqual(seen, pids)
+
+    def test_large_buffers_round_trip(self):
+        payload = bytearray(os.urandom(1024)) * 4096
+        self.assertEqual(self.pool.call(echo, payload), payload)
+
+    def test_exception_is_reraised(self):
+        with self.assertRaises(KeyError) as ctx:
+            self.pool.call(fail, "missing")
+        self.assertIn("raise KeyError", str(ctx.exception.__cause__))
+
+    def test_timeout_replaces_worker(self):
+        from sandbox import SandboxTimeout
+        before = set(self.pool.pids())
+        with self.assertRaises(SandboxTimeout):
+            self.pool.call(hang)
+        self.assertEqual(len(set(self.pool.pids()) - before), 1)
+        self.assertEqual(self.pool.call(echo, 1), 1)
+        self.assertEqual(self.pool.stats()["timeouts"], 1)
+
+    def test_crash_replaces_worker(self):
+        from sandbox import SandboxCrashed
+        with self.assertRaises(SandboxCrashed):
+            self.pool.call(crash)
+        self.assertEqual(self.pool.stats()["alive"], 2)
+        self.assertEqual(self.pool.call(echo, "ok"), "ok")
+
+    def test_reserved_workers(self):
+        from concurrent.futures import wait
+        with self.assertRaises(ValueError):
+            self.pool.reserve(3)
+        reservation = self.pool.reserve(2)
+        queued = self.pool.submit(echo, "queued")
+        self.assertFalse(wait([queued], timeout=0.2).done)
+        # A finished reserved call hands its worker back to the pool.
+        self.assertEqual(reservation.call(echo, "reserved"), "reserved")
+        self.assertEqual(queued.result(timeout=2), "queued")
+        reservation.release()
+        futures = [self.pool.submit(echo, i) for i in range(2)]
+        self.assertEqual([f.result(timeout=2) for f in futures], [0, 1])
+
+    def test_memory_limit(self):
+        with self.assertRaises(MemoryError):
+            self.pool.call(allocate, 512)
+        self.assertEqual(self.pool.call(allocate, 16), 16 * 1024 * 1024)
+
+
+@unittest.skipUnless(HAVE_SERVER_DEPS and HAVE_FORK, "server dependencies are not installed")
+class TestSandboxedRuns(ServerTestMixin, unittest.TestCase):
+    def test_node_code_runs_outside_the_server(self):
+        code = "def run(inputs, config):\n    import os\n    return os.getpid()\n"
+        workflow_id, node_ids = self.create_workflow([(self.create_node_type(code), None)])
+        result = self.run_workflow(workflow_id, force=True)["result"]
+        self.assertNotEqual(result[str(node_ids[0])], os.getpid())
+
+    def test_node_errors_fail_the_run(self):
+        code = "def run(inputs, config):\n    raise ValueError('boom')\n"
+        workflow_id, _ = self.create_workflow([(self.create_node_type(code), None)])
+        response = self.client.post(f"/api/workflows/{workflow_id}/run", json={"wait": True})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json()["error"], "boom")
+
+    def test_timeout_fails_the_run(self):
+        self.app.config["SANDBOX_TIMEOUT"] = 0.5
+        code = "def run(inputs, config):\n    import time\n    time.sleep(5)\n"
+        workflow_id, _ = self.create_workflow([(self.create_node_type(code), None)])
+        response = self.client.post(f"/api/workflows/{workflow_id}/run", json={"wait": True})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("time limit", response.get_json()["error"])
+
+
+def tearDownModule():
+    if HAVE_SERVER_DEPS:
+        from workflow_executor import shutdown_pools
+        shutdown_pools()
+
+if __name__ == '__main__':
+    unittest.main()
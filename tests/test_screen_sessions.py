@@ -0,0 +1,145 @@
+# tests/test_screen_sessions.py
+import os
+import sys
+import time
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, SERVER_DIR, ServerTestMixin
+
+class FakeFremen:
+    """Screen stand-in: a page with one search box holding typed text."""
+
+    def __init__(self, display):
+        self.display = display
+        self.text = ""
+
+    def locate_on_screen(self, template, confidence=0.9):
+        return (10, 20, 30, 40) if template == "search" else None
+
+    def click(self, template, confidence=0.9):
+        return template in ("search", "slow")
+
+    def type_text(self, text, interval=0.05, clear=False):
+        self.text = text if clear else self.text + text
+
+    def open_url(self, url):
+        self.text = url
+
+    def wait_until_ready(self, template, timeout=None):
+        return template == "search"
+
+    def select_all_and_return(self):
+        return f"{self.display}|{os.getpid()}|{self.text}"
+
+
+def fake_session(display):
+    from fremen_actions import ActionSession
+    return ActionSession(FakeFremen(display))
+
+
+NAME_CODE = "def run(inputs, config):\n    return config['name']\n"
+UPPER_CODE = "def run(inputs, config):\n    return inputs[0].upper()\n"
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestActionCatalog(unittest.TestCase):
+    def setUp(self):
+        if SERVER_DIR not in sys.path:
+            sys.path.append(SERVER_DIR)
+
+    def test_action_call_validation(self):
+        from fremen_actions import action_call, describe_actions
+        self.assertIsNone(action_call({"add": 1}))
+        self.assertEqual(action_call({"action": "fill", "template": "search"}),
+                         ("fill", {"template": "search"}))
+        for bad in ({"action": "scroll"}, {"action": "click"},
+                    {"action": "click", "template": "x", "speed": 2}):
+            with self.assertRaises(ValueError):
+                action_call(bad)
+        fill = next(a for a in describe_actions() if a["name"] == "fill")
+        self.assertTrue(fill["params"]["template"]["required"])
+        self.assertEqual(fill["params"]["text"]["default"], "{0}")
+
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestScreenSessions(ServerTestMixin, unittest.TestCase):
+    app_config = {
+        "SCREEN_DISPLAYS": [":91"],
+        "SCREEN_SESSION_FACTORY": "tests.test_screen_sessions:fake_session",
+        "SCREEN_LEASE_TIMEOUT": 30,
+    }
+
+    def create_search_workflow(self, name="ada", click="search"):
+        """name -> fill search box -> click -> capture text -> upper-case it."""
+        workflow_id, node_ids = self.create_workflow(
+            [
+                (self.create_node_type(NAME_CODE), '{"name": "%s"}' % name),
+                (None, '{"action": "fill", "template": "search", "text": "q={0}"}'),
+                (None, '{"action": "click", "template": "%s"}' % click),
+                (None, '{"action": "capture_text"}'),
+                (self.create_node_type(UPPER_CODE), "{}"),
+            ],
+            edges=[(0, 1), (1, 2), (2, 3), (3, 4)],
+        )
+        return workflow_id, [str(n) for n in node_ids]
+
+    def test_actions_share_a_warm_session(self):
+        workflow_id, nodes = self.create_search_workflow()
+        first = self.run_workflow(workflow_id)["result"]
+        self.assertEqual(first[nodes[1]], "q=ada")
+        display, pid, text = first[nodes[3]].split("|")
+        self.assertEqual((display, text), (":91", "q=ada"))
+        self.assertEqual(first[nodes[4]], first[nodes[3]].upper())
+
+        # Actions are never served from the output cache.
+        second = self.run_workflow(workflow_id)
+        self.assertEqual(second["result"][nodes[3]], first[nodes[3]])
+        self.assertNotIn(int(nodes[3]), second["reused"])
+        stats = self.client.get("/api/actions/sessions").get_json()
+        self.assertEqual(stats["leases"], 2)
+        self.assertEqual(stats["idle"], 1)
+        (session,) = stats["sessions"]
+        self.assertEqual((session["starts"], session["calls"], session["pid"]), (1, 6, int(pid)))
+
+    def test_failed_action_keeps_the_session(self):
+        workflow_id, _ = self.create_search_workflow(click="missing")
+        response = self.client.post(f"/api/workflows/{workflow_id}/run", json={"wait": True})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("missing not found on screen", response.get_json()["error"])
+        ok_id, nodes = self.create_search_workflow()
+        self.assertEqual(self.run_workflow(ok_id)["status"], "success")
+        stats = self.client.get("/api/actions/sessions").get_json()
+        self.assertEqual(stats["sessions"][0]["starts"], 1)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_runs_queue_for_the_session(self):
+        workflow_id, _ = self.create_workflow([
+            (None, '{"action": "click", "template": "slow", "wait": 0.3}'),
+            (None, '{"action": "capture_text"}'),
+        ], edges=[(0, 1)])
+        self.run_workflow(workflow_id)  # start the session process
+        start = time.perf_counter()
+        run_ids = [
+            self.client.post(f"/api/workflows/{workflow_id}/run", json={}).get_json()["run_id"]
+            for _ in range(2)
+        ]
+        queue = self.app.extensions["run_queue"]
+        for run_id in run_ids:
+            self.assertTrue(queue.wait(run_id, timeout=10))
+            self.assertEqual(self.client.get(f"/api/runs/{run_id}").get_json()["status"],
+                             "succeeded")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.6)
+        stats = self.client.get("/api/actions/sessions").get_json()
+        self.assertEqual(stats["leases"], 3)
+        self.assertGreater(stats["wait_time"], 0.2)
+
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestWithoutDisplays(ServerTestMixin, unittest.TestCase):
+    def test_action_nodes_need_displays(self):
+        workflow_id, _ = self.create_workflow([(None, '{"action": "capture_text"}')])
+        response = self.client.post(f"/api/workflows/{workflow_id}/run", json={"wait": True})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("SCREEN_DISPLAYS", response.get_json()["error"])
+        self.assertEqual(len(self.client.get("/api/actions").get_json()), 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+# tests/test_streams.py
+import itertools
+import sys
+import threading
+import time
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, SERVER_DIR, ServerTestMixin
+
+if SERVER_DIR not in sys.path:
+    sys.path.append(SERVER_DIR)
+
+SOURCE_CODE = (
+    "def run(inputs, config):\n"
+    "    for i in range(config['rows']):\n"
+    "        yield i\n"
+)
+DOUBLE_CODE = (
+    "def run(inputs, config):\n"
+    "    for row in inputs[0]:\n"
+    "        yield row * 2\n"
+)
+SUM_CODE = "def run(inputs, config):\n    return sum(inputs[0])\n"
+COUNT_CODE = "def run(inputs, config):\n    return sum(1 for _ in inputs[0])\n"
+JOIN_CODE = "def run(inputs, config):\n    return sum(inputs[0]) - inputs[1]\n"
+FAIL_CODE = (
+    "def run(inputs, config):\n"
+    "    yield 1\n"
+    "    raise ValueError('scrape failed')\n"
+)
+
+
+class TestGeneratorDetection(unittest.TestCase):
+    def test_detects_yield_in_run_only(self):
+        from streams import is_generator_code
+        self.assertTrue(is_generator_code(SOURCE_CODE))
+        self.assertTrue(is_generator_code("def run(inputs, config):\n    yield from inputs[0]\n"))
+        self.assertFalse(is_generator_code(SUM_CODE))
+        nested = (
+            "def run(inputs, config):\n"
+            "    def rows():\n"
+            "        yield 1\n"
+            "    return list(rows())\n"
+        )
+        self.assertFalse(is_generator_code(nested))
+        self.assertFalse(is_generator_code("def run(:"))
+
+
+class TestStream(unittest.TestCase):
+    def test_fan_out_and_detach(self):
+        from streams import Stream
+        stream = Stream(2, buffer=2)
+        first, second = stream.reader(), stream.reader()
+        producer = threading.Thread(target=lambda: (stream.feed(itertools.count()), stream.close()))
+        producer.start()
+        self.assertEqual(list(itertools.islice(first, 5)), [0, 1, 2, 3, 4])
+        self.assertEqual(list(itertools.islice(second, 3)), [0, 1, 2])
+        # An endless producer stops once nobody is reading.
+        first.detach()
+        second.detach()
+        producer.join(5)
+        self.assertFalse(producer.is_alive())
+
+    def test_producer_error_reaches_readers(self):
+        from streams import Stream, StreamError
+        stream = Stream(1)
+        reader = stream.reader()
+        stream.put_chunk([1, 2])
+        stream.close(ValueError("boom"))
+        with self.assertRaises(StreamError):
+            list(reader)
+
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestStreamingRuns(ServerTestMixin, unittest.TestCase):
+    def create_pipeline(self, rows=100_000, source_code=SOURCE_CODE):
+        source = self.create_node_type(source_code, name="source")
+        double = self.create_node_type(DOUBLE_CODE, name="double")
+        total = self.create_node_type(SUM_CODE, name="sum")
+        count = self.create_node_type(COUNT_CODE, name="count")
+        nodes = [(source, '{"rows": %d}' % rows), (double, None), (total, None), (count, None)]
+        return self.create_workflow(nodes, edges=[(0, 1), (1, 2), (0, 3)])
+
+    def check_pipeline(self, **options):
+        workflow_id, node_ids = self.create_pipeline()
+        result = self.run_workflow(workflow_id, **options)["result"]
+        self.assertEqual(result[str(node_ids[0])], {"records": 100_000})
+        self.assertEqual(result[str(node_ids[1])], {"records": 100_000})
+        self.assertEqual(result[str(node_ids[2])], 2 * sum(range(100_000)))
+        self.assertEqual(result[str(node_ids[3])], 100_000)
+
+    def test_sandboxed_pipeline(self):
+        self.check_pipeline()
+
+    def test_threaded_pipeline(self):
+        self.check_pipeline(pool="thread")
+
+    def test_diamond_collects_the_shared_stream(self):
+        # source -> sum -> join and source -> join: join only starts once sum
+        # has read everything, more than a stream buffers.
+        source = self.create_node_type(SOURCE_CODE, name="source")
+        total = self.create_node_type(SUM_CODE, name="sum")
+        join = self.create_node_type(JOIN_CODE, name="join")
+        workflow_id, node_ids = self.create_workflow(
+            [(source, '{"rows": 20000}'), (total, None), (join, None)],
+            edges=[(0, 1), (0, 2), (1, 2)],
+        )
+        for pool in ("sandbox", "thread"):
+            result = self.run_workflow(workflow_id, pool=pool, max_parallelism=2,
+                                       force=True)["result"]
+            self.assertEqual(result[str(node_ids[1])], sum(range(20000)))
+            self.assertEqual(result[str(node_ids[2])], 0)
+
+    def test_untyped_successor_does_not_block_the_stream(self):
+        source = self.create_node_type(SOURCE_CODE, name="source")
+        count = self.create_node_type(COUNT_CODE, name="count")
+        workflow_id, node_ids = self.create_workflow(
+            [(source, '{"rows": 100000}'), (None, None), (count, None)],
+            edges=[(0, 1), (0, 2)],
+        )
+        for pool in ("sandbox", "thread"):
+            result = self.run_workflow(workflow_id, pool=pool, force=True)["result"]
+            self.assertIsNone(result[str(node_ids[1])])
+            self.assertEqual(result[str(node_ids[2])], 100000)
+
+    def test_rerun_is_not_served_from_cache(self):
+        workflow_id, _ = self.create_pipeline(rows=10)
+        self.run_workflow(workflow_id)
+        self.assertEqual(self.run_workflow(workflow_id)["reused"], [])
+
+    def test_producer_failure_fails_the_run(self):
+        workflow_id, _ = self.create_pipeline(source_code=FAIL_CODE)
+        for pool in ("sandbox", "thread"):
+            response = self.client.post(f"/api/workflows/{workflow_id}/run",
+                                        json={"wait": True, "pool": pool})
+            self.assertEqual(response.status_code, 500)
+            self.assertIn("scrape failed", response.get_json()["error"])
+
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestConcurrentStreamingRuns(ServerTestMixin, unittest.TestCase):
+    # Each run streams through all four sandbox workers.
+    app_config = {"WORKFLOW_POOL_SIZE": 4}
+
+    def test_runs_do_not_split_the_sandbox_pool(self):
+        source = self.create_node_type(SOURCE_CODE, name="source")
+        double = self.create_node_type(DOUBLE_CODE, name="double")
+        total = self.create_node_type(SUM_CODE, name="sum")
+        count = self.create_node_type(COUNT_CODE, name="count")
+        nodes = [(source, '{"rows": 100000}'), (double, None), (total, None), (count, None)]
+        workflow_id, _ = self.create_workflow(nodes, edges=[(0, 1), (1, 2), (0, 3)])
+        runs = [self.client.post(f"/api/workflows/{workflow_id}/run").get_json()["run_id"]
+                for _ in range(2)]
+        for run_id in runs:
+            deadline = time.monotonic() + 30
+            while (run := self.client.get(f"/api/runs/{run_id}").get_json())["status"] in (
+                    "queued", "running") and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(run["status"], "succeeded", run.get("error"))
+
+
+def tearDownModule():
+    if HAVE_SERVER_DEPS:
+        from workflow_executor import shutdown_pools
+        shutdown_pools()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# tests/test_telemetry.py
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, ServerTestMixin
+
+SLOW_CODE = (
+    "def run(inputs, config):\n"
+    "    import time\n"
+    "    time.sleep(config['sleep'])\n"
+    "    return ['%03d' % i * 25 for i in range(10)]\n"
+)
+FAILING_CODE = "def run(inputs, config):\n    raise RuntimeError('boom')\n"
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestTelemetry(ServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.slow_type = self.create_node_type(SLOW_CODE, name="slow")
+        self.workflow_id, node_ids = self.create_workflow(
+            [(self.slow_type, '{"sleep": 0.05}'), (self.slow_type, '{"sleep": 0}')],
+            edges=[(0, 1)],
+        )
+        self.slow, self.fast = node_ids
+
+    def node_runs(self):
+        from models import NodeRun
+        with self.app.app_context():
+            return NodeRun.query.order_by(NodeRun.id).all()
+
+    def test_runs_record_node_metrics(self):
+        run = self.run_workflow(self.workflow_id, force=True)
+        rows = self.node_runs()
+        self.assertEqual([r.node_id for r in rows], [self.slow, self.fast])
+        slow, fast = rows
+        self.assertEqual(slow.run_id, run["run_id"])
+        self.assertEqual(slow.node_type_id, self.slow_type)
+        self.assertGreaterEqual(slow.wall_time, 0.05)
+        self.assertGreater(slow.wall_time, fast.wall_time)
+        self.assertIsNotNone(slow.cpu_time)
+        self.assertGreater(slow.output_bytes, 750)
+        self.assertEqual(fast.input_bytes, slow.output_bytes)
+        self.assertFalse(slow.reused)
+        self.assertIsNone(slow.error)
+
+        self.run_workflow(self.workflow_id)
+        self.assertTrue(all(r.reused for r in self.node_runs()[2:]))
+
+    def test_failed_node_is_recorded(self):
+        workflow_id, (node_id,) = self.create_workflow([(self.create_node_type(FAILING_CODE), "{}")])
+        response = self.client.post(f"/api/workflows/{workflow_id}/run", json={"wait": True})
+        self.assertEqual(response.status_code, 500)
+        (row,) = self.node_runs()
+        self.assertEqual(row.node_id, node_id)
+        self.assertIn("boom", row.error)
+
+    def test_percentile_endpoints(self):
+        for _ in range(3):
+            self.run_workflow(self.workflow_id, force=True)
+        self.run_workflow(self.workflow_id)  # reused nodes are left out
+
+        nodes = self.client.get(f"/api/stats/workflows/{self.workflow_id}/nodes").get_json()
+        self.assertEqual([n["node_id"] for n in nodes], [self.slow, self.fast])
+        slow = nodes[0]
+        self.assertEqual(slow["wall_time"]["count"], 3)
+        self.assertGreaterEqual(slow["wall_time"]["p50"], 0.05)
+        self.assertLessEqual(slow["wall_time"]["p50"], slow["wall_time"]["p99"])
+        self.assertEqual(slow["wall_time"]["p99"], slow["wall_time"]["max"])
+        self.assertGreater(slow["share"], 0.5)
+
+        (node_type,) = self.client.get("/api/stats/node_types").get_json()
+        self.assertEqual(node_type["node_type_id"], self.slow_type)
+        self.assertEqual(node_type["wall_time"]["count"], 6)
+        self.assertEqual(node_type["errors"], 0)
+
+        (workflow,) = self.client.get("/api/stats/workflows?days=1").get_json()
+        self.assertEqual(workflow["workflow_id"], self.workflow_id)
+        self.assertEqual(workflow["duration"]["count"], 4)
+
+        self.assertEqual(self.client.get("/api/stats/workflows?days=0").status_code, 400)
+
+    def test_stats_are_per_user(self):
+        self.run_workflow(self.workflow_id, force=True)
+        self.client.post("/api/register", json={"username": "bob", "password": "pw"})
+        self.client.post("/api/login", json={"username": "bob", "password": "pw"})
+        self.assertEqual(self.client.get("/api/stats/node_types").get_json(), [])
+        response = self.client.get(f"/api/stats/workflows/{self.workflow_id}/nodes")
+        self.assertEqual(response.status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
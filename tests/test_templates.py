@@ -0,0 +1,60 @@
+# tests/test_templates.py
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+    import cv2
+except ImportError:  # pragma: no cover - optional dependency
+    np = cv2 = None
+
+from fremen import Fremen
+
+@unittest.skipIf(np is None or cv2 is None, "numpy and opencv are required")
+class TestTemplateRegistry(unittest.TestCase):
+    def setUp(self):
+        from fremen.templates import TemplateRegistry
+        self.TemplateRegistry = TemplateRegistry
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        rng = np.random.default_rng(1)
+        self.button = rng.integers(0, 256, size=(20, 40, 3), dtype=np.uint8)
+        cv2.imwrite(os.path.join(self.dir, "button.png"), self.button)
+        cv2.imwrite(os.path.join(self.dir, "flat.png"), np.full((10, 10, 3), 7, np.uint8))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_by_name(self):
+        registry = self.TemplateRegistry(self.dir)
+        self.assertEqual(registry.names(), ["button", "flat"])
+        template = registry["button"]
+        self.assertEqual(template.gray.shape, (20, 40))
+        self.assertEqual(set(template.variants), {0.8, 1.0, 1.25})
+        self.assertAlmostEqual(template.stats[1.0][0], float(template.gray.mean()), places=3)
+
+    def test_reopen_maps_without_rebuild(self):
+        self.TemplateRegistry(self.dir)
+        registry = self.TemplateRegistry(self.dir)
+        self.assertEqual(registry.rebuilds, 0)
+
+    def test_rebuilds_when_source_changes(self):
+        registry = self.TemplateRegistry(self.dir)
+        self.assertFalse(registry.refresh())
+        path = os.path.join(self.dir, "button.png")
+        cv2.imwrite(path, self.button[:10])
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(registry.refresh())
+        self.assertEqual(registry["button"].gray.shape, (10, 40))
+
+    def test_fremen_locates_template_by_name(self):
+        frame = np.zeros((200, 300, 3), dtype=np.uint8)
+        frame[50:70, 100:140] = self.button
+        fremen = Fremen(templates=self.TemplateRegistry(self.dir))
+        box = fremen.locate_on_screen("button", frame=frame)
+        self.assertEqual(tuple(box), (100, 50, 40, 20))
+
+if __name__ == '__main__':
+    unittest.main()
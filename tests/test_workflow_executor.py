@@ -0,0 +1,86 @@
+# tests/test_workflow_executor.py
+import json
+import os
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, ServerTestMixin
+
+SLEEP_CODE = (
+    "def run(inputs, config):\n"
+    "    import time\n"
+    "    time.sleep(config.get('sleep', 0))\n"
+    "    return sum(i or 0 for i in inputs) + config.get('add', 1)\n"
+)
+# Marks config['dir'] and waits for config['peers'] marks: succeeds only if
+# that many nodes run at the same time.
+RENDEZVOUS_CODE = (
+    "def run(inputs, config):\n"
+    "    import os, time\n"
+    "    if 'dir' in config:\n"
+    "        open(os.path.join(config['dir'], str(config['add'])), 'w').close()\n"
+    "        deadline = time.time() + 10\n"
+    "        while len(os.listdir(config['dir'])) < config['peers']:\n"
+    "            if time.time() > deadline:\n"
+    "                raise TimeoutError('nodes did not run in parallel')\n"
+    "            time.sleep(0.01)\n"
+    "    return sum(i or 0 for i in inputs) + config.get('add', 1)\n"
+)
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestParallelExecution(ServerTestMixin, unittest.TestCase):
+    def create_fan_in(self, width=6, sleep=0.1, code=SLEEP_CODE, branch=None, **fields):
+        """Node 0 feeding ``width`` branches merged by a last node.
+
+        ``branch`` adds settings to every branch node's config.
+        """
+        node_type_id = self.create_node_type(code)
+        nodes = [(node_type_id, '{"add": 1}')]
+        nodes += [(node_type_id, json.dumps({"sleep": sleep, "add": i, **(branch or {})}))
+                  for i in range(width)]
+        nodes += [(node_type_id, '{"add": 0}')]
+        edges = [(0, i) for i in range(1, width + 1)]
+        edges += [(i, width + 1) for i in range(1, width + 1)]
+        return self.create_workflow(nodes, edges, **fields)
+
+    def test_parallel_matches_sequential_and_overlaps(self):
+        workflow_id, sequential_ids = self.create_fan_in(sleep=0.01)
+        sequential = self.run_workflow(workflow_id)
+        spans = sorted((sequential["timings"][str(n)] for n in sequential_ids),
+                       key=lambda span: span["start"])
+        self.assertTrue(all(a["end"] <= b["start"] for a, b in zip(spans, spans[1:])))
+
+        # Each branch waits until all six run, so this only finishes in parallel.
+        marks = os.path.join(self.tmp.name, "marks")
+        os.mkdir(marks)
+        workflow_id, node_ids = self.create_fan_in(
+            sleep=0, code=RENDEZVOUS_CODE, branch={"dir": marks, "peers": 6}
+        )
+        parallel = self.run_workflow(workflow_id, max_parallelism=6)
+
+        self.assertEqual([parallel["result"][str(n)] for n in node_ids],
+                         [sequential["result"][str(n)] for n in sequential_ids])
+        self.assertEqual(parallel["result"][str(node_ids[-1])], sum(1 + i for i in range(6)))
+        timings = parallel["timings"]
+        merge = timings[str(node_ids[-1])]
+        self.assertTrue(all(merge["start"] >= timings[str(n)]["end"] for n in node_ids[1:-1]))
+
+    def test_max_parallelism_per_workflow(self):
+        workflow_id, node_ids = self.create_fan_in(width=4, sleep=0.05, max_parallelism=2)
+        timings = self.run_workflow(workflow_id)["timings"]
+        spans = [timings[str(n)] for n in node_ids[1:-1]]
+        for span in spans:
+            concurrent = sum(1 for other in spans
+                             if other["start"] <= span["start"] < other["end"])
+            self.assertLessEqual(concurrent, 2)
+
+    def test_process_pool(self):
+        workflow_id, node_ids = self.create_fan_in(width=3, sleep=0)
+        result = self.run_workflow(workflow_id, max_parallelism=3, pool="process")["result"]
+        self.assertEqual(result[str(node_ids[-1])], 1 + 2 + 3)
+
+def tearDownModule():
+    if HAVE_SERVER_DEPS:
+        from workflow_executor import shutdown_pools
+        shutdown_pools()
+
+if __name__ == '__main__':
+    unittest.main()
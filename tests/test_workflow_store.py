@@ -0,0 +1,117 @@
+# tests/test_workflow_store.py
+import unittest
+from tests.server_support import HAVE_SERVER_DEPS, ServerTestMixin
+
+def node(node_id, node_type_id, x=0.0, config="{}"):
+    return {"id": node_id, "node_type_id": node_type_id, "position": {"x": x, "y": 0.0},
+            "size": {"width": 200.0, "height": 100.0}, "config": config}
+
+@unittest.skipUnless(HAVE_SERVER_DEPS, "server dependencies are not installed")
+class TestDiffSave(ServerTestMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.node_type_id = self.create_node_type()
+        self.workflow_id = self.client.post("/api/workflows", json={"name": "wf"}).get_json()["workflow_id"]
+        self.url = f"/api/workflows/{self.workflow_id}"
+
+    def save(self, nodes, edges, **fields):
+        return self.client.put(self.url, json={"nodes": nodes, "edges": edges, **fields})
+
+    def detail(self):
+        return self.client.get(self.url).get_json()
+
+    def test_temporary_ids_are_mapped(self):
+        response = self.save([node("a", self.node_type_id), node("b", self.node_type_id)],
+                             [{"source": "a", "target": "b"}])
+        self.assertEqual(response.status_code, 200)
+        ids = response.get_json()["node_ids"]
+        edges = self.detail()["edges"]
+        self.assertEqual([(e["source"], e["target"]) for e in edges], [(ids["a"], ids["b"])])
+
+    def test_node_ids_are_stable_and_removed_nodes_drop_edges(self):
+        ids = self.save([node("a", self.node_type_id), node("b", self.node_type_id),
+                         node("c", self.node_type_id)],
+                        [{"source": "a", "target": "b"}, {"source": "b", "target": "c"}]
+                        ).get_json()["node_ids"]
+        a, b, c = ids["a"], ids["b"], ids["c"]
+        response = self.save([node(a, self.node_type_id, x=5.0), node(c, self.node_type_id),
+                              node("d", self.node_type_id)],
+                             [{"source": a, "target": "d"}, {"source": "d", "target": c}])
+        d = response.get_json()["node_ids"]["d"]
+        detail = self.detail()
+        self.assertEqual(sorted(n["id"] for n in detail["nodes"]), sorted([a, c, d]))
+        self.assertEqual({n["id"]: n["position"]["x"] for n in detail["nodes"]}[a], 5.0)
+        self.assertEqual(sorted((e["source"], e["target"]) for e in detail["edges"]),
+                         sorted([(a, d), (d, c)]))
+
+    def test_join_inputs_follow_edge_order(self):
+        value = self.create_node_type("def run(inputs, config):\n    return config['v']\n")
+        join = self.create_node_type("def run(inputs, config):\n    return inputs\n")
+        nodes = [node(f"s{v}", value, config='{"v": %d}' % v) for v in range(4)]
+        order = [2, 0, 3, 1]
+        edges = [{"source": f"s{v}", "target": "join", "label": f"in{v}"} for v in order]
+        ids = self.save(nodes + [node("join", join)], edges).get_json()["node_ids"]
+        result = self.run_workflow(self.workflow_id)["result"]
+        self.assertEqual(result[str(ids["join"])], order)
+
+    def test_version_conflict(self):
+        version = self.detail()["version"]
+        first = self.save([node("a", self.node_type_id)], [], version=version)
+        self.assertEqual(first.get_json()["version"], version + 1)
+        stale = self.save([], [], version=version)
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.get_json()["version"], version + 1)
+        self.assertEqual(len(self.detail()["nodes"]), 1)
+
+    def test_unknown_edge_reference_is_rejected(self):
+        response = self.save([node("a", self.node_type_id)], [{"source": "a", "target": 9999}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.detail()["nodes"], [])
+
+    def test_metadata_only_update_keeps_graph(self):
+        self.save([node("a", self.node_type_id)], [])
+        self.client.put(self.url, json={"name": "renamed"})
+        detail = self.detail()
+        self.assertEqual(detail["name"], "renamed")
+        self.assertEqual(len(detail["nodes"]), 1)
+
+    def test_partial_graph_updates(self):
+        ids = self.save([node("a", self.node_type_id), node("b", self.node_type_id)],
+                        [{"source": "a", "target": "b"}]).get_json()["node_ids"]
+        a, b = ids["a"], ids["b"]
+        response = self.client.put(self.url, json={"edges": [{"source": b, "target": a}]})
+        self.assertEqual(response.status_code, 200)
+        detail = self.detail()
+        self.assertEqual(sorted(n["id"] for n in detail["nodes"]), sorted([a, b]))
+        self.assertEqual([(e["source"], e["target"]) for e in detail["edges"]], [(b, a)])
+
+        self.client.put(self.url, json={"nodes": [node(a, self.node_type_id, x=3.0),
+                                                  node(b, self.node_type_id)]})
+        detail = self.detail()
+        self.assertEqual({n["id"]: n["position"]["x"] for n in detail["nodes"]}[a], 3.0)
+        self.assertEqual([(e["source"], e["target"]) for e in detail["edges"]], [(b, a)])
+
+    def test_save_query_count_is_constant(self):
+        from sqlalchemy import event
+        from database import db
+        with self.app.app_context():
+            engine = db.engine
+
+        def count(size):
+            ids = self.save([node(f"n{i}", self.node_type_id) for i in range(size)], []
+                            ).get_json()["node_ids"]
+            nodes = [node(ids[f"n{i}"], self.node_type_id, x=1.0) for i in range(size)]
+            edges = [{"source": ids[f"n{i}"], "target": ids[f"n{i + 1}"]} for i in range(size - 1)]
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(engine, "before_cursor_execute", listener)
+            try:
+                self.assertEqual(self.save(nodes, edges).status_code, 200)
+            finally:
+                event.remove(engine, "before_cursor_execute", listener)
+            return len(statements)
+
+        self.assertEqual(count(3), count(60))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,5 @@
 // src/pages/WorkflowPage.js
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import {
   ReactFlowProvider,
   ReactFlow,
@@ -19,11 +19,38 @@ import {
   getWorkflowDetail,
   updateWorkflow,
   runWorkflow,
-  fetchNodeTypes
+  getRun,
+  openRunEvents,
+  getWorkflowNodeStats,
+  fetchNodeTypes,
+  fetchActions
 } from '../utils/api';
 
+// Nodes taking at least this share of a workflow's run time are highlighted.
+const HOT_NODE_SHARE = 0.25;
+
+const formatSeconds = (s) => (s >= 1 ? `${s.toFixed(1)} s` : `${Math.round(s * 1000)} ms`);
+
+// Node config of a new action node: its name and the required parameters.
+const actionConfig = (action) => {
+  const config = { action: action.name };
+  Object.entries(action.params).forEach(([key, param]) => {
+    if (param.required) config[key] = '';
+  });
+  return JSON.stringify(config);
+};
+
+const actionLabel = (config) => {
+  try {
+    const action = JSON.parse(config || '{}').action;
+    return action ? `Action: ${action}` : 'Empty Node';
+  } catch (err) {
+    return 'Empty Node';
+  }
+};
+
 // NodeLibraryPanel component remains the same
-function NodeLibraryPanel({ nodeTypes }) {
+function NodeLibraryPanel({ nodeTypes, actions }) {
   const onDragStart = (event, nodeType) => {
     event.dataTransfer.setData('application/reactflow', JSON.stringify(nodeType));
     event.dataTransfer.effectAllowed = 'move';
@@ -49,6 +76,24 @@ function NodeLibraryPanel({ nodeTypes }) {
           {nt.is_public ? ' (public)' : ''}
         </div>
       ))}
+      <h4>Fremen Actions</h4>
+      {actions.map((action) => (
+        <div
+          key={action.name}
+          draggable
+          title={action.description}
+          onDragStart={(event) => onDragStart(event, { name: action.name, config: actionConfig(action) })}
+          style={{
+            border: '1px dashed #777',
+            margin: '5px 0',
+            padding: '5px',
+            cursor: 'grab',
+            backgroundColor: '#f4f8ff'
+          }}
+        >
+          {action.name}
+        </div>
+      ))}
     </div>
   );
 }
@@ -62,6 +107,9 @@ function WorkflowContent() {
   const [nodes, setNodes, onNodesChange] = useNodesState([]);
   const [edges, setEdges, onEdgesChange] = useEdgesState([]);
   const [nodeTypes, setNodeTypes] = useState([]);
+  const [actions, setActions] = useState([]);
+  // node id -> { wall_time: { p50, p95, ... }, share } from recent runs
+  const [nodeStats, setNodeStats] = useState({});
   
   // Get the ReactFlow instance
   const reactFlowInstance = useReactFlow();
@@ -69,6 +117,7 @@ function WorkflowContent() {
   useEffect(() => {
     loadWorkflows();
     loadNodeTypes();
+    loadActions();
   }, []);
 
   // Load workflows and node types functions remain the same
@@ -92,6 +141,25 @@ function WorkflowContent() {
     }
   };
 
+  const loadActions = async () => {
+    try {
+      const res = await fetchActions();
+      setActions(res.data);
+    } catch (err) {
+      console.error('Failed to fetch actions:', err);
+    }
+  };
+
+  const loadNodeStats = async (workflowId) => {
+    try {
+      const res = await getWorkflowNodeStats(workflowId);
+      setNodeStats(Object.fromEntries(res.data.map((s) => [s.node_id.toString(), s])));
+    } catch (err) {
+      console.error('Failed to fetch node stats:', err);
+      setNodeStats({});
+    }
+  };
+
   // Other handler functions remain the same
   const handleSelectWorkflow = async (wf) => {
     setSelectedWorkflow(wf);
@@ -99,6 +167,7 @@ function WorkflowContent() {
     try {
       const detailRes = await getWorkflowDetail(wf.id);
       const wfDetail = detailRes.data;
+      setSelectedWorkflow({ ...wf, version: wfDetail.version });
 
       // Map backend nodes to ReactFlow nodes
       const rfNodes = wfDetail.nodes.map((n) => ({
@@ -109,7 +178,7 @@ function WorkflowContent() {
           y: n.position.y 
         },
         data: { 
-          label: n.node_type_id ? `Node ${n.id}` : 'Empty Node',
+          label: n.node_type_id ? `Node ${n.id}` : actionLabel(n.config),
           nodeTypeId: n.node_type_id,
           config: n.config
         },
@@ -139,53 +208,81 @@ function WorkflowContent() {
 
       setNodes(rfNodes);
       setEdges(rfEdges);
+      loadNodeStats(wf.id);
     } catch (err) {
       console.error('Failed to load workflow detail:', err);
       alert('Failed to load workflow detail');
     }
   };
 
+  // Stored nodes keep their numeric id; nodes added in the editor send their
+  // ReactFlow id as a temporary id, which the server maps to a new node id.
+  const toBackendId = (id) => (/^\d+$/.test(id) ? parseInt(id, 10) : id);
+
   const handleSaveWorkflow = async () => {
     if (!selectedWorkflow) return;
 
     const backendNodes = nodes.map((n) => ({
+      id: toBackendId(n.id),
       node_type_id: n.data.nodeTypeId || null,
-      x: n.position.x,
-      y: n.position.y,
-      width: n.style?.width || 200,
-      height: n.style?.height || 100,
+      position: { x: n.position.x, y: n.position.y },
+      size: { width: n.style?.width || 200, height: n.style?.height || 100 },
       config: n.data.config || ''
     }));
 
     const backendEdges = edges.map((e) => ({
-      source_node_id: parseInt(e.source),
-      target_node_id: parseInt(e.target),
+      source: toBackendId(e.source),
+      target: toBackendId(e.target),
       label: e.label || ''
     }));
 
     const payload = {
       name: selectedWorkflow.name,
       is_public: selectedWorkflow.is_public,
+      version: selectedWorkflow.version,
       nodes: backendNodes,
       edges: backendEdges
     };
 
     try {
-      await updateWorkflow(selectedWorkflow.id, payload);
+      const res = await updateWorkflow(selectedWorkflow.id, payload);
+      const idMap = res.data.node_ids || {};
+      const mapId = (id) => (idMap[id] !== undefined ? idMap[id].toString() : id);
+      setNodes((nds) => nds.map((n) => ({ ...n, id: mapId(n.id) })));
+      setEdges((eds) => eds.map((e) => ({ ...e, source: mapId(e.source), target: mapId(e.target) })));
+      setSelectedWorkflow({ ...selectedWorkflow, version: res.data.version });
       alert('Workflow saved');
       loadWorkflows();
     } catch (err) {
+      if (err.response?.status === 409) {
+        alert('This workflow was changed elsewhere. Reload it before saving.');
+        return;
+      }
       console.error('Failed to save workflow:', err);
       alert('Failed to save workflow');
     }
   };
 
-  const handleRunWorkflow = async () => {
+  // force=true recomputes every node instead of reusing memoized outputs.
+  const handleRunWorkflow = async (force = false) => {
     if (!selectedWorkflow) return;
     try {
-      const res = await runWorkflow(selectedWorkflow.id);
-      console.log('Workflow run result:', res.data);
-      alert('Workflow executed. Check console for output.');
+      const res = await runWorkflow(selectedWorkflow.id, { force });
+      const runId = res.data.run_id;
+      const events = openRunEvents(runId);
+      events.addEventListener('node_finished', (e) => {
+        console.log('Node finished:', JSON.parse(e.data));
+      });
+      events.addEventListener('status', async (e) => {
+        const { status } = JSON.parse(e.data);
+        if (!['succeeded', 'failed', 'cancelled'].includes(status)) return;
+        events.close();
+        const run = await getRun(runId);
+        console.log('Workflow run result:', run.data);
+        loadNodeStats(selectedWorkflow.id);
+        const reused = run.data.reused?.length ? ` (${run.data.reused.length} nodes reused)` : '';
+        alert(`Workflow run ${status}${reused}. Check console for output.`);
+      });
     } catch (err) {
       console.error('Failed to run workflow:', err);
       alert('Failed to run workflow');
@@ -237,7 +334,9 @@ function WorkflowContent() {
           position,
           data: {
             label: nodeType.name,
-            nodeTypeId: nodeType.id
+            // Actions have no node type; their config names the action.
+            nodeTypeId: nodeType.id || null,
+            config: nodeType.config || ''
           },
           style: { width: 200, height: 100 }
         };
@@ -250,6 +349,29 @@ function WorkflowContent() {
     [reactFlowInstance, setNodes]
   );
 
+  // Nodes as displayed: hot nodes get a warm background and their p95 time.
+  const displayedNodes = useMemo(
+    () =>
+      nodes.map((n) => {
+        const stats = nodeStats[n.id];
+        if (!stats) return n;
+        const hot = stats.share >= HOT_NODE_SHARE;
+        return {
+          ...n,
+          data: {
+            ...n.data,
+            label: `${n.data.label} · p95 ${formatSeconds(stats.wall_time.p95)}`
+          },
+          style: {
+            ...n.style,
+            background: hot ? '#ffd8cc' : n.style?.background,
+            border: hot ? '2px solid #e0532f' : n.style?.border
+          }
+        };
+      }),
+    [nodes, nodeStats]
+  );
+
   // Return the JSX for the workflow content
   return (
     <div style={{ display: 'flex' }}>
@@ -296,18 +418,19 @@ function WorkflowContent() {
           <>
             <h3>Selected: {selectedWorkflow.name}</h3>
             <button onClick={handleSaveWorkflow}>Save</button>
-            <button onClick={handleRunWorkflow}>Run</button>
+            <button onClick={() => handleRunWorkflow(false)}>Run</button>
+            <button onClick={() => handleRunWorkflow(true)}>Run (recompute all)</button>
           </>
         )}
 
         {/* Node library panel */}
-        <NodeLibraryPanel nodeTypes={nodeTypes} />
+        <NodeLibraryPanel nodeTypes={nodeTypes} actions={actions} />
       </div>
 
       {/* ReactFlow canvas */}
       <div style={{ flex: 1, height: '100vh' }}>
         <ReactFlow
-          nodes={nodes}
+          nodes={displayedNodes}
           edges={edges}
           onNodesChange={onNodesChange}
           onEdgesChange={onEdgesChange}
@@ -16,8 +16,24 @@ export const logoutUser = () => {
   return axios.post(`${API_BASE}/logout`, {}, { withCredentials: true });
 };
 
-export const fetchWorkflows = () => {
-  return axios.get(`${API_BASE}/workflows`, { withCredentials: true });
+// List endpoints are paginated; follow X-Next-Cursor until the last page.
+// Detail endpoints send ETags, which the browser revalidates on its own.
+const fetchAllPages = async (url, params = {}) => {
+  let items = [];
+  let cursor = null;
+  do {
+    const res = await axios.get(url, {
+      params: cursor ? { ...params, cursor } : params,
+      withCredentials: true
+    });
+    items = items.concat(res.data);
+    cursor = res.headers['x-next-cursor'];
+  } while (cursor);
+  return { data: items };
+};
+
+export const fetchWorkflows = (params = {}) => {
+  return fetchAllPages(`${API_BASE}/workflows`, params);
 };
 
 export const createWorkflow = (name, is_public) => {
@@ -32,12 +48,40 @@ export const updateWorkflow = (workflow_id, payload) => {
   return axios.put(`${API_BASE}/workflows/${workflow_id}`, payload, { withCredentials: true });
 };
 
-export const runWorkflow = (workflow_id) => {
-  return axios.post(`${API_BASE}/workflows/${workflow_id}/run`, {}, { withCredentials: true });
+// Queues a run; the response holds { run_id, status }.
+export const runWorkflow = (workflow_id, options = {}) => {
+  return axios.post(`${API_BASE}/workflows/${workflow_id}/run`, options, { withCredentials: true });
+};
+
+export const getRun = (run_id) => {
+  return axios.get(`${API_BASE}/runs/${run_id}`, { withCredentials: true });
+};
+
+export const cancelRun = (run_id) => {
+  return axios.post(`${API_BASE}/runs/${run_id}/cancel`, {}, { withCredentials: true });
+};
+
+// Per-node wall time percentiles ({ p50, p95, p99, ... }) and share of run
+// time over the last `days` days of the current user's runs.
+export const getWorkflowNodeStats = (workflow_id, days = 7) => {
+  return axios.get(`${API_BASE}/stats/workflows/${workflow_id}/nodes`, {
+    params: { days },
+    withCredentials: true
+  });
+};
+
+// Server-sent events: node_started, node_finished and status events.
+export const openRunEvents = (run_id) => {
+  return new EventSource(`${API_BASE}/runs/${run_id}/events`, { withCredentials: true });
+};
+
+export const fetchNodeTypes = (params = {}) => {
+  return fetchAllPages(`${API_BASE}/node_types`, params);
 };
 
-export const fetchNodeTypes = () => {
-  return axios.get(`${API_BASE}/node_types`, { withCredentials: true });
+// Built-in Fremen actions: [{ name, description, params: { key: { required, default } } }].
+export const fetchActions = () => {
+  return axios.get(`${API_BASE}/actions`, { withCredentials: true });
 };
 
 export const createNodeType = (name, code, is_public) => {
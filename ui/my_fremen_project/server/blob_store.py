@@ -0,0 +1,132 @@
+"""Content-addressed files holding large node outputs of runs.
+
+A run's result keeps small outputs inline. Any output whose JSON encoding
+exceeds the store's threshold is written once under its SHA-256 and
+replaced by a reference::
+
+    {"$blob": "<sha256>", "size": 1048576, "url": "/api/runs/7/blobs/<sha256>"}
+
+Identical outputs of different runs share one file. ``run_blobs`` records
+which runs reference which blobs, and :func:`collect_garbage` deletes the
+files no run inside the retention period still references.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+from database import db
+from models import RunBlob, WorkflowRun
+
+BLOB_REF = "$blob"
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Unreferenced files younger than this may belong to a run still being saved.
+GC_GRACE = 3600.0
+
+
+class BlobStore:
+    """Directory of immutable blobs at ``<root>/<digest[:2]>/<digest>``."""
+
+    def __init__(self, root: str, threshold: int = 64 * 1024):
+        self.root = root
+        self.threshold = threshold
+
+    def path(self, digest: str) -> str:
+        if not DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest {digest!r}")
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` unless an identical blob exists; return its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            # Restart the grace period so a concurrent collection keeps it.
+            os.utime(path)
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return digest
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def spill(self, run_id: int, result: dict) -> tuple[dict, set[str]]:
+        """Move the large outputs of ``result`` into the store.
+
+        Returns the result with references in their place and the digests
+        referenced.
+        """
+        spilled, digests = {}, set()
+        for node_id, output in result.items():
+            data = json.dumps(output, default=repr).encode()
+            if len(data) <= self.threshold:
+                spilled[node_id] = output
+                continue
+            digest = self.put(data)
+            digests.add(digest)
+            spilled[node_id] = {
+                BLOB_REF: digest,
+                "size": len(data),
+                "url": f"/api/runs/{run_id}/blobs/{digest}",
+            }
+        return spilled, digests
+
+    def files(self):
+        """Yield ``(digest, path)`` for every stored blob."""
+        if not os.path.isdir(self.root):
+            return
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if DIGEST_RE.match(name):
+                    yield name, os.path.join(directory, name)
+
+
+def collect_garbage(store: BlobStore, retention_days: float, now: float | None = None,
+                    grace: float = GC_GRACE) -> dict[str, int]:
+    """Apply the retention policy and delete blobs no remaining run uses.
+
+    Runs that finished more than ``retention_days`` ago lose their blob
+    references; their results then point at blobs that may be gone.
+    """
+    now = time.time() if now is None else now
+    expired = db.select(WorkflowRun.id).where(
+        WorkflowRun.finished_at < now - retention_days * 86400
+    )
+    released = db.session.execute(
+        db.delete(RunBlob).where(RunBlob.run_id.in_(expired)),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.session.commit()
+
+    referenced = set(db.session.execute(db.select(RunBlob.digest).distinct()).scalars())
+    deleted = freed = 0
+    for digest, path in store.files():
+        if digest in referenced:
+            continue
+        try:
+            stat = os.stat(path)
+            if stat.st_mtime > now - grace:
+                continue
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
+        deleted += 1
+        freed += stat.st_size
+    return {"released": released, "deleted": deleted, "freed_bytes": freed}
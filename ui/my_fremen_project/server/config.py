@@ -11,3 +11,45 @@ SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(BASE_DIR, "app.db")
 
 # Disable SQLAlchemy's event system to avoid overhead
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# WAL journaling and the other pragmas in database.SQLITE_PRAGMAS.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") != "0"
+
+# Worker pool executing node code: "sandbox" (pre-forked worker processes,
+# used for every run), "thread" or "process" (parallel runs only; sequential
+# runs then execute in the server process).
+WORKFLOW_POOL = os.getenv("WORKFLOW_POOL", "sandbox")
+
+# Number of workers in that pool, shared by all runs in this process.
+WORKFLOW_POOL_SIZE = int(os.getenv("WORKFLOW_POOL_SIZE", "8"))
+
+# Limits applied to every node call in the sandbox: wall-clock seconds, and
+# megabytes of address space a worker may add on top of the server's.
+SANDBOX_TIMEOUT = float(os.getenv("SANDBOX_TIMEOUT", "300"))
+SANDBOX_MEMORY_MB = int(os.getenv("SANDBOX_MEMORY_MB", "1024"))
+
+# Bounds of the in-memory store of memoized node outputs.
+OUTPUT_CACHE_ENTRIES = int(os.getenv("OUTPUT_CACHE_ENTRIES", "4096"))
+OUTPUT_CACHE_BYTES = int(os.getenv("OUTPUT_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Background threads executing queued workflow runs.
+RUN_WORKERS = int(os.getenv("RUN_WORKERS", "4"))
+
+# Runs a single user may have executing at the same time.
+RUNS_PER_USER = int(os.getenv("RUNS_PER_USER", "2"))
+
+# Run outputs whose JSON exceeds BLOB_THRESHOLD bytes are stored as files in
+# BLOB_DIR and referenced from the result. Blobs only used by runs older
+# than BLOB_RETENTION_DAYS are deleted, checked every BLOB_GC_INTERVAL seconds.
+BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(BASE_DIR, "blobs"))
+BLOB_THRESHOLD = int(os.getenv("BLOB_THRESHOLD", str(64 * 1024)))
+BLOB_RETENTION_DAYS = float(os.getenv("BLOB_RETENTION_DAYS", "30"))
+BLOB_GC_INTERVAL = float(os.getenv("BLOB_GC_INTERVAL", "3600"))
+
+# X displays (e.g. ":99,:100", one Xvfb each) that get a screen session for
+# Fremen action nodes. A run waits up to SCREEN_LEASE_TIMEOUT seconds for a
+# free session; a single action may take SCREEN_ACTION_TIMEOUT seconds.
+SCREEN_DISPLAYS = [d.strip() for d in os.getenv("SCREEN_DISPLAYS", "").split(",") if d.strip()]
+SCREEN_SESSION_FACTORY = os.getenv("SCREEN_SESSION_FACTORY", "fremen_actions:open_session")
+SCREEN_LEASE_TIMEOUT = float(os.getenv("SCREEN_LEASE_TIMEOUT", "600"))
+SCREEN_ACTION_TIMEOUT = float(os.getenv("SCREEN_ACTION_TIMEOUT", "120"))
@@ -1,6 +1,60 @@
-"""Shared SQLAlchemy database instance."""
+"""Shared SQLAlchemy database instance and SQLite tuning."""
 
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
 # The database object is imported by modules that need database access.
 db = SQLAlchemy()
+
+# Applied to every new SQLite connection when SQLITE_TUNING is enabled.
+# WAL lets readers proceed while a writer commits; synchronous=NORMAL is
+# durable across application crashes in WAL mode and avoids an fsync per
+# commit; busy_timeout makes writers wait for the lock instead of failing.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "foreign_keys": "ON",
+    "cache_size": -16000,  # KiB
+    "temp_store": "MEMORY",
+    "mmap_size": 128 * 1024 * 1024,
+}
+
+# Connection pool for file databases: enough for the request threads plus
+# the run queue workers.
+SQLITE_ENGINE_OPTIONS = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_timeout": 30,
+    "pool_pre_ping": False,
+    "connect_args": {"timeout": 30, "check_same_thread": False},
+}
+
+
+def engine_options(uri: str) -> dict:
+    """Engine options for ``SQLALCHEMY_ENGINE_OPTIONS`` given a database URI."""
+    if not uri.startswith("sqlite") or ":memory:" in uri or uri.rstrip("/") == "sqlite:":
+        return {}
+    return dict(SQLITE_ENGINE_OPTIONS)
+
+
+def init_db(app: Flask) -> None:
+    """Bind ``db`` to ``app`` and install the SQLite pragmas."""
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    options = engine_options(uri)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    db.init_app(app)
+
+    if not uri.startswith("sqlite") or not app.config.get("SQLITE_TUNING", True):
+        return
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
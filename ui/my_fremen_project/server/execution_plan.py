@@ -0,0 +1,161 @@
+"""Compiled execution plans: a workflow's topological order as flat arrays.
+
+A plan is built once, when the graph is saved, and stored on the workflow
+row. Runs look it up by ``(workflow id, version)`` in the app's
+:class:`PlanCache`, so an unchanged workflow is never re-sorted.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+
+from models import Workflow
+
+MAX_CACHED_PLANS = 256
+
+
+class CycleError(ValueError):
+    """The workflow graph is not a DAG."""
+
+    def __init__(self):
+        super().__init__("Cyclic dependency detected in the workflow")
+
+
+class ExecutionPlan:
+    """Nodes in topological order with predecessor and successor positions.
+
+    ``order[i]`` is a node id; ``preds[i]`` and ``succs[i]`` hold positions
+    in ``order``. Predecessors are listed in edge order, which is the order
+    a node receives its inputs.
+    """
+
+    __slots__ = ("order", "preds", "succs", "index")
+
+    def __init__(self, order: list[int], preds: list[list[int]]):
+        self.order = order
+        self.preds = preds
+        self.succs: list[list[int]] = [[] for _ in order]
+        for position, sources in enumerate(preds):
+            for source in sources:
+                self.succs[source].append(position)
+        self.index = {node_id: position for position, node_id in enumerate(order)}
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def predecessors(self, node_id: int) -> list[int]:
+        order = self.order
+        return [order[p] for p in self.preds[self.index[node_id]]]
+
+    def successors(self, node_id: int) -> list[int]:
+        order = self.order
+        return [order[p] for p in self.succs[self.index[node_id]]]
+
+    def to_json(self) -> str:
+        return json.dumps({"order": self.order, "preds": self.preds}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> ExecutionPlan:
+        data = json.loads(text)
+        return cls(data["order"], data["preds"])
+
+
+def compile_plan(node_ids: Iterable[int],
+                 edges: Iterable[tuple[int, int]]) -> ExecutionPlan:
+    """Topologically sort a graph with Kahn's algorithm.
+
+    ``edges`` are ``(source, target)`` pairs in input order; repeated pairs
+    count once. Ties are broken by ``node_ids`` order. Raises
+    :class:`CycleError` for a cyclic graph and ValueError for an edge to an
+    unknown node.
+    """
+    ids = list(node_ids)
+    position = {node_id: i for i, node_id in enumerate(ids)}
+    preds: list[list[int]] = [[] for _ in ids]
+    succs: list[list[int]] = [[] for _ in ids]
+    seen = set()
+    for source, target in edges:
+        if (source, target) in seen:
+            continue
+        seen.add((source, target))
+        try:
+            s, t = position[source], position[target]
+        except KeyError as exc:
+            raise ValueError(f"Edge references unknown node {exc.args[0]!r}") from None
+        preds[t].append(s)
+        succs[s].append(t)
+
+    remaining = [len(p) for p in preds]
+    ready = deque(i for i, count in enumerate(remaining) if count == 0)
+    order: list[int] = []
+    while ready:
+        i = ready.popleft()
+        order.append(i)
+        for t in succs[i]:
+            remaining[t] -= 1
+            if remaining[t] == 0:
+                ready.append(t)
+    if len(order) != len(ids):
+        raise CycleError()
+
+    rank = [0] * len(ids)
+    for r, i in enumerate(order):
+        rank[i] = r
+    return ExecutionPlan([ids[i] for i in order], [[rank[s] for s in preds[i]] for i in order])
+
+
+def plan_for(workflow: Workflow) -> ExecutionPlan:
+    """Return the plan stored on the workflow, compiling it if there is none.
+
+    Workflows saved before plans were stored have none.
+    """
+    if workflow.plan:
+        return ExecutionPlan.from_json(workflow.plan)
+    edges = sorted(workflow.edges, key=lambda edge: edge.id)
+    return compile_plan(
+        sorted(node.id for node in workflow.nodes),
+        ((edge.source_node_id, edge.target_node_id) for edge in edges),
+    )
+
+
+class PlanCache:
+    """LRU of execution plans keyed by ``(workflow_id, version)``."""
+
+    def __init__(self, max_size: int = MAX_CACHED_PLANS):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[int, int], ExecutionPlan] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.compiles = 0
+
+    def get(self, workflow: Workflow) -> ExecutionPlan:
+        """Return the workflow's plan: cached, stored on the row, or compiled."""
+        key = (workflow.id, workflow.version)
+        with self._lock:
+            plan = self._entries.get(key)
+            if plan is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return plan
+
+        counter = "loads" if workflow.plan else "compiles"
+        plan = plan_for(workflow)
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self._entries[key] = plan
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size,
+                    "hits": self.hits, "loads": self.loads, "compiles": self.compiles}
@@ -0,0 +1,154 @@
+"""Fremen browser actions offered as built-in workflow nodes.
+
+A node without a node type whose config names an ``"action"`` runs that
+action instead of user code, e.g.::
+
+    {"action": "fill", "template": "search_box", "text": "{0}"}
+
+The other config keys are the action's parameters. Text parameters are
+formatted with the node's inputs, so ``"{0}"`` is the first input's value.
+Actions run in a screen session (see :mod:`screen_sessions`), a process
+bound to one display that keeps its ``Fremen`` and template cache between
+runs. This module is imported by the server only for the catalog; ``fremen``
+itself is imported in the session processes.
+"""
+
+from __future__ import annotations
+
+import inspect
+import time
+
+REQUIRED = inspect.Parameter.empty
+
+
+class ActionError(Exception):
+    """An action could not be carried out on the screen."""
+
+
+def _format(text: str, inputs: list) -> str:
+    try:
+        return text.format(*inputs)
+    except (IndexError, KeyError) as exc:
+        raise ActionError(f"{text!r} refers to a missing input {exc}") from None
+
+
+def locate(fremen, inputs: list, template: str, confidence: float = 0.9):
+    """Return the box of ``template`` on screen, or None if it is not shown."""
+    box = fremen.locate_on_screen(template, confidence)
+    if box is None:
+        return None
+    left, top, width, height = box
+    return {"left": int(left), "top": int(top), "width": int(width), "height": int(height)}
+
+
+def click(fremen, inputs: list, template: str, confidence: float = 0.9, wait: float = 0.0):
+    """Click ``template``; fails if it is not on screen."""
+    if not fremen.click(template, confidence):
+        raise ActionError(f"{template} not found on screen")
+    if wait:
+        time.sleep(wait)
+    return True
+
+
+def fill(fremen, inputs: list, template: str, text: str = "{0}", confidence: float = 0.8,
+         clear: bool = True, interval: float = 0.05):
+    """Click the field ``template`` and type ``text`` into it."""
+    if not fremen.click(template, confidence):
+        raise ActionError(f"{template} not found on screen")
+    value = _format(text, inputs)
+    fremen.type_text(value, interval=interval, clear=clear)
+    return value
+
+
+def open_url(fremen, inputs: list, url: str = "{0}", ready: str | None = None,
+             timeout: float = 30.0):
+    """Open ``url`` in the focused tab and wait for the ``ready`` template, if given."""
+    address = _format(url, inputs)
+    fremen.open_url(address)
+    if ready and not fremen.wait_until_ready(ready, timeout):
+        raise ActionError(f"{ready} did not appear within {timeout:g}s of opening {address}")
+    return address
+
+
+def capture_text(fremen, inputs: list):
+    """Return the text of the page through select-all and the clipboard."""
+    return fremen.select_all_and_return()
+
+
+def ask(fremen, inputs: list, prompt: str = "{0}", model: str = "llama3.1:8b"):
+    """Return the model's answer to ``prompt``."""
+    from fremen import llm
+    return fremen.ask(model=model, question=_format(prompt, inputs), priority=llm.NORMAL)
+
+
+ACTIONS = {func.__name__: func for func in (locate, click, fill, open_url, capture_text, ask)}
+
+
+def _parameters(name: str) -> dict[str, inspect.Parameter]:
+    params = inspect.signature(ACTIONS[name]).parameters
+    return {key: param for key, param in params.items() if key not in ("fremen", "inputs")}
+
+
+def describe_actions() -> list[dict]:
+    """Name, description and parameters (with defaults) of every action."""
+    return [
+        {
+            "name": name,
+            "description": inspect.getdoc(func),
+            "params": {
+                key: {"required": param.default is REQUIRED,
+                      "default": None if param.default is REQUIRED else param.default}
+                for key, param in _parameters(name).items()
+            },
+        }
+        for name, func in ACTIONS.items()
+    ]
+
+
+def action_call(config: dict) -> tuple[str, dict] | None:
+    """Return ``(action, params)`` of a node config, None if it names no action.
+
+    Raises ValueError for an unknown action or unknown or missing parameters.
+    """
+    name = config.get("action")
+    if name is None:
+        return None
+    if name not in ACTIONS:
+        raise ValueError(f"Unknown Fremen action {name!r}")
+    params = {key: value for key, value in config.items() if key != "action"}
+    expected = _parameters(name)
+    unknown = sorted(set(params) - set(expected))
+    if unknown:
+        raise ValueError(f"Unknown parameters for {name}: {', '.join(unknown)}")
+    missing = [key for key, param in expected.items()
+               if param.default is REQUIRED and key not in params]
+    if missing:
+        raise ValueError(f"Missing parameters for {name}: {', '.join(missing)}")
+    return name, params
+
+
+class ActionSession:
+    """Runs actions against one ``Fremen``."""
+
+    def __init__(self, fremen):
+        self.fremen = fremen
+
+    def run(self, name: str, inputs: list, params: dict):
+        return ACTIONS[name](self.fremen, inputs, **params)
+
+
+def open_session(display: str | None) -> ActionSession:
+    """Create the session of a screen process; ``DISPLAY`` is already set.
+
+    Captures from ``display`` and loads the template registry once, so later
+    actions find templates without reading images again.
+    """
+    from fremen import Fremen, core
+    from fremen.capture import open_capture
+    from fremen.pacing import Pacer
+    from fremen.templates import TemplateRegistry
+
+    fremen = Fremen(capture=open_capture(display), templates=TemplateRegistry(), pacer=Pacer())
+    if core.gw is not None:  # window activation is not available on every platform
+        fremen.activate_chrome()
+    return ActionSession(fremen)
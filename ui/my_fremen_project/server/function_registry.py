@@ -1,7 +1,18 @@
 """Utilities for compiling user provided node functions."""
 
+import hashlib
+import os
+import threading
+from collections import OrderedDict
 from types import FunctionType
 
+from sqlalchemy import event
+
+from models import NodeType
+
+# Upper bound on compiled node functions kept per worker process.
+MAX_CACHED_FUNCTIONS = 256
+
 
 def compile_node_type_code(code_string: str) -> FunctionType:
     """Compile code defining a `run` function and return the callable."""
@@ -11,3 +22,105 @@ def compile_node_type_code(code_string: str) -> FunctionType:
     if func is None or not isinstance(func, FunctionType):
         raise ValueError("No 'run' function found in the provided code")
     return func
+
+
+def code_hash(code_string: str) -> str:
+    """Return a stable digest identifying a node type's source code."""
+    return hashlib.sha256(code_string.encode("utf-8")).hexdigest()
+
+
+class CompiledFunctionCache:
+    """Process-wide LRU cache of compiled node functions.
+
+    Entries are keyed by ``(node_type_id, code_hash)`` so an edited node type
+    can never be served from a stale entry, and the cache is shared by every
+    request handled in the worker process.
+    """
+
+    def __init__(self, max_size: int = MAX_CACHED_FUNCTIONS):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[int, str], FunctionType] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.compiles = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, node_type_id: int, code_string: str) -> FunctionType:
+        """Return the compiled `run` function, compiling it on a miss."""
+        key = (node_type_id, code_hash(code_string))
+        with self._lock:
+            func = self._entries.get(key)
+            if func is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return func
+            self.misses += 1
+
+        # Compile outside the lock so a slow snippet does not block others.
+        func = compile_node_type_code(code_string)
+        with self._lock:
+            self.compiles += 1
+            self._entries[key] = func
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return func
+
+    def invalidate(self, node_type_id: int) -> None:
+        """Drop every compiled version of a node type."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == node_type_id]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _after_fork(self) -> None:
+        # A lock held by another thread at fork time would never be released
+        # in the child, and the child's counters count only its own lookups.
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.compiles = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict[str, int]:
+        """Counters exposed through the ``/node_types/cache`` endpoint."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "compiles": self.compiles,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by all requests served by this worker process.
+node_function_cache = CompiledFunctionCache()
+
+# Sandbox workers are forked from a threaded server.
+os.register_at_fork(after_in_child=node_function_cache._after_fork)
+
+
+def combined_stats(reports: list[dict]) -> dict[str, int]:
+    """Sum the :meth:`CompiledFunctionCache.stats` of several processes."""
+    names = ("size", "hits", "misses", "compiles", "evictions", "invalidations")
+    combined = {name: sum(report[name] for report in reports) for name in names}
+    combined["workers"] = len(reports)
+    return combined
+
+
+def get_node_function(node_type: NodeType) -> FunctionType:
+    """Return the compiled `run` function for a NodeType, using the cache."""
+    return node_function_cache.get(node_type.id, node_type.code)
+
+
+@event.listens_for(NodeType, "after_update")
+@event.listens_for(NodeType, "after_delete")
+def _invalidate_node_type(mapper, connection, target: NodeType) -> None:
+    node_function_cache.invalidate(target.id)
@@ -0,0 +1,137 @@
+"""ETags, conditional GET and a small in-process response cache."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from flask import Response, current_app, jsonify, request
+
+from queries import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+MAX_CACHED_RESPONSES = 512
+
+# Writes in another server process cannot invalidate this process's cache,
+# so entries also expire after a few seconds.
+CACHE_TTL = 5.0
+
+
+def etag_for(*parts) -> str:
+    """Return a strong ETag (unquoted) built from ``parts``."""
+    return hashlib.sha1("/".join(str(p) for p in parts).encode()).hexdigest()[:20]
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status=304, headers={"Cache-Control": "private, no-cache"})
+    response.set_etag(etag)
+    return response
+
+
+def json_response(body: bytes, etag: str | None = None, status: int = 200,
+                  headers: dict | None = None) -> Response:
+    """Return ``body`` as JSON, or 304 if the client already has ``etag``.
+
+    Without an explicit ``etag`` one is derived from the body itself.
+    """
+    if etag is None:
+        etag = etag_for(hashlib.sha1(body).hexdigest())
+    if etag in request.if_none_match:
+        return not_modified(etag)
+    response_headers = {"Cache-Control": "private, no-cache"}
+    response_headers.update(headers or {})
+    response = Response(body, status=status, mimetype="application/json",
+                        headers=response_headers)
+    response.set_etag(etag)
+    return response
+
+
+def cached_listing(kind: str, user_id: int, load, serialize) -> Response:
+    """Serve one page of a listing, through the app's response cache.
+
+    Query parameters: ``limit`` (page size), ``cursor`` (from the previous
+    page's ``X-Next-Cursor`` header), ``q`` (name substring) and ``public``
+    (``true``/``false``). The body stays a plain JSON array; the next page
+    is advertised in ``X-Next-Cursor`` and a ``Link`` header.
+    """
+    args = request.args
+    limit = args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+    cursor = args.get("cursor")
+    name = args.get("q")
+    public = args.get("public")
+    if public is not None:
+        public = public.lower() in ("1", "true", "yes")
+
+    cache = current_app.extensions["response_cache"]
+    key = (kind, user_id, limit, cursor, name, public)
+    cached = cache.get(key)
+    if cached is None:
+        try:
+            rows, next_cursor = load(user_id, limit, cursor, name, public)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        body = json.dumps([serialize(row) for row in rows]).encode()
+        cached = (body, next_cursor)
+        cache.put(key, cached)
+    body, next_cursor = cached
+
+    headers = {}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+        params = {**args.to_dict(), "cursor": next_cursor, "limit": limit}
+        headers["Link"] = f'<{request.base_url}?{urlencode(params)}>; rel="next"'
+    return json_response(body, headers=headers)
+
+
+class ResponseCache:
+    """LRU of serialized response bodies grouped by resource kind.
+
+    Keys are tuples whose first item is the kind (``"workflows"``,
+    ``"node_types"``); writes call :meth:`invalidate` with the kind they
+    touched.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESPONSES, ttl: float = CACHE_TTL,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._clock() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, kind: str) -> None:
+        """Drop every cached response of ``kind``."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == kind]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
@@ -7,33 +7,118 @@ from config import (
     SECRET_KEY,
     SQLALCHEMY_DATABASE_URI,
     SQLALCHEMY_TRACK_MODIFICATIONS,
+    SQLITE_TUNING,
+    WORKFLOW_POOL,
+    WORKFLOW_POOL_SIZE,
+    SANDBOX_TIMEOUT,
+    SANDBOX_MEMORY_MB,
+    RUN_WORKERS,
+    RUNS_PER_USER,
+    OUTPUT_CACHE_ENTRIES,
+    OUTPUT_CACHE_BYTES,
+    BLOB_DIR,
+    BLOB_THRESHOLD,
+    BLOB_RETENTION_DAYS,
+    BLOB_GC_INTERVAL,
+    SCREEN_DISPLAYS,
+    SCREEN_SESSION_FACTORY,
+    SCREEN_LEASE_TIMEOUT,
+    SCREEN_ACTION_TIMEOUT,
 )
-from database import db
+from database import db, init_db
+from migrations import upgrade
 from models import *  # Import models so SQLAlchemy registers them
 from auth_routes import auth_bp
 from node_routes import node_bp
 from workflow_routes import workflow_bp
+from run_routes import run_bp
+from stats_routes import stats_bp
+from run_queue import RunQueue
+from output_cache import NodeOutputCache
+from execution_plan import PlanCache
+from blob_store import BlobStore
+from screen_sessions import ScreenSessionPool
+from http_cache import ResponseCache
 
 
-def create_app() -> Flask:
-    """Create and configure the Flask application."""
+def create_app(config: dict | None = None) -> Flask:
+    """Create and configure the Flask application.
+
+    ``config`` overrides individual settings, e.g. a throwaway database URI
+    for tests and benchmarks.
+    """
     app = Flask(__name__)
     app.secret_key = SECRET_KEY
     app.config["SQLALCHEMY_DATABASE_URI"] = SQLALCHEMY_DATABASE_URI
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = SQLALCHEMY_TRACK_MODIFICATIONS
+    app.config["SQLITE_TUNING"] = SQLITE_TUNING
+    app.config["WORKFLOW_POOL"] = WORKFLOW_POOL
+    app.config["WORKFLOW_POOL_SIZE"] = WORKFLOW_POOL_SIZE
+    app.config["SANDBOX_TIMEOUT"] = SANDBOX_TIMEOUT
+    app.config["SANDBOX_MEMORY_MB"] = SANDBOX_MEMORY_MB
+    app.config["RUN_WORKERS"] = RUN_WORKERS
+    app.config["RUNS_PER_USER"] = RUNS_PER_USER
+    app.config["OUTPUT_CACHE_ENTRIES"] = OUTPUT_CACHE_ENTRIES
+    app.config["OUTPUT_CACHE_BYTES"] = OUTPUT_CACHE_BYTES
+    app.config["BLOB_DIR"] = BLOB_DIR
+    app.config["BLOB_THRESHOLD"] = BLOB_THRESHOLD
+    app.config["BLOB_RETENTION_DAYS"] = BLOB_RETENTION_DAYS
+    app.config["BLOB_GC_INTERVAL"] = BLOB_GC_INTERVAL
+    app.config["SCREEN_DISPLAYS"] = SCREEN_DISPLAYS
+    app.config["SCREEN_SESSION_FACTORY"] = SCREEN_SESSION_FACTORY
+    app.config["SCREEN_LEASE_TIMEOUT"] = SCREEN_LEASE_TIMEOUT
+    app.config["SCREEN_ACTION_TIMEOUT"] = SCREEN_ACTION_TIMEOUT
+    if config:
+        app.config.update(config)
 
-    # Initialize and create the database
-    db.init_app(app)
+    # Initialize the database and apply pending schema migrations
+    init_db(app)
     with app.app_context():
-        db.create_all()
+        upgrade(db.engine, db.metadata)
+
+    # Serialized GET responses, invalidated by writes.
+    app.extensions["response_cache"] = ResponseCache()
+    # Outputs memoized across runs so re-runs only execute changed nodes.
+    app.extensions["node_output_cache"] = NodeOutputCache(
+        app.config["OUTPUT_CACHE_ENTRIES"], app.config["OUTPUT_CACHE_BYTES"]
+    )
+    # Execution plans by (workflow id, version), reused until the next save.
+    app.extensions["plan_cache"] = PlanCache()
+    # Large run outputs, served by /runs/<id>/blobs/<digest>.
+    app.extensions["blob_store"] = BlobStore(
+        app.config["BLOB_DIR"], app.config["BLOB_THRESHOLD"]
+    )
+    # Screen sessions for Fremen action nodes, started on first use.
+    app.extensions["screen_sessions"] = None
+    if app.config["SCREEN_DISPLAYS"]:
+        app.extensions["screen_sessions"] = ScreenSessionPool(
+            app.config["SCREEN_DISPLAYS"],
+            factory=app.config["SCREEN_SESSION_FACTORY"],
+            action_timeout=app.config["SCREEN_ACTION_TIMEOUT"],
+            lease_timeout=app.config["SCREEN_LEASE_TIMEOUT"],
+        )
+    # Runs execute on background threads; workers start with the first run,
+    # or now if the previous server left runs behind.
+    app.extensions["run_queue"] = RunQueue(
+        app,
+        workers=app.config["RUN_WORKERS"],
+        per_user=app.config["RUNS_PER_USER"],
+        output_cache=app.extensions["node_output_cache"],
+        plan_cache=app.extensions["plan_cache"],
+        blob_store=app.extensions["blob_store"],
+        screen_sessions=app.extensions["screen_sessions"],
+    )
+    app.extensions["run_queue"].resume()
 
     # Enable CORS for all routes
-    CORS(app, supports_credentials=True)
+    CORS(app, supports_credentials=True, expose_headers=["ETag", "Link", "X-Next-Cursor"])
 
     # Register API blueprints
     app.register_blueprint(auth_bp, url_prefix="/api")
     app.register_blueprint(node_bp, url_prefix="/api")
     app.register_blueprint(workflow_bp, url_prefix="/api")
+    app.register_blueprint(run_bp, url_prefix="/api")
+    app.register_blueprint(stats_bp, url_prefix="/api")
 
     return app
 
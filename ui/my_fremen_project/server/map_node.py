@@ -0,0 +1,188 @@
+"""Fan-out of one node type over the elements of a list input.
+
+A node whose config has a ``"map"`` object does not call its ``run`` once:
+the list in one of its inputs is split into chunks, ``run`` is called once
+per element with that element in the list's place, and the results are
+gathered in element order::
+
+    {"map": {"input": 0, "chunk_size": 10, "concurrency": 4,
+             "retries": 2, "retry_delay": 1.0, "on_error": "report"},
+     "court": "supreme"}
+
+Each element call gets the node's config without the ``"map"`` key. A chunk
+is one task for the run's worker pool, so the sandbox is crossed once per
+``chunk_size`` elements, and at most ``concurrency`` chunks are in flight.
+A failing element is retried up to ``retries`` times without affecting the
+others. Once every element has been attempted, ``on_error`` decides:
+``"raise"`` (the default) fails the node with a :class:`MapError` listing
+the failures; ``"report"`` makes the node's output
+``{"results": [...], "errors": [{"index", "error", "attempts"}, ...]}`` with
+None in place of each failed element.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+
+from function_registry import node_function_cache
+from streams import chunked
+
+MAP_KEY = "map"
+ON_ERROR = ("raise", "report")
+
+# Errors listed in a MapError message; the rest are counted.
+MAX_REPORTED_ERRORS = 5
+
+
+class MapError(RuntimeError):
+    """Elements of a map node still failed after their retries."""
+
+    def __init__(self, errors: list[dict], total: int):
+        self.errors = errors
+        shown = "; ".join(f"[{e['index']}] {e['error']}" for e in errors[:MAX_REPORTED_ERRORS])
+        more = len(errors) - MAX_REPORTED_ERRORS
+        suffix = f"; and {more} more" if more > 0 else ""
+        super().__init__(f"{len(errors)} of {total} elements failed: {shown}{suffix}")
+
+
+class MapSpec:
+    """Validated ``"map"`` settings of a node."""
+
+    __slots__ = ("input", "chunk_size", "concurrency", "retries", "retry_delay", "on_error")
+
+    def __init__(self, input: int = 0, chunk_size: int = 1, concurrency: int = 4,
+                 retries: int = 0, retry_delay: float = 0.0, on_error: str = "raise"):
+        for name, value, least in (("input", input, 0), ("chunk_size", chunk_size, 1),
+                                   ("concurrency", concurrency, 1), ("retries", retries, 0)):
+            if not isinstance(value, int) or isinstance(value, bool) or value < least:
+                raise ValueError(f"map.{name} must be an integer of at least {least}")
+        if not isinstance(retry_delay, (int, float)) or retry_delay < 0:
+            raise ValueError("map.retry_delay must be a non-negative number")
+        if on_error not in ON_ERROR:
+            raise ValueError(f"map.on_error must be one of {', '.join(ON_ERROR)}")
+        self.input = input
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_delay = float(retry_delay)
+        self.on_error = on_error
+
+    @classmethod
+    def from_config(cls, config: dict) -> MapSpec | None:
+        """Return the spec in a node's config, None if it is not a map node."""
+        settings = config.get(MAP_KEY)
+        if settings is None:
+            return None
+        if not isinstance(settings, dict):
+            raise ValueError("map must be an object")
+        try:
+            return cls(**settings)
+        except TypeError:
+            unknown = sorted(set(settings) - set(cls.__slots__))
+            raise ValueError(f"Unknown map settings: {', '.join(unknown)}") from None
+
+
+def map_chunk(func, chunk: list[tuple[int, object]], inputs: list, position: int,
+              config: dict, retries: int, retry_delay: float) -> tuple[list, dict]:
+    """Call ``func`` for each ``(index, element)`` of ``chunk``.
+
+    Returns ``(index, ok, output or error text, attempts)`` per element and
+    the CPU seconds used.
+    """
+    cpu = time.thread_time()
+    results = []
+    for index, element in chunk:
+        element_inputs = list(inputs)
+        element_inputs[position] = element
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                results.append((index, True, func(element_inputs, config), attempts))
+                break
+            except Exception as exc:
+                if attempts > retries:
+                    results.append((index, False, f"{type(exc).__name__}: {exc}", attempts))
+                    break
+                if retry_delay:
+                    time.sleep(retry_delay * 2 ** (attempts - 1))
+    return results, {"cpu": time.thread_time() - cpu}
+
+
+def _map_chunk_in_process(node_type_id: int, code: str, *args) -> tuple[list, dict]:
+    return map_chunk(node_function_cache.get(node_type_id, code), *args)
+
+
+def _call_map(pool: Executor | None, chunk_call: tuple, spec: MapSpec, inputs: list,
+              config: dict) -> tuple[object, float, float, dict]:
+    """Run a map node; the result has the shape of ``_call_timed``'s.
+
+    ``chunk_call`` is ``(function, *leading arguments)`` completing to a
+    :func:`map_chunk` call. Chunks go to ``pool`` (a process or sandbox
+    pool), or to threads of this call's own if it is None.
+    """
+    start = time.perf_counter()
+    if spec.input >= len(inputs):
+        raise ValueError(f"map.input is {spec.input} but the node has {len(inputs)} inputs")
+    items = inputs[spec.input]
+    if items is None or isinstance(items, (str, bytes, dict)):
+        raise TypeError(f"Map input {spec.input} must be a list, not {type(items).__name__}")
+    items = list(items)
+    config = {key: value for key, value in config.items() if key != MAP_KEY}
+    # The mapped input is replaced per element; don't ship the list with every chunk.
+    shared = list(inputs)
+    shared[spec.input] = None
+    fn, *leading = chunk_call
+    chunks = iter(chunked(enumerate(items), spec.chunk_size))
+
+    results: list = [None] * len(items)
+    errors: list[dict] = []
+    usage = {"cpu": 0.0}
+    local = ThreadPoolExecutor(spec.concurrency, thread_name_prefix="workflow-map") \
+        if pool is None else None
+    executor = local or pool
+    running = {}
+
+    def fill() -> None:
+        while len(running) < spec.concurrency:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            future = executor.submit(fn, *leading, chunk, shared, spec.input, config,
+                                     spec.retries, spec.retry_delay)
+            running[future] = chunk
+
+    try:
+        fill()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = running.pop(future)
+                try:
+                    outcomes, chunk_usage = future.result()
+                except Exception as exc:
+                    # The worker died or timed out: the whole chunk failed.
+                    message = f"{type(exc).__name__}: {exc}"
+                    outcomes, chunk_usage = [(i, False, message, 1) for i, _ in chunk], {}
+                usage["cpu"] += chunk_usage.get("cpu", 0.0)
+                for index, ok, value, attempts in outcomes:
+                    if ok:
+                        results[index] = value
+                    else:
+                        errors.append({"index": index, "error": value, "attempts": attempts})
+            fill()
+    finally:
+        for future in running:
+            future.cancel()
+        if local is not None:
+            local.shutdown(wait=False)
+
+    errors.sort(key=lambda error: error["index"])
+    if spec.on_error == "report":
+        output = {"results": results, "errors": errors}
+    elif errors:
+        raise MapError(errors, len(items))
+    else:
+        output = results
+    return output, start, time.perf_counter(), usage
@@ -0,0 +1,161 @@
+"""Versioned schema migrations tracked in SQLite's ``PRAGMA user_version``.
+
+A fresh database is created from the models and stamped with the latest
+version. An existing one gets every migration above its stored version
+applied in order, the version being bumped after each. SQLite commits DDL
+as it goes, so migrations are written to be idempotent: one interrupted
+halfway is simply run again, and databases created by development builds
+may already contain some of the objects they add.
+
+To change the schema, update the model and append a migration to
+``MIGRATIONS``; never edit one that has shipped.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+
+def _columns(conn: Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(text(f'PRAGMA table_info("{table}")'))}
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """``ALTER TABLE ... ADD COLUMN`` unless the column already exists."""
+    if column not in _columns(conn, table):
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {ddl}'))
+
+
+def create_index(conn: Connection, table: str, *columns: str) -> None:
+    name = f"ix_{table}_{'_'.join(columns)}"
+    cols = ", ".join(f'"{c}"' for c in columns)
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({cols})'))
+
+
+def _workflow_parallelism(conn: Connection) -> None:
+    add_column(conn, "workflows", "max_parallelism", "INTEGER")
+
+
+def _workflow_runs(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS workflow_runs (
+            id INTEGER NOT NULL PRIMARY KEY,
+            workflow_id INTEGER NOT NULL REFERENCES workflows (id),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            status VARCHAR(20) NOT NULL,
+            max_parallelism INTEGER,
+            pool VARCHAR(20),
+            cancel_requested BOOLEAN,
+            worker_pid INTEGER,
+            created_at FLOAT NOT NULL,
+            started_at FLOAT,
+            finished_at FLOAT,
+            result TEXT,
+            timings TEXT,
+            error TEXT
+        )
+    """))
+    create_index(conn, "workflow_runs", "status")
+
+
+def _memoized_outputs(conn: Connection) -> None:
+    add_column(conn, "workflow_runs", "force", "BOOLEAN")
+    add_column(conn, "workflow_runs", "reused", "TEXT")
+
+
+def _row_versions(conn: Connection) -> None:
+    add_column(conn, "workflows", "version", "INTEGER NOT NULL DEFAULT 1")
+    add_column(conn, "node_types", "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+def _lookup_indexes(conn: Connection) -> None:
+    create_index(conn, "workflows", "user_id")
+    create_index(conn, "workflows", "is_public")
+    create_index(conn, "node_types", "user_id")
+    create_index(conn, "node_types", "is_public")
+    create_index(conn, "workflow_nodes", "workflow_id")
+    create_index(conn, "workflow_edges", "workflow_id")
+    create_index(conn, "workflow_edges", "source_node_id")
+    create_index(conn, "workflow_edges", "target_node_id")
+    create_index(conn, "workflow_runs", "workflow_id")
+    create_index(conn, "workflow_runs", "user_id")
+
+
+def _execution_plans(conn: Connection) -> None:
+    add_column(conn, "workflows", "plan", "TEXT")
+
+
+def _run_blobs(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS run_blobs (
+            run_id INTEGER NOT NULL REFERENCES workflow_runs (id),
+            digest VARCHAR(64) NOT NULL,
+            PRIMARY KEY (run_id, digest)
+        )
+    """))
+    create_index(conn, "run_blobs", "digest")
+
+
+def _node_runs(conn: Connection) -> None:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS node_runs (
+            id INTEGER NOT NULL PRIMARY KEY,
+            run_id INTEGER NOT NULL REFERENCES workflow_runs (id),
+            workflow_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            node_id INTEGER NOT NULL,
+            node_type_id INTEGER,
+            started_at FLOAT NOT NULL,
+            wall_time FLOAT NOT NULL,
+            cpu_time FLOAT,
+            peak_memory INTEGER,
+            input_bytes INTEGER,
+            output_bytes INTEGER,
+            reused BOOLEAN NOT NULL,
+            error TEXT
+        )
+    """))
+    for column in ("run_id", "workflow_id", "user_id", "node_type_id"):
+        create_index(conn, "node_runs", column)
+
+
+# (version, description, upgrade). Version N is reached by applying 1..N.
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "workflows.max_parallelism", _workflow_parallelism),
+    (2, "workflow_runs table", _workflow_runs),
+    (3, "workflow_runs.force and reused", _memoized_outputs),
+    (4, "workflows.version and node_types.version", _row_versions),
+    (5, "indexes for listing, loading and run queries", _lookup_indexes),
+    (6, "workflows.plan", _execution_plans),
+    (7, "run_blobs table", _run_blobs),
+    (8, "node_runs table", _node_runs),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def upgrade(engine: Engine, metadata) -> list[int]:
+    """Bring the database up to date; return the migration versions applied."""
+    with engine.begin() as conn:
+        fresh = not inspect(conn).get_table_names()
+        if fresh:
+            metadata.create_all(conn)
+            conn.execute(text(f"PRAGMA user_version = {LATEST_VERSION}"))
+            return []
+
+    applied = []
+    for version, _description, migrate in MIGRATIONS:
+        with engine.begin() as conn:
+            if schema_version(conn) >= version:
+                continue
+            migrate(conn)
+            conn.execute(text(f"PRAGMA user_version = {version}"))
+        applied.append(version)
+    return applied
@@ -24,10 +24,12 @@ class NodeType(db.Model):
     __tablename__ = "node_types"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     code = db.Column(db.Text, nullable=False)
-    is_public = db.Column(db.Boolean, default=False)
+    is_public = db.Column(db.Boolean, default=False, index=True)
+    # Incremented on every update; used for ETags.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     owner = db.relationship("User", back_populates="node_types")
 
@@ -40,9 +42,15 @@ class Workflow(db.Model):
     __tablename__ = "workflows"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
-    is_public = db.Column(db.Boolean, default=False)
+    is_public = db.Column(db.Boolean, default=False, index=True)
+    # Nodes allowed to run at once; None or 1 runs nodes one after another.
+    max_parallelism = db.Column(db.Integer, nullable=True)
+    # Incremented on every save; clients send it back for optimistic locking.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # ExecutionPlan JSON written with the graph; loaded only when a run needs it.
+    plan = db.deferred(db.Column(db.Text, nullable=True))
 
     owner = db.relationship("User", back_populates="workflows")
     nodes = db.relationship(
@@ -65,7 +73,9 @@ class WorkflowNode(db.Model):
     __tablename__ = "workflow_nodes"
 
     id = db.Column(db.Integer, primary_key=True)
-    workflow_id = db.Column(db.Integer, db.ForeignKey("workflows.id"), nullable=False)
+    workflow_id = db.Column(
+        db.Integer, db.ForeignKey("workflows.id"), nullable=False, index=True
+    )
     node_type_id = db.Column(db.Integer, db.ForeignKey("node_types.id"), nullable=True)
     x = db.Column(db.Float, default=0.0)
     y = db.Column(db.Float, default=0.0)
@@ -84,12 +94,14 @@ class WorkflowEdge(db.Model):
     __tablename__ = "workflow_edges"
 
     id = db.Column(db.Integer, primary_key=True)
-    workflow_id = db.Column(db.Integer, db.ForeignKey("workflows.id"), nullable=False)
+    workflow_id = db.Column(
+        db.Integer, db.ForeignKey("workflows.id"), nullable=False, index=True
+    )
     source_node_id = db.Column(
-        db.Integer, db.ForeignKey("workflow_nodes.id"), nullable=False
+        db.Integer, db.ForeignKey("workflow_nodes.id"), nullable=False, index=True
     )
     target_node_id = db.Column(
-        db.Integer, db.ForeignKey("workflow_nodes.id"), nullable=False
+        db.Integer, db.ForeignKey("workflow_nodes.id"), nullable=False, index=True
     )
     label = db.Column(db.String(50), nullable=True)
 
@@ -98,3 +110,62 @@ class WorkflowEdge(db.Model):
     def __repr__(self) -> str:
         return f"<WorkflowEdge {self.source_node_id}->{self.target_node_id}>"
 
+
+class WorkflowRun(db.Model):
+    """Queued or finished execution of a workflow."""
+    __tablename__ = "workflow_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    workflow_id = db.Column(
+        db.Integer, db.ForeignKey("workflows.id"), nullable=False, index=True
+    )
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    # queued, running, succeeded, failed or cancelled
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    max_parallelism = db.Column(db.Integer, nullable=True)
+    pool = db.Column(db.String(20), nullable=True)
+    # Recompute every node instead of reusing memoized outputs.
+    force = db.Column(db.Boolean, default=False)
+    cancel_requested = db.Column(db.Boolean, default=False)
+    # pid of the server process executing the run
+    worker_pid = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.Float, nullable=False)
+    started_at = db.Column(db.Float, nullable=True)
+    finished_at = db.Column(db.Float, nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON {node_id: output}
+    timings = db.Column(db.Text, nullable=True)  # JSON {node_id: {start, end}}
+    reused = db.Column(db.Text, nullable=True)  # JSON [node_id] served from cache
+    error = db.Column(db.Text, nullable=True)
+
+    workflow = db.relationship("Workflow")
+
+    def __repr__(self) -> str:
+        return f"<WorkflowRun {self.id} {self.status}>"
+
+
+class RunBlob(db.Model):
+    """A blob in the blob store referenced by a run's result."""
+    __tablename__ = "run_blobs"
+
+    run_id = db.Column(db.Integer, db.ForeignKey("workflow_runs.id"), primary_key=True)
+    digest = db.Column(db.String(64), primary_key=True, index=True)
+
+
+class NodeRun(db.Model):
+    """Telemetry of one node in one workflow run."""
+    __tablename__ = "node_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("workflow_runs.id"), nullable=False, index=True)
+    workflow_id = db.Column(db.Integer, nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    node_id = db.Column(db.Integer, nullable=False)
+    node_type_id = db.Column(db.Integer, nullable=True, index=True)
+    started_at = db.Column(db.Float, nullable=False)  # epoch seconds
+    wall_time = db.Column(db.Float, nullable=False)  # seconds
+    cpu_time = db.Column(db.Float, nullable=True)  # seconds
+    peak_memory = db.Column(db.Integer, nullable=True)  # bytes
+    input_bytes = db.Column(db.Integer, nullable=True)
+    output_bytes = db.Column(db.Integer, nullable=True)
+    reused = db.Column(db.Boolean, nullable=False, default=False)
+    error = db.Column(db.Text, nullable=True)
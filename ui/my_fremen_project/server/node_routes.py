@@ -1,8 +1,15 @@
 """API endpoints for managing custom node types."""
 
-from flask import Blueprint, request, jsonify, session
+import json
+
+from flask import Blueprint, current_app, request, jsonify, session
 from database import db
 from models import NodeType
+from fremen_actions import describe_actions
+from function_registry import combined_stats, node_function_cache
+from http_cache import cached_listing, etag_for, json_response
+from queries import visible_node_types
+from workflow_executor import sandbox_reports
 
 # Blueprint grouping node related endpoints
 node_bp = Blueprint("nodes", __name__)
@@ -10,21 +17,62 @@ node_bp = Blueprint("nodes", __name__)
 
 @node_bp.route("/node_types", methods=["GET"])
 def get_node_types():
-    """Return node types accessible to the current user."""
+    """Return one page of the node types accessible to the current user."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return cached_listing(
+        "node_types",
+        user_id,
+        visible_node_types,
+        lambda nt: {"id": nt.id, "name": nt.name, "is_public": nt.is_public},
+    )
+
+
+@node_bp.route("/actions", methods=["GET"])
+def get_actions():
+    """Return the built-in Fremen actions and their parameters."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(describe_actions()), 200
+
+
+@node_bp.route("/actions/sessions", methods=["GET"])
+def get_screen_sessions():
+    """Return lease counts and wait time of the screen sessions running actions."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+    sessions = current_app.extensions["screen_sessions"]
+    if sessions is None:
+        return jsonify({"size": 0, "sessions": []}), 200
+    return jsonify(sessions.stats()), 200
+
+
+@node_bp.route("/node_types/<int:node_type_id>", methods=["GET"])
+def get_node_type(node_type_id: int):
+    """Return a node type including its code, with a version-based ETag."""
     user_id = session.get("user_id")
     if not user_id:
         return jsonify({"error": "Unauthorized"}), 401
 
-    public_node_types = NodeType.query.filter_by(is_public=True).all()
-    private_node_types = NodeType.query.filter_by(
-        user_id=user_id, is_public=False
-    ).all()
+    node_type = db.session.get(NodeType, node_type_id)
+    if not node_type:
+        return jsonify({"error": "Node type not found"}), 404
+    if node_type.user_id != user_id and not node_type.is_public:
+        return jsonify({"error": "Forbidden"}), 403
 
-    result = [
-        {"id": nt.id, "name": nt.name, "is_public": nt.is_public}
-        for nt in public_node_types + private_node_types
-    ]
-    return jsonify(result), 200
+    etag = etag_for("node_type", node_type.id, node_type.version)
+    body = json.dumps({
+        "id": node_type.id,
+        "name": node_type.name,
+        "code": node_type.code,
+        "is_public": node_type.is_public,
+        "version": node_type.version,
+    }).encode()
+    return json_response(body, etag)
 
 
 @node_bp.route("/node_types", methods=["POST"])
@@ -44,5 +92,40 @@ def create_node_type():
     node_type = NodeType(user_id=user_id, name=name, code=code, is_public=is_public)
     db.session.add(node_type)
     db.session.commit()
+    current_app.extensions["response_cache"].invalidate("node_types")
     return jsonify({"message": "Node type created", "node_type_id": node_type.id}), 201
 
+
+@node_bp.route("/node_types/<int:node_type_id>", methods=["PUT"])
+def update_node_type(node_type_id: int):
+    """Update a NodeType owned by the current user."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    node_type = NodeType.query.filter_by(id=node_type_id).first()
+    if not node_type:
+        return jsonify({"error": "Node type not found"}), 404
+    if node_type.user_id != user_id:
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json()
+    node_type.name = data.get("name", node_type.name)
+    node_type.code = data.get("code", node_type.code)
+    node_type.is_public = data.get("is_public", node_type.is_public)
+    node_type.version = (node_type.version or 1) + 1
+    db.session.commit()
+    current_app.extensions["response_cache"].invalidate("node_types")
+    return jsonify({"message": "Node type updated"}), 200
+
+
+@node_bp.route("/node_types/cache", methods=["GET"])
+def get_node_function_cache_stats():
+    """Return compile counts and hit rates of the compiled-function caches."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+    # Thread pools use the server's cache; each sandbox worker has its own.
+    stats = node_function_cache.stats()
+    stats["sandbox"] = combined_stats(sandbox_reports())
+    return jsonify(stats), 200
@@ -0,0 +1,97 @@
+"""Memoized node outputs for incremental workflow re-execution."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+import threading
+from collections import OrderedDict
+
+from function_registry import code_hash
+
+MAX_CACHED_OUTPUTS = 4096
+MAX_CACHED_BYTES = 64 * 1024 * 1024
+
+
+def output_key(code: str, config: dict, input_hashes: list[str]) -> str:
+    """Return the cache key of a node run: its code, config and inputs."""
+    digest = hashlib.sha256()
+    digest.update(code_hash(code).encode())
+    digest.update(json.dumps(config, sort_keys=True, default=repr).encode())
+    for input_hash in input_hashes:
+        digest.update(input_hash.encode())
+    return digest.hexdigest()
+
+
+def serialize_output(output: object) -> tuple[bytes, str] | None:
+    """Return the pickled output and its hash, or None if it cannot be pickled."""
+    try:
+        data = pickle.dumps(output, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+    return data, hashlib.sha256(data).hexdigest()
+
+
+class NodeOutputCache:
+    """LRU store of pickled node outputs bounded by entry count and bytes.
+
+    Outputs are kept pickled so a downstream node mutating its input cannot
+    change what later runs get back.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_OUTPUTS,
+                 max_bytes: int = MAX_CACHED_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (pickled output, output hash)
+        self._entries: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> tuple[object, str] | None:
+        """Return ``(output, output hash)`` stored under ``key``, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        data, output_hash = entry
+        return pickle.loads(data), output_hash
+
+    def put(self, key: str, data: bytes, output_hash: str) -> None:
+        """Store a pickled output, evicting least recently used entries."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (data, output_hash)
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
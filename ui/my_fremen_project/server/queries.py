@@ -0,0 +1,94 @@
+"""Data-access helpers loading what a request needs in a fixed number of queries."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import base64
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import load_only, selectinload, undefer
+
+from models import NodeType, Workflow
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(row) -> str:
+    """Opaque cursor pointing just after ``row`` in a listing."""
+    raw = f"{int(bool(row.is_public))}:{row.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    """Return ``(is_public, id)`` of a cursor; raise ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        public, row_id = raw.split(":")
+        return int(public), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _visible_page(model, user_id: int, limit: int | None, cursor: str | None,
+                  name: str | None, public: bool | None, options=()):
+    """Rows of ``model`` the user may see: public first, then by id.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    public_flag = func.coalesce(model.is_public, False)
+    query = model.query.options(*options).filter(
+        or_(model.is_public.is_(True), model.user_id == user_id)
+    )
+    if name:
+        query = query.filter(model.name.contains(name, autoescape=True))
+    if public is not None:
+        query = query.filter(public_flag == public)
+    if cursor:
+        after_public, after_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            public_flag < after_public,
+            and_(public_flag == after_public, model.id > after_id),
+        ))
+    query = query.order_by(public_flag.desc(), model.id)
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+def visible_workflows(user_id: int, limit: int | None = None, cursor: str | None = None,
+                      name: str | None = None, public: bool | None = None):
+    """Public workflows followed by the user's private ones, in one query."""
+    return _visible_page(Workflow, user_id, limit, cursor, name, public)
+
+
+def visible_node_types(user_id: int, limit: int | None = None, cursor: str | None = None,
+                       name: str | None = None, public: bool | None = None):
+    """Public node types followed by the user's private ones, without their code."""
+    options = (load_only(NodeType.id, NodeType.name, NodeType.is_public),)
+    return _visible_page(NodeType, user_id, limit, cursor, name, public, options)
+
+
+def load_workflow(workflow_id: int, plan: bool = True) -> Workflow | None:
+    """Return a workflow with its nodes and edges loaded eagerly.
+
+    The stored execution plan is loaded in the same query unless ``plan``
+    is false.
+    """
+    options = [selectinload(Workflow.nodes), selectinload(Workflow.edges)]
+    if plan:
+        options.append(undefer(Workflow.plan))
+    return Workflow.query.options(*options).filter_by(id=workflow_id).first()
+
+
+def load_node_types(ids: Iterable[int]) -> dict[int, NodeType]:
+    """Fetch the given node types in a single query, keyed by id."""
+    ids = set(ids)
+    if not ids:
+        return {}
+    return {nt.id: nt for nt in NodeType.query.filter(NodeType.id.in_(ids)).all()}
@@ -0,0 +1,419 @@
+"""Background execution of workflow runs backed by the workflow_runs table.
+
+``POST /workflows/<id>/run`` only inserts a queued :class:`WorkflowRun`.
+Worker threads started by :class:`RunQueue` claim queued runs in order,
+skipping runs of users already at their concurrency limit, execute them and
+store the outcome on the row, large outputs going to the blob store and
+per-node telemetry to ``node_runs``. A run with Fremen action nodes holds a
+screen session lease until it ends. Idle workers also apply the blob
+retention policy. Progress events are kept in memory so the
+``/runs/<id>/events`` stream can replay and follow them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+from flask import Flask
+from sqlalchemy import func
+
+from database import db
+from models import RunBlob, Workflow, WorkflowRun
+from blob_store import BlobStore, collect_garbage
+from execution_plan import PlanCache
+from output_cache import NodeOutputCache
+from queries import load_workflow
+from screen_sessions import ScreenSessionPool, SessionLease
+from telemetry import record_node_runs
+from workflow_executor import RunCancelled, execute_workflow, get_pool
+
+FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+# Event logs of finished runs kept for late stream subscribers.
+MAX_FINISHED_LOGS = 200
+
+
+def _pid_alive(pid: int | None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def run_to_dict(run: WorkflowRun, include_result: bool = True) -> dict:
+    """Serialize a run for the API."""
+    data = {
+        "id": run.id,
+        "workflow_id": run.workflow_id,
+        "status": run.status,
+        "created_at": run.created_at,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "error": run.error,
+    }
+    if include_result:
+        data["result"] = json.loads(run.result) if run.result else None
+        data["timings"] = json.loads(run.timings) if run.timings else None
+        data["reused"] = json.loads(run.reused) if run.reused else []
+    return data
+
+
+class RunQueue:
+    """Worker threads executing queued runs of one Flask app."""
+
+    def __init__(self, app: Flask, workers: int = 4, per_user: int = 2,
+                 poll_interval: float = 1.0, output_cache: NodeOutputCache | None = None,
+                 plan_cache: PlanCache | None = None, blob_store: BlobStore | None = None,
+                 screen_sessions: ScreenSessionPool | None = None):
+        self.app = app
+        self.output_cache = output_cache
+        self.plan_cache = plan_cache
+        self.blob_store = blob_store
+        self.screen_sessions = screen_sessions
+        self._last_gc = 0.0
+        self.workers = workers
+        self.per_user = per_user
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Condition()
+        self._claim_lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._stopping = False
+        self._cancel: dict[int, threading.Event] = {}
+        # run id -> list of events; guarded by _changed
+        self._events: OrderedDict[int, list[dict]] = OrderedDict()
+        self._finished: OrderedDict[int, None] = OrderedDict()
+        self._changed = threading.Condition()
+
+    # -- lifecycle -------------------------------------------------------
+
+    def start(self) -> None:
+        """Recover runs interrupted by a restart and start the workers."""
+        with self._wakeup:
+            if self._threads:
+                return
+            self._stopping = False
+            self._recover()
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"run-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def resume(self) -> None:
+        """Start the workers if an earlier server left runs queued or running."""
+        with self.app.app_context():
+            pending = db.session.query(WorkflowRun.id).filter(
+                WorkflowRun.status.in_(("queued", "running"))
+            ).first()
+            db.session.remove()
+        if pending is not None:
+            self.start()
+
+    def shutdown(self, timeout: float | None = 10) -> None:
+        """Ask running workflows to stop and wait for the workers to exit."""
+        with self._wakeup:
+            self._stopping = True
+            for event in self._cancel.values():
+                event.set()
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self.screen_sessions is not None:
+            self.screen_sessions.shutdown()
+
+    def _recover(self) -> None:
+        with self.app.app_context():
+            stale = WorkflowRun.query.filter_by(status="running").all()
+            for run in stale:
+                if run.worker_pid == os.getpid() or not _pid_alive(run.worker_pid):
+                    run.status = "failed"
+                    run.error = "Interrupted by a server restart"
+                    run.finished_at = time.time()
+            db.session.commit()
+
+    # -- submission and control -------------------------------------------
+
+    def submit(self, workflow: Workflow, user_id: int, max_parallelism: int | None = None,
+               pool: str | None = None, force: bool = False) -> WorkflowRun:
+        """Insert a queued run and wake a worker."""
+        run = WorkflowRun(
+            workflow_id=workflow.id,
+            user_id=user_id,
+            status="queued",
+            max_parallelism=max_parallelism,
+            pool=pool,
+            force=force,
+            created_at=time.time(),
+        )
+        db.session.add(run)
+        db.session.commit()
+        self._emit(run.id, {"type": "status", "status": "queued"})
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return run
+
+    def cancel(self, run: WorkflowRun) -> bool:
+        """Cancel a queued run or stop a running one before its next node."""
+        if run.status in FINAL_STATUSES:
+            return False
+        if run.status == "queued":
+            updated = WorkflowRun.query.filter_by(id=run.id, status="queued").update(
+                {"status": "cancelled", "finished_at": time.time()}
+            )
+            db.session.commit()
+            if updated:
+                self._emit(run.id, {"type": "status", "status": "cancelled"})
+                return True
+            db.session.refresh(run)
+        run.cancel_requested = True
+        db.session.commit()
+        event = self._cancel.get(run.id)
+        if event is not None:
+            event.set()
+        return True
+
+    def wait(self, run_id: int, timeout: float | None = None) -> bool:
+        """Block until ``run_id`` reaches a final status; return whether it did."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while run_id not in self._finished:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+        return True
+
+    # -- progress events ---------------------------------------------------
+
+    def _emit(self, run_id: int, event: dict) -> None:
+        with self._changed:
+            log = self._events.setdefault(run_id, [])
+            log.append({**event, "run_id": run_id})
+            if event["type"] == "status" and event["status"] in FINAL_STATUSES:
+                self._finished[run_id] = None
+                while len(self._finished) > MAX_FINISHED_LOGS:
+                    old, _ = self._finished.popitem(last=False)
+                    self._events.pop(old, None)
+            self._changed.notify_all()
+
+    def events(self, run_id: int, after: int = 0, keepalive: float = 15.0):
+        """Yield ``(index, event)`` pairs from ``after`` on until the run ends.
+
+        Yields ``(None, None)`` every ``keepalive`` seconds without news so
+        streaming responses can send a comment and detect closed clients.
+        """
+        position = after
+        while True:
+            with self._changed:
+                log = self._events.get(run_id)
+                if log is None or len(log) <= position:
+                    if run_id in self._finished:
+                        return
+                    self._changed.wait(keepalive)
+                    log = self._events.get(run_id)
+                pending = [] if log is None else log[position:]
+                finished = run_id in self._finished
+            if not pending:
+                yield None, None
+                if finished:
+                    return
+                continue
+            for event in pending:
+                position += 1
+                yield position, event
+                if event["type"] == "status" and event["status"] in FINAL_STATUSES:
+                    return
+
+    def has_events(self, run_id: int) -> bool:
+        with self._changed:
+            return run_id in self._events
+
+    # -- workers -----------------------------------------------------------
+
+    def _claim(self) -> int | None:
+        """Mark the oldest runnable queued run as running; return its id."""
+        with self._claim_lock:
+            running = dict(
+                db.session.query(WorkflowRun.user_id, func.count(WorkflowRun.id))
+                .filter(WorkflowRun.status == "running")
+                .group_by(WorkflowRun.user_id)
+                .all()
+            )
+            queued = (
+                db.session.query(WorkflowRun.id, WorkflowRun.user_id)
+                .filter(WorkflowRun.status == "queued")
+                .order_by(WorkflowRun.id)
+                .limit(100)
+                .all()
+            )
+            for run_id, user_id in queued:
+                if running.get(user_id, 0) >= self.per_user:
+                    continue
+                claimed = WorkflowRun.query.filter_by(id=run_id, status="queued").update({
+                    "status": "running",
+                    "started_at": time.time(),
+                    "worker_pid": os.getpid(),
+                })
+                db.session.commit()
+                if claimed:
+                    self._cancel[run_id] = threading.Event()
+                    return run_id
+            db.session.rollback()
+            return None
+
+    def _work(self) -> None:
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    return
+            with self.app.app_context():
+                run_id = self._claim()
+                if run_id is not None:
+                    try:
+                        self._execute(run_id)
+                    except Exception:
+                        # Keep the worker alive; _recover fails the run on restart.
+                        traceback.print_exc()
+                    finally:
+                        self._cancel.pop(run_id, None)
+                        db.session.remove()
+                    # A finished run may unblock another run of the same user.
+                    with self._wakeup:
+                        self._wakeup.notify_all()
+                    continue
+                self._collect_blobs()
+                db.session.remove()
+            with self._wakeup:
+                if not self._stopping:
+                    self._wakeup.wait(self.poll_interval)
+
+    def _collect_blobs(self) -> None:
+        """Run blob garbage collection if the interval has passed."""
+        if self.blob_store is None:
+            return
+        with self._claim_lock:
+            now = time.time()
+            if now - self._last_gc < self.app.config["BLOB_GC_INTERVAL"]:
+                return
+            self._last_gc = now
+        collect_garbage(self.blob_store, self.app.config["BLOB_RETENTION_DAYS"], now)
+
+    def _execute(self, run_id: int) -> None:
+        run = db.session.get(WorkflowRun, run_id)
+        cancel_event = self._cancel[run_id]
+        self._emit(run_id, {"type": "status", "status": "running"})
+        timings: dict[int, dict[str, float]] = {}
+        reused: list[int] = []
+        metrics: dict[int, dict] = {}
+        result = None
+        error = None
+        node_types: dict[int, int] = {}
+        screen = SessionLease(self.screen_sessions)
+        try:
+            workflow = load_workflow(run.workflow_id)
+            node_types = {node.id: node.node_type_id for node in workflow.nodes}
+            max_parallelism = run.max_parallelism or workflow.max_parallelism or 1
+            pool = None
+            kind = run.pool or self.app.config["WORKFLOW_POOL"]
+            if kind == "sandbox":
+                pool = get_pool(
+                    kind,
+                    self.app.config["WORKFLOW_POOL_SIZE"],
+                    timeout=self.app.config["SANDBOX_TIMEOUT"],
+                    memory_limit=self.app.config["SANDBOX_MEMORY_MB"] * 1024 * 1024,
+                )
+            elif max_parallelism > 1:
+                pool = get_pool(kind, self.app.config["WORKFLOW_POOL_SIZE"])
+            result = execute_workflow(
+                workflow,
+                max_parallelism,
+                pool,
+                timings,
+                progress=lambda event: self._emit(run_id, event),
+                cancelled=self._cancel_check(run_id, cancel_event),
+                output_cache=self.output_cache,
+                plan_cache=self.plan_cache,
+                force=bool(run.force),
+                reused=reused,
+                metrics=metrics,
+                screen=screen,
+            )
+            status = "succeeded"
+        except RunCancelled:
+            status = "cancelled"
+        except Exception as exc:
+            status = "failed"
+            error = str(exc)
+        finally:
+            screen.release()
+
+        db.session.rollback()
+        try:
+            self._store(run_id, status, error, result, timings, reused, node_types, metrics)
+        except Exception as exc:
+            # An output that cannot be serialized must not leave the run
+            # "running" forever.
+            db.session.rollback()
+            status, error = "failed", f"Could not store the run's result: {exc}"
+            run = db.session.get(WorkflowRun, run_id)
+            run.status = status
+            run.error = error
+            run.finished_at = time.time()
+            db.session.commit()
+        self._emit(run_id, {"type": "status", "status": status, "error": error})
+
+    def _cancel_check(self, run_id: int, event: threading.Event):
+        """Return a ``cancelled`` callback for the executor.
+
+        Besides ``event``, set by :meth:`cancel` in this process, it reads the
+        run's ``cancel_requested`` column at most every ``poll_interval``
+        seconds, so cancelling through another server process works too.
+        """
+        last_poll = time.monotonic()
+
+        def cancelled() -> bool:
+            nonlocal last_poll
+            if event.is_set():
+                return True
+            if time.monotonic() - last_poll >= self.poll_interval:
+                last_poll = time.monotonic()
+                # A connection of its own leaves the worker's session alone.
+                with db.engine.connect() as conn:
+                    if conn.execute(
+                        db.select(WorkflowRun.cancel_requested).where(WorkflowRun.id == run_id)
+                    ).scalar():
+                        event.set()
+            return event.is_set()
+
+        return cancelled
+
+    def _store(self, run_id: int, status: str, error: str | None, result: dict | None,
+               timings: dict, reused: list, node_types: dict, metrics: dict) -> None:
+        """Write the outcome of a run, its blobs and node telemetry."""
+        run = db.session.get(WorkflowRun, run_id)
+        run.status = status
+        run.error = error
+        run.finished_at = time.time()
+        run.timings = json.dumps(timings)
+        run.reused = json.dumps(reused)
+        if result is not None:
+            digests = ()
+            if self.blob_store is not None:
+                result, digests = self.blob_store.spill(run_id, result)
+            run.result = json.dumps(result, default=repr)
+            db.session.add_all(RunBlob(run_id=run_id, digest=d) for d in digests)
+        record_node_runs(run, node_types, metrics)
+        db.session.commit()
@@ -0,0 +1,128 @@
+"""Endpoints for inspecting, following and cancelling workflow runs."""
+
+import json
+
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, session
+from blob_store import DIGEST_RE
+from models import RunBlob, WorkflowRun
+from run_queue import run_to_dict
+
+run_bp = Blueprint("runs", __name__)
+
+
+def _get_own_run(run_id: int):
+    """Return ``(run, None)`` or ``(None, error response)`` for the current user."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return None, (jsonify({"error": "Unauthorized"}), 401)
+    run = WorkflowRun.query.filter_by(id=run_id).first()
+    if not run:
+        return None, (jsonify({"error": "Run not found"}), 404)
+    if run.user_id != user_id:
+        return None, (jsonify({"error": "Forbidden"}), 403)
+    return run, None
+
+
+@run_bp.route("/runs", methods=["GET"])
+def list_runs():
+    """Return the current user's most recent runs, optionally for one workflow."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    query = WorkflowRun.query.filter_by(user_id=user_id)
+    workflow_id = request.args.get("workflow_id", type=int)
+    if workflow_id is not None:
+        query = query.filter_by(workflow_id=workflow_id)
+    runs = query.order_by(WorkflowRun.id.desc()).limit(50).all()
+    return jsonify([run_to_dict(run, include_result=False) for run in runs]), 200
+
+
+@run_bp.route("/runs/cache", methods=["GET"])
+def get_output_cache_stats():
+    """Return size and hit counts of the memoized node output store."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(current_app.extensions["node_output_cache"].stats()), 200
+
+
+@run_bp.route("/runs/<int:run_id>", methods=["GET"])
+def get_run(run_id: int):
+    """Return the status of a run and, once finished, its results."""
+    run, error = _get_own_run(run_id)
+    if error:
+        return error
+    return jsonify(run_to_dict(run)), 200
+
+
+@run_bp.route("/runs/<int:run_id>/cancel", methods=["POST"])
+def cancel_run(run_id: int):
+    """Cancel a queued run or stop a running one before its next node."""
+    run, error = _get_own_run(run_id)
+    if error:
+        return error
+    if not current_app.extensions["run_queue"].cancel(run):
+        return jsonify({"error": f"Run already {run.status}"}), 409
+    return jsonify({"message": "Cancellation requested"}), 202
+
+
+def _sse(index, event: dict) -> str:
+    head = f"id: {index}\n" if index is not None else ""
+    return f"{head}event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@run_bp.route("/runs/<int:run_id>/events", methods=["GET"])
+def stream_run_events(run_id: int):
+    """Server-sent events with per-node progress, ending with the final status."""
+    run, error = _get_own_run(run_id)
+    if error:
+        return error
+
+    queue = current_app.extensions["run_queue"]
+    after = request.headers.get("Last-Event-ID", request.args.get("after", 0), type=int)
+    status = run.status
+
+    def generate():
+        if not queue.has_events(run_id):
+            # Run handled by another process or before a restart.
+            yield _sse(None, {"type": "status", "status": status, "run_id": run_id})
+            return
+        for index, event in queue.events(run_id, after):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield _sse(index, event)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@run_bp.route("/runs/<int:run_id>/blobs/<digest>", methods=["GET"])
+def get_run_blob(run_id: int, digest: str):
+    """Download a spilled node output; supports Range and If-None-Match."""
+    run, error = _get_own_run(run_id)
+    if error:
+        return error
+    if not DIGEST_RE.match(digest):
+        return jsonify({"error": "Blob not found"}), 404
+    if not RunBlob.query.filter_by(run_id=run.id, digest=digest).first():
+        # Garbage collection drops the references of runs past retention
+        # first; their results still point at the blob.
+        if digest in (run.result or ""):
+            return jsonify({"error": "Blob expired"}), 410
+        return jsonify({"error": "Blob not found"}), 404
+    path = current_app.extensions["blob_store"].path(digest)
+    try:
+        response = send_file(path, mimetype="application/json", conditional=True,
+                             etag=digest, max_age=86400)
+    except FileNotFoundError:
+        return jsonify({"error": "Blob expired"}), 410
+    # Blobs never change, but they are private to the run's owner.
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response
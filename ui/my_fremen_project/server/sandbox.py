@@ -0,0 +1,372 @@
+"""Pre-forked worker processes that run node code outside the server process.
+
+:class:`SandboxPool` is a ``concurrent.futures.Executor``. Its workers are
+forked once, when the pool is created, and reused for every call, so the
+modules they need are already imported and the node functions they have
+compiled stay warm in their own copy of the function cache. A node that
+loops forever is killed when it exceeds the call timeout, one that allocates
+too much gets a ``MemoryError``, and one that crashes its worker takes down
+only that worker; in each case the worker is replaced and the server keeps
+serving requests.
+
+Arguments and results travel over a pipe pickled with protocol 5. Large
+buffers (bytes-like objects, NumPy arrays) are sent out of band straight
+from their memory instead of being copied into the pickle stream. Iterators
+passed inside list arguments, such as a node's streamed inputs, are pulled
+into the worker chunk by chunk as it iterates them, and :meth:`SandboxPool.stream`
+sends a generator's items back the same way.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import pickle
+import queue
+import resource
+import signal
+import struct
+import threading
+import traceback
+from collections.abc import Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+from streams import chunked
+
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_MEMORY_LIMIT = 1024 * 1024 * 1024
+
+
+class SandboxError(Exception):
+    """A node call failed in a way that has no exception of its own."""
+
+
+class SandboxTimeout(SandboxError):
+    """A node call exceeded the pool's time limit and its worker was killed."""
+
+
+class SandboxCrashed(SandboxError):
+    """The worker process died while running a node call."""
+
+
+def send_message(conn, obj) -> None:
+    """Send ``obj`` with its large buffers out of band."""
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    conn.send_bytes(struct.pack("<I", len(buffers)) + data)
+    for buffer in buffers:
+        conn.send_bytes(buffer.raw())
+
+
+def recv_message(conn):
+    head = conn.recv_bytes()
+    (count,) = struct.unpack_from("<I", head)
+    buffers = [conn.recv_bytes() for _ in range(count)]
+    return pickle.loads(memoryview(head)[4:], buffers=buffers)
+
+
+class _Pull:
+    """Placeholder for an iterator argument that stayed in the parent."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+
+def _pull(conn, index: int):
+    while True:
+        send_message(conn, ("pull", index))
+        chunk = recv_message(conn)
+        if chunk is None:
+            return
+        yield from chunk
+
+
+def _detach_iterators(args: tuple) -> tuple[tuple, list]:
+    """Replace iterators inside list arguments with :class:`_Pull` markers."""
+    sources = []
+
+    def marker(value):
+        if isinstance(value, Iterator):
+            sources.append(value)
+            return _Pull(len(sources) - 1)
+        return value
+
+    args = tuple(
+        [marker(v) for v in arg] if isinstance(arg, list) else arg for arg in args
+    )
+    return args, sources
+
+
+def _attach_iterators(conn, args: tuple) -> tuple:
+    return tuple(
+        [_pull(conn, v.index) if isinstance(v, _Pull) else v for v in arg]
+        if isinstance(arg, list) else arg
+        for arg in args
+    )
+
+
+def _next_chunk(source) -> list | None:
+    next_chunk = getattr(source, "next_chunk", None)
+    if next_chunk is not None:
+        return next_chunk()
+    return next(chunked(source), None)
+
+
+def _limit_memory(limit: int | None) -> None:
+    if not limit:
+        return
+    # The address-space limit also counts what was mapped before the fork.
+    try:
+        with open("/proc/self/statm") as f:
+            mapped = int(f.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        mapped = 0
+    resource.setrlimit(resource.RLIMIT_AS, (mapped + limit, mapped + limit))
+
+
+def _worker_main(conn, memory_limit: int | None, report=None) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _limit_memory(memory_limit)
+    while True:
+        try:
+            message = recv_message(conn)
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        fn, args, kwargs, stream = message
+        try:
+            result = fn(*_attach_iterators(conn, args), **kwargs)
+            if stream:
+                count = 0
+                for chunk in chunked(result):
+                    send_message(conn, ("out", chunk))
+                    count += len(chunk)
+                result = count
+            reply = ("ok", result)
+        except BaseException as exc:
+            text = traceback.format_exc()
+            try:
+                pickle.dumps(exc)
+            except Exception:
+                exc = SandboxError(f"{type(exc).__name__}: {exc}")
+            reply = ("error", exc, text)
+        if report is not None:
+            send_message(conn, ("report", report()))
+        try:
+            send_message(conn, reply)
+        except MemoryError:
+            send_message(conn, ("error", MemoryError("Result too large"), ""))
+        except pickle.PicklingError as exc:
+            send_message(conn, ("error", SandboxError(f"Unpicklable result: {exc}"), ""))
+
+
+class _Worker:
+    def __init__(self, context, memory_limit: int | None, report=None):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child, memory_limit, report), daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.calls = 0
+        self.report = None
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            send_message(self.conn, None)
+        except OSError:
+            pass
+        self.process.join(1)
+        self.kill()
+
+
+class SandboxPool(Executor):
+    """Executor running calls in ``size`` pre-forked worker processes.
+
+    ``timeout`` (seconds) and ``memory_limit`` (bytes) apply to every call.
+    Functions must be importable module-level callables, as for
+    ``ProcessPoolExecutor``. ``report``, if given, is called in a worker
+    after each of its calls; :meth:`reports` returns the latest result of
+    every live worker.
+    """
+
+    def __init__(self, size: int = 4, timeout: float | None = DEFAULT_TIMEOUT,
+                 memory_limit: int | None = DEFAULT_MEMORY_LIMIT, report=None):
+        self.size = size
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.report = report
+        self._context = multiprocessing.get_context("fork")
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._reserve_lock = threading.Lock()
+        self._shutdown = False
+        self.calls = 0
+        self.timeouts = 0
+        self.crashes = 0
+        for _ in range(size):
+            self._spawn()
+        self._dispatch = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sandbox")
+
+    def _spawn(self) -> None:
+        worker = _Worker(self._context, self.memory_limit, self.report)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if self._shutdown:
+                return
+        self._spawn()
+
+    def call(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in a worker and return its result."""
+        return self._run(fn, args, kwargs, None)
+
+    def stream(self, sink, fn, *args) -> int:
+        """Run ``fn(*args)``, which returns an iterable, in a worker.
+
+        Its items are passed to ``sink`` in chunks (lists) while the worker
+        produces them; returns the number of items.
+        """
+        return self._run(fn, args, {}, sink)
+
+    def reserve(self, count: int) -> Reservation:
+        """Set aside ``count`` workers for calls that must run at the same time.
+
+        Waits until that many workers are idle. Reservations are taken one
+        at a time, so callers never each hold part of what they need.
+        """
+        if count > self.size:
+            raise ValueError(f"Cannot reserve {count} of {self.size} sandbox workers")
+        with self._reserve_lock:
+            workers = [self._idle.get() for _ in range(count)]
+        return Reservation(self, workers)
+
+    def _run(self, fn, args: tuple, kwargs: dict, sink, worker: _Worker | None = None):
+        args, sources = _detach_iterators(args)
+        if worker is None:
+            worker = self._idle.get()
+        healthy = False
+        try:
+            send_message(worker.conn, (fn, args, kwargs, sink is not None))
+            reply = self._exchange(worker, sources, sink)
+            healthy = True
+        except (EOFError, OSError, ConnectionError) as exc:
+            self.crashes += 1
+            worker.process.join(1)
+            code = worker.process.exitcode
+            raise SandboxCrashed(f"Sandbox worker died (exit code {code})") from exc
+        finally:
+            if healthy:
+                worker.calls += 1
+                self.calls += 1
+                self._idle.put(worker)
+            else:
+                # Killed by a timeout or crash, or left mid-call by an error
+                # in a source or sink.
+                self._replace(worker)
+        if reply[0] == "ok":
+            return reply[1]
+        _, exc, text = reply
+        if text:
+            exc.__cause__ = SandboxError(text)
+        raise exc
+
+    def _exchange(self, worker: _Worker, sources: list, sink):
+        """Serve the worker's pulls and output chunks until it replies."""
+        while True:
+            if not worker.conn.poll(self.timeout):
+                self.timeouts += 1
+                raise SandboxTimeout(f"Node exceeded the {self.timeout:g}s time limit")
+            message = recv_message(worker.conn)
+            if message[0] == "pull":
+                send_message(worker.conn, _next_chunk(sources[message[1]]))
+            elif message[0] == "out":
+                sink(message[1])
+            elif message[0] == "report":
+                worker.report = message[1]
+            else:
+                return message
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        return self._dispatch.submit(self.call, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+        self._dispatch.shutdown(wait=wait, cancel_futures=cancel_futures)
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            alive = sum(worker.process.is_alive() for worker in self._workers)
+        return {
+            "size": self.size,
+            "alive": alive,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "crashes": self.crashes,
+        }
+
+    def reports(self) -> list:
+        """Return the latest ``report`` of each live worker that has one."""
+        with self._lock:
+            return [worker.report for worker in self._workers if worker.report is not None]
+
+    def pids(self) -> list[int]:
+        with self._lock:
+            return [worker.process.pid for worker in self._workers]
+
+
+class Reservation:
+    """Workers taken from a :class:`SandboxPool` by :meth:`SandboxPool.reserve`.
+
+    Each :meth:`call` or :meth:`stream` uses one reserved worker and then
+    returns it to the pool; :meth:`release` returns those left unused.
+    """
+
+    def __init__(self, pool: SandboxPool, workers: list[_Worker]):
+        self.pool = pool
+        self._workers = workers
+        self._lock = threading.Lock()
+
+    def _take(self) -> _Worker:
+        with self._lock:
+            if not self._workers:
+                raise RuntimeError("No reserved sandbox worker left")
+            return self._workers.pop()
+
+    def call(self, fn, *args, **kwargs):
+        """Like :meth:`SandboxPool.call`, on a reserved worker."""
+        return self.pool._run(fn, args, kwargs, None, self._take())
+
+    def stream(self, sink, fn, *args) -> int:
+        """Like :meth:`SandboxPool.stream`, on a reserved worker."""
+        return self.pool._run(fn, args, {}, sink, self._take())
+
+    def release(self, count: int | None = None) -> None:
+        """Return ``count`` unused workers (all by default) to the pool."""
+        with self._lock:
+            count = len(self._workers) if count is None else count
+            returned, self._workers = self._workers[:count], self._workers[count:]
+        for worker in returned:
+            self.pool._idle.put(worker)
@@ -0,0 +1,234 @@
+"""Leased screen sessions running Fremen action nodes.
+
+Each :class:`ScreenSession` is a process bound to one X display (typically
+an Xvfb server per session). It is spawned with ``DISPLAY`` set before
+``fremen`` is imported, builds its session object once and then serves
+action calls over a pipe, so capture buffers, the template registry and the
+browser window stay warm across runs.
+
+A run takes a :class:`SessionLease`: the first action node of the run
+acquires a free session from the :class:`ScreenSessionPool`, waiting in line
+when all are busy, and every later action of the run uses the same screen
+until the run ends. Action nodes of one run take turns on it.
+"""
+
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+from sandbox import recv_message, send_message
+
+DEFAULT_FACTORY = "fremen_actions:open_session"
+DEFAULT_ACTION_TIMEOUT = 120.0
+DEFAULT_LEASE_TIMEOUT = 600.0
+
+# Seconds a new session may take to import fremen and open its display.
+STARTUP_TIMEOUT = 60.0
+
+
+class SessionError(Exception):
+    """A screen session failed to start, crashed or timed out."""
+
+
+class SessionUnavailable(SessionError):
+    """No screen session became free within the lease timeout."""
+
+
+class ActionFailed(Exception):
+    """An action raised inside its screen session."""
+
+
+def _session_main(conn, display: str | None, factory: str) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if display:
+        os.environ["DISPLAY"] = display
+    try:
+        module, _, name = factory.partition(":")
+        session = getattr(importlib.import_module(module), name)(display)
+    except BaseException as exc:
+        send_message(conn, ("error", f"{type(exc).__name__}: {exc}"))
+        return
+    send_message(conn, ("ready", os.getpid()))
+    while True:
+        try:
+            message = recv_message(conn)
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        action, inputs, params = message
+        try:
+            reply = ("ok", session.run(action, inputs, params))
+            send_message(conn, reply)
+        except Exception as exc:
+            send_message(conn, ("error", f"{type(exc).__name__}: {exc}"))
+
+
+class ScreenSession:
+    """One session process on ``display``, started on first use."""
+
+    def __init__(self, display: str | None, factory: str = DEFAULT_FACTORY,
+                 timeout: float | None = DEFAULT_ACTION_TIMEOUT):
+        self.display = display
+        self.factory = factory
+        self.timeout = timeout
+        self.process = None
+        self.conn = None
+        self.calls = 0
+        self.starts = 0
+
+    def _start(self) -> None:
+        context = multiprocessing.get_context("spawn")
+        parent, child = context.Pipe()
+        process = context.Process(target=_session_main, args=(child, self.display, self.factory),
+                                  name=f"screen-session-{self.display}", daemon=True)
+        process.start()
+        child.close()
+        self.starts += 1
+        self.process, self.conn = process, parent
+        try:
+            if not parent.poll(STARTUP_TIMEOUT):
+                raise SessionError(f"Screen session on {self.display} did not start")
+            status, detail = recv_message(parent)
+        except (EOFError, OSError) as exc:
+            self.stop()
+            raise SessionError(f"Screen session on {self.display} died at startup") from exc
+        except SessionError:
+            self.stop()
+            raise
+        if status != "ready":
+            self.stop()
+            raise SessionError(f"Screen session on {self.display} failed to start: {detail}")
+
+    def call(self, action: str, inputs: list, params: dict):
+        """Run ``action`` in the session process and return its result."""
+        if self.process is None or not self.process.is_alive():
+            self._start()
+        try:
+            send_message(self.conn, (action, inputs, params))
+            if not self.conn.poll(self.timeout):
+                self.stop()
+                raise SessionError(f"Action {action} exceeded the {self.timeout:g}s time limit")
+            status, result = recv_message(self.conn)
+        except (EOFError, OSError) as exc:
+            self.stop()
+            raise SessionError(f"Screen session on {self.display} died during {action}") from exc
+        self.calls += 1
+        if status == "error":
+            raise ActionFailed(result)
+        return result
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        try:
+            send_message(self.conn, None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = self.conn = None
+
+    @property
+    def pid(self) -> int | None:
+        return self.process.pid if self.process is not None else None
+
+
+class ScreenSessionPool:
+    """Sessions on ``displays``, leased to one run at a time."""
+
+    def __init__(self, displays: list[str], factory: str = DEFAULT_FACTORY,
+                 action_timeout: float | None = DEFAULT_ACTION_TIMEOUT,
+                 lease_timeout: float | None = DEFAULT_LEASE_TIMEOUT):
+        if not displays:
+            raise ValueError("A screen session pool needs at least one display")
+        self.lease_timeout = lease_timeout
+        self.sessions = [ScreenSession(d, factory, action_timeout) for d in displays]
+        self._idle: queue.Queue[ScreenSession] = queue.Queue()
+        for session in self.sessions:
+            self._idle.put(session)
+        self._lock = threading.Lock()
+        self.leases = 0
+        self.waiting = 0
+        self.wait_time = 0.0
+
+    def acquire(self) -> ScreenSession:
+        """Return a free session, waiting up to the lease timeout for one."""
+        start = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        try:
+            session = self._idle.get(timeout=self.lease_timeout)
+        except queue.Empty:
+            raise SessionUnavailable(
+                f"No screen session became free within {self.lease_timeout:g}s"
+            ) from None
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.leases += 1
+            self.wait_time += time.monotonic() - start
+        return session
+
+    def release(self, session: ScreenSession) -> None:
+        self._idle.put(session)
+
+    def shutdown(self) -> None:
+        for session in self.sessions:
+            session.stop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self.sessions),
+                "idle": self._idle.qsize(),
+                "waiting": self.waiting,
+                "leases": self.leases,
+                "wait_time": self.wait_time,
+                "sessions": [
+                    {"display": s.display, "pid": s.pid, "calls": s.calls,
+                     "starts": s.starts}
+                    for s in self.sessions
+                ],
+            }
+
+
+class SessionLease:
+    """The screen session of one run, acquired by its first action."""
+
+    def __init__(self, pool: ScreenSessionPool | None):
+        self.pool = pool
+        self.session: ScreenSession | None = None
+        self._lock = threading.Lock()
+
+    def call(self, action: str, inputs: list, params: dict):
+        with self._lock:
+            if self.session is None:
+                if self.pool is None:
+                    raise SessionError("Fremen action nodes need SCREEN_DISPLAYS to be configured")
+                self.session = self.pool.acquire()
+            return self.session.call(action, inputs, params)
+
+    def release(self) -> None:
+        with self._lock:
+            if self.session is not None:
+                self.pool.release(self.session)
+                self.session = None
+
+
+def call_action(lease: SessionLease, action: str, inputs: list,
+                params: dict) -> tuple[object, float, float, dict]:
+    """Run an action node through ``lease``; shaped like ``_call_timed``'s result."""
+    start = time.perf_counter()
+    output = lease.call(action, inputs, params)
+    return output, start, time.perf_counter(), {}
@@ -0,0 +1,62 @@
+"""Endpoints aggregating the current user's run telemetry.
+
+Each takes ``?days=`` (default 7) to limit the window of runs considered.
+"""
+
+from flask import Blueprint, jsonify, request, session
+
+from database import db
+from models import Workflow
+from telemetry import DEFAULT_DAYS, node_type_stats, workflow_node_stats, workflow_stats
+
+stats_bp = Blueprint("stats", __name__)
+
+
+def _days():
+    """Return the requested window in days, or None if it is invalid."""
+    days = request.args.get("days", DEFAULT_DAYS, type=float)
+    return days if days is not None and days > 0 else None
+
+
+@stats_bp.route("/stats/node_types", methods=["GET"])
+def get_node_type_stats():
+    """Return wall time percentiles, CPU, memory and errors per node type."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+    days = _days()
+    if days is None:
+        return jsonify({"error": "days must be a positive number"}), 400
+    return jsonify(node_type_stats(user_id, days)), 200
+
+
+@stats_bp.route("/stats/workflows", methods=["GET"])
+def get_workflow_stats():
+    """Return run duration percentiles per workflow, most total time first."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+    days = _days()
+    if days is None:
+        return jsonify({"error": "days must be a positive number"}), 400
+    return jsonify(workflow_stats(user_id, days)), 200
+
+
+@stats_bp.route("/stats/workflows/<int:workflow_id>/nodes", methods=["GET"])
+def get_workflow_node_stats(workflow_id: int):
+    """Return wall time percentiles and share of run time of each node of a workflow."""
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+    days = _days()
+    if days is None:
+        return jsonify({"error": "days must be a positive number"}), 400
+
+    meta = db.session.execute(
+        db.select(Workflow.user_id, Workflow.is_public).where(Workflow.id == workflow_id)
+    ).first()
+    if not meta:
+        return jsonify({"error": "Workflow not found"}), 404
+    if (meta.user_id != user_id) and (not meta.is_public):
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(workflow_node_stats(user_id, workflow_id, days)), 200
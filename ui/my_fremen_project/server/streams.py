@@ -0,0 +1,180 @@
+"""Record streams passed between workflow nodes.
+
+A node whose ``run`` is a generator function streams its records instead of
+returning them. Each successor receives a :class:`StreamReader` in that
+input's position and iterates it while the producer is still running.
+Records travel in chunks through one bounded queue per reader, so a
+producer blocks once its slowest consumer is ``STREAM_BUFFER`` chunks
+behind, and a chunk is freed as soon as every reader has moved past it.
+
+A consumer that reads one input to exhaustion before touching another (or a
+diamond whose branches are read out of step) needs buffers as large as that
+input; such nodes should return lists instead. The executor collects a
+stream into a list itself when one of its consumers also waits for another
+(see ``workflow_executor._rejoining_streams``).
+"""
+
+from __future__ import annotations
+
+import ast
+import functools
+import itertools
+import queue
+import threading
+
+# Records per chunk, and chunks buffered per reader.
+STREAM_CHUNK = 512
+STREAM_BUFFER = 16
+
+_PUT_INTERVAL = 0.1
+
+
+class StreamError(Exception):
+    """The producer of a stream failed or the run was aborted."""
+
+
+class _End:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+
+
+@functools.lru_cache(maxsize=1024)
+def is_generator_code(code: str) -> bool:
+    """Return True if the ``run`` function defined by ``code`` yields.
+
+    Decided from the syntax tree, without executing the code.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return False
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "run":
+            pending = list(node.body)
+            while pending:
+                child = pending.pop()
+                if isinstance(child, (ast.Yield, ast.YieldFrom)):
+                    return True
+                # Nested functions and lambdas yield on their own behalf.
+                if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef,
+                                          ast.Lambda, ast.ClassDef)):
+                    pending.extend(ast.iter_child_nodes(child))
+            return False
+    return False
+
+
+def chunked(iterable, size: int = STREAM_CHUNK):
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class Stream:
+    """Fan-out of one producer's records to ``readers`` bounded queues."""
+
+    def __init__(self, readers: int, buffer: int = STREAM_BUFFER):
+        self._queues = [queue.Queue(buffer) for _ in range(readers)]
+        self._detached = [False] * readers
+        self._lock = threading.Lock()
+        self._next_reader = 0
+        self.count = 0
+
+    def reader(self) -> StreamReader:
+        """Return the next unused reader."""
+        with self._lock:
+            index = self._next_reader
+            self._next_reader += 1
+        return StreamReader(self, index)
+
+    def _put(self, index: int, item) -> bool:
+        q = self._queues[index]
+        while not self._detached[index]:
+            try:
+                q.put(item, timeout=_PUT_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def put_chunk(self, chunk: list) -> bool:
+        """Queue ``chunk`` for every reader; False once none is listening."""
+        self.count += len(chunk)
+        delivered = [self._put(i, chunk) for i in range(len(self._queues))]
+        return any(delivered) or not self._queues
+
+    def feed(self, iterable) -> int:
+        """Stream ``iterable`` to the readers and return the records sent."""
+        for chunk in chunked(iterable):
+            if not self.put_chunk(chunk):
+                close = getattr(iterable, "close", None)
+                if close is not None:
+                    close()
+                break
+        return self.count
+
+    def close(self, error: BaseException | None = None) -> None:
+        """Mark the end of the stream, or its failure with ``error``."""
+        for index in range(len(self._queues)):
+            self._put(index, _End(error))
+
+    def abort(self, error: BaseException | None = None) -> None:
+        """Stop the producer and fail every reader, without blocking."""
+        error = error or StreamError("Run aborted")
+        for index, q in enumerate(self._queues):
+            self._detached[index] = True
+            _drain(q)
+            q.put_nowait(_End(error))
+
+
+def _drain(q: queue.Queue) -> None:
+    try:
+        while True:
+            q.get_nowait()
+    except queue.Empty:
+        pass
+
+
+class StreamReader:
+    """Iterator over one consumer's share of a :class:`Stream`."""
+
+    def __init__(self, stream: Stream, index: int):
+        self._stream = stream
+        self._index = index
+        self._chunk: list = []
+        self._pos = 0
+        self._done = False
+
+    def next_chunk(self) -> list | None:
+        """Return the next chunk of records, or None at the end."""
+        if self._done:
+            return None
+        item = self._stream._queues[self._index].get()
+        if isinstance(item, _End):
+            self._done = True
+            if item.error is not None:
+                raise StreamError(f"Input stream failed: {item.error}") from item.error
+            return None
+        return item
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while self._pos >= len(self._chunk):
+            chunk = self.next_chunk()
+            if chunk is None:
+                raise StopIteration
+            self._chunk, self._pos = chunk, 0
+        item = self._chunk[self._pos]
+        self._pos += 1
+        return item
+
+    def detach(self) -> None:
+        """Stop receiving; the producer no longer waits for this reader."""
+        self._done = True
+        self._chunk = []
+        self._stream._detached[self._index] = True
+        _drain(self._stream._queues[self._index])
@@ -0,0 +1,170 @@
+"""Per-node run telemetry and its aggregates.
+
+Every finished run stores one ``node_runs`` row per node it started, in a
+single batched insert alongside the run's outcome. The aggregate queries
+compute latency percentiles in SQLite with window functions, so the rows
+never have to be loaded into Python.
+"""
+
+from __future__ import annotations
+
+import time
+
+from sqlalchemy import Float, and_, case, cast, func, insert, select
+
+from database import db
+from models import NodeRun, NodeType, Workflow, WorkflowNode, WorkflowRun
+
+PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+
+DEFAULT_DAYS = 7.0
+
+
+def record_node_runs(run: WorkflowRun, node_types: dict[int, int],
+                     metrics: dict[int, dict]) -> None:
+    """Add the ``node_runs`` rows of ``run`` to the current transaction.
+
+    ``node_types`` maps node ids to node type ids; ``metrics`` is what
+    :func:`workflow_executor.execute_workflow` collected.
+    """
+    if not metrics:
+        return
+    started = run.started_at or time.time()
+    rows = [
+        {
+            "run_id": run.id,
+            "workflow_id": run.workflow_id,
+            "user_id": run.user_id,
+            "node_id": node_id,
+            "node_type_id": node_types.get(node_id),
+            "started_at": started + m["start"],
+            "wall_time": m["wall"],
+            "cpu_time": m["cpu"],
+            "peak_memory": m["peak_memory"],
+            "input_bytes": m["input_bytes"],
+            "output_bytes": m["output_bytes"],
+            "reused": m["reused"],
+            "error": m["error"],
+        }
+        for node_id, m in metrics.items()
+    ]
+    db.session.execute(insert(NodeRun), rows)
+
+
+def _percentiles(value, group_by: list, where) -> select:
+    """Select ``group_by`` with count, mean, max and percentiles of ``value``.
+
+    Uses the nearest-rank method: ``pN`` is the smallest value whose rank
+    reaches N% of the group's rows.
+    """
+    ranked = select(
+        *group_by,
+        value.label("value"),
+        func.row_number().over(partition_by=group_by, order_by=value).label("rank"),
+        func.count().over(partition_by=group_by).label("n"),
+    ).where(where).subquery()
+    keys = [ranked.c[column.key] for column in group_by]
+    rank = cast(ranked.c.rank, Float)
+    return select(
+        *keys,
+        func.count().label("count"),
+        func.avg(ranked.c.value).label("mean"),
+        func.max(ranked.c.value).label("max"),
+        func.sum(ranked.c.value).label("total"),
+        *(
+            func.min(case((rank >= fraction * ranked.c.n, ranked.c.value))).label(name)
+            for name, fraction in PERCENTILES
+        ),
+    ).group_by(*keys)
+
+
+def _latency(row) -> dict:
+    return {
+        "count": row.count,
+        "mean": row.mean,
+        "max": row.max,
+        "total": row.total,
+        **{name: getattr(row, name) for name, _ in PERCENTILES},
+    }
+
+
+def _window(user_id: int, days: float):
+    """Rows of ``user_id`` started in the last ``days`` that actually ran."""
+    return and_(
+        NodeRun.user_id == user_id,
+        NodeRun.started_at >= time.time() - days * 86400,
+        NodeRun.reused.is_(False),
+    )
+
+
+def node_type_stats(user_id: int, days: float = DEFAULT_DAYS) -> list[dict]:
+    """Latency percentiles per node type, slowest p95 first."""
+    where = _window(user_id, days)
+    latency = _percentiles(NodeRun.wall_time, [NodeRun.node_type_id], where).subquery()
+    extra = select(
+        NodeRun.node_type_id,
+        func.avg(NodeRun.cpu_time).label("cpu_mean"),
+        func.max(NodeRun.peak_memory).label("peak_memory"),
+        func.avg(NodeRun.output_bytes).label("output_bytes"),
+        func.count(NodeRun.error).label("errors"),
+    ).where(where).group_by(NodeRun.node_type_id).subquery()
+    rows = db.session.execute(
+        select(latency, extra.c.cpu_mean, extra.c.peak_memory, extra.c.output_bytes,
+               extra.c.errors, NodeType.name)
+        .join(extra, extra.c.node_type_id.is_(latency.c.node_type_id))
+        .outerjoin(NodeType, NodeType.id == latency.c.node_type_id)
+        .order_by(latency.c.p95.desc())
+    ).all()
+    return [
+        {
+            "node_type_id": row.node_type_id,
+            "name": row.name,
+            "wall_time": _latency(row),
+            "cpu_mean": row.cpu_mean,
+            "peak_memory": row.peak_memory,
+            "output_bytes_mean": row.output_bytes,
+            "errors": row.errors,
+        }
+        for row in rows
+    ]
+
+
+def workflow_stats(user_id: int, days: float = DEFAULT_DAYS) -> list[dict]:
+    """Run duration percentiles per workflow, most total server time first."""
+    duration = WorkflowRun.finished_at - WorkflowRun.started_at
+    where = and_(
+        WorkflowRun.user_id == user_id,
+        WorkflowRun.started_at.is_not(None),
+        WorkflowRun.finished_at >= time.time() - days * 86400,
+    )
+    latency = _percentiles(duration, [WorkflowRun.workflow_id], where).subquery()
+    rows = db.session.execute(
+        select(latency, Workflow.name)
+        .outerjoin(Workflow, Workflow.id == latency.c.workflow_id)
+        .order_by(latency.c.total.desc())
+    ).all()
+    return [
+        {"workflow_id": row.workflow_id, "name": row.name, "duration": _latency(row)}
+        for row in rows
+    ]
+
+
+def workflow_node_stats(user_id: int, workflow_id: int,
+                        days: float = DEFAULT_DAYS) -> list[dict]:
+    """Latency percentiles of each current node of a workflow and its share of time."""
+    where = and_(_window(user_id, days), NodeRun.workflow_id == workflow_id)
+    latency = _percentiles(NodeRun.wall_time, [NodeRun.node_id], where).subquery()
+    rows = db.session.execute(
+        select(latency)
+        .join(WorkflowNode, WorkflowNode.id == latency.c.node_id)
+        .order_by(latency.c.node_id)
+    ).all()
+    grand_total = sum(row.total for row in rows) or 0.0
+    return [
+        {
+            "node_id": row.node_id,
+            "wall_time": _latency(row),
+            "share": row.total / grand_total if grand_total else 0.0,
+        }
+        for row in rows
+    ]
@@ -3,47 +3,533 @@
 from __future__ import annotations
 
 import json
-import networkx as nx
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 
-from function_registry import compile_node_type_code
+from execution_plan import PlanCache, plan_for
+from fremen_actions import action_call
+from function_registry import get_node_function, node_function_cache
+from map_node import MapSpec, _call_map, _map_chunk_in_process, map_chunk
 from models import Workflow, WorkflowNode, WorkflowEdge, NodeType, db
+from output_cache import NodeOutputCache, output_key, serialize_output
+from queries import load_node_types
+from sandbox import Reservation, SandboxPool
+from screen_sessions import SessionLease, call_action
+from streams import Stream, is_generator_code
 
+POOL_KINDS = ("thread", "process", "sandbox")
 
-def execute_workflow(workflow: Workflow) -> dict[int, object]:
-    """Run all nodes in a workflow following topological order."""
-    graph = nx.DiGraph()
 
-    for node in workflow.nodes:
-        graph.add_node(node.id, node_obj=node)
-    for edge in workflow.edges:
-        graph.add_edge(edge.source_node_id, edge.target_node_id, label=edge.label)
+class RunCancelled(Exception):
+    """Raised when a run is cancelled between nodes."""
 
+
+_pools: dict[tuple, Executor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(kind: str = "thread", size: int = 8, **options) -> Executor:
+    """Return the worker pool of ``kind`` shared by runs in this process.
+
+    ``options`` are passed to :class:`sandbox.SandboxPool` (``timeout``,
+    ``memory_limit``) and ignored by the other kinds.
+    """
+    if kind not in POOL_KINDS:
+        raise ValueError(f"Unknown pool kind {kind!r}")
+    key = (kind, size, *sorted(options.items())) if kind == "sandbox" else (kind, size)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            if kind == "thread":
+                pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="workflow")
+            elif kind == "process":
+                pool = ProcessPoolExecutor(max_workers=size)
+            else:
+                pool = SandboxPool(size, report=node_function_cache.stats, **options)
+            _pools[key] = pool
+        return pool
+
+
+def sandbox_reports() -> list:
+    """Return the worker reports of every shared sandbox pool."""
+    with _pools_lock:
+        pools = [pool for pool in _pools.values() if isinstance(pool, SandboxPool)]
+    return [report for pool in pools for report in pool.reports()]
+
+
+def shutdown_pools() -> None:
+    """Shut down every shared worker pool."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        _pools.clear()
+
+
+def _node_config(node_data: WorkflowNode) -> dict:
+    config = {}
+    if node_data.config:
+        try:
+            config = json.loads(node_data.config)
+        except Exception:
+            pass
+    return config
+
+
+def _call_timed(func, inputs: list, config: dict) -> tuple[object, float, float, dict]:
+    cpu = time.thread_time()
+    start = time.perf_counter()
+    output = func(inputs, config)
+    end = time.perf_counter()
+    return output, start, end, {"cpu": time.thread_time() - cpu}
+
+
+_SERVER_PID = os.getpid()
+
+
+def _resident_memory() -> tuple[int, int] | None:
+    """Return this process's current and peak resident bytes (Linux only)."""
     try:
-        sorted_nodes = list(nx.topological_sort(graph))
-    except nx.NetworkXUnfeasible as exc:
-        raise Exception("Cyclic dependency detected in the workflow") from exc
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["VmRSS"].split()[0]) * 1024, int(fields["VmHWM"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _reset_peak_memory() -> int | None:
+    """Reset the resident high-water mark; return the current resident bytes."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return None
+    memory = _resident_memory()
+    return memory and memory[0]
+
+
+def _call_in_process(node_type_id: int, code: str, inputs: list,
+                     config: dict) -> tuple[object, float, float, dict]:
+    # Compiled functions cannot be pickled, so each worker process compiles
+    # from source through its own copy of the function cache; sandbox
+    # workers keep theirs warm between runs.
+    func = node_function_cache.get(node_type_id, code)
+    # A worker process runs one node at a time, so the growth of its
+    # resident set during the call is the node's peak memory.
+    baseline = _reset_peak_memory() if os.getpid() != _SERVER_PID else None
+    output, start, end, usage = _call_timed(func, inputs, config)
+    if baseline is not None:
+        memory = _resident_memory()
+        if memory:
+            usage["peak_memory"] = max(memory[1] - baseline, 0)
+    return output, start, end, usage
+
+
+def _open_stream(node_type_id: int, code: str, inputs: list, config: dict):
+    return node_function_cache.get(node_type_id, code)(inputs, config)
+
+
+def _call_streaming(stream: Stream, target, *args) -> tuple[None, float, float, dict]:
+    """Run a generator node in this thread, feeding its records to ``stream``."""
+    cpu = time.thread_time()
+    start = time.perf_counter()
+    try:
+        output, _, _, _ = target(*args)
+        stream.feed(output)
+    except BaseException as exc:
+        stream.close(exc)
+        raise
+    stream.close()
+    return None, start, time.perf_counter(), {"cpu": time.thread_time() - cpu}
+
+
+def _call_streaming_sandboxed(stream: Stream, pool: SandboxPool | Reservation,
+                              *args) -> tuple[None, float, float, dict]:
+    """Run a generator node in the sandbox, feeding its records to ``stream``."""
+    start = time.perf_counter()
+    try:
+        pool.stream(stream.put_chunk, _open_stream, *args)
+    except BaseException as exc:
+        stream.close(exc)
+        raise
+    stream.close()
+    return None, start, time.perf_counter(), {}
 
-    node_outputs: dict[int, object] = {}
 
-    for node_id in sorted_nodes:
-        node_data: WorkflowNode = graph.nodes[node_id]["node_obj"]
+def _call_collected(target, *args) -> tuple[list, float, float, dict]:
+    """Run a generator node to the end and return its records as a list."""
+    cpu = time.thread_time()
+    output, start, _, usage = target(*args)
+    records = list(output)
+    usage["cpu"] = time.thread_time() - cpu
+    return records, start, time.perf_counter(), usage
+
+
+def _rejoining_streams(plan, streaming: set[int]) -> set[int]:
+    """Return the streaming nodes with a successor that also depends on another.
+
+    Such a successor only starts once the other branch has finished, which
+    waits on the producer, which stalls once the successor's buffer is full.
+    """
+    rejoining = set()
+    for node_id in streaming:
+        successors = set(plan.successors(node_id))
+        for successor in successors:
+            seen: set[int] = set()
+            pending = list(plan.successors(successor))
+            while pending:
+                descendant = pending.pop()
+                if descendant not in seen:
+                    seen.add(descendant)
+                    pending.extend(plan.successors(descendant))
+            if seen & successors:
+                rejoining.add(node_id)
+                break
+    return rejoining
+
+
+def execute_workflow(
+    workflow: Workflow,
+    max_parallelism: int | None = None,
+    pool: Executor | None = None,
+    timings: dict[int, dict[str, float]] | None = None,
+    progress: Callable[[dict], None] | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    output_cache: NodeOutputCache | None = None,
+    force: bool = False,
+    reused: list[int] | None = None,
+    plan_cache: PlanCache | None = None,
+    metrics: dict[int, dict] | None = None,
+    screen: SessionLease | None = None,
+) -> dict[int, object]:
+    """Run all nodes in a workflow, each once all of its predecessors finished.
+
+    With ``max_parallelism`` above 1 (the workflow's own setting by default)
+    ready nodes are submitted to ``pool`` as soon as their inputs exist,
+    keeping at most that many in flight; otherwise nodes run one after
+    another in the calling thread. A :class:`sandbox.SandboxPool` is used
+    even for sequential runs, so node code never executes in the server.
+    Inputs are always passed in edge order. If ``timings`` is given it is
+    filled with each node's ``start``/``end`` seconds relative to the start
+    of the run.
+
+    ``metrics``, if given, receives per node ``wall`` and ``cpu`` seconds,
+    ``peak_memory`` (growth of a worker process's resident set; None for
+    nodes run in the server), ``input_bytes`` and ``output_bytes`` (pickled
+    sizes, known for nodes executed with an ``output_cache``), ``reused``
+    and ``error``,
+    including an entry for the node whose failure ends the run.
+
+    The node order comes from the workflow's execution plan, looked up in
+    ``plan_cache`` when given (see :mod:`execution_plan`).
+
+    ``progress`` receives a ``node_started`` and a ``node_finished`` event
+    per node. ``cancelled`` is checked before each node is started; once it
+    returns true no further nodes start and :class:`RunCancelled` is raised.
+
+    With an ``output_cache``, a node whose code, config and input values
+    match an earlier run is not executed; its stored output is used and its
+    id appended to ``reused``. ``force`` recomputes every node but still
+    refreshes the cache. Nodes with ``"cache": false`` in their config, and
+    nodes downstream of an output that cannot be pickled, always run.
+
+    A node whose ``run`` is a generator function streams its records: its
+    successors start as soon as it does and each receives a
+    :class:`streams.StreamReader` over the records, which are never held
+    in full (see :mod:`streams`). Its entry in the result is
+    ``{"records": count}``, and it is never served from the cache. A
+    generator whose successors meet again downstream (A to B to C and A to
+    C) returns its records as a list instead, like any other node. Nodes
+    producing or consuming streams run concurrently whatever
+    ``max_parallelism`` is, on threads of their own unless ``pool`` is a
+    sandbox, which then needs a worker for each of them; those are reserved
+    together (see :meth:`sandbox.SandboxPool.reserve`) so that concurrent
+    runs cannot each hold part of theirs.
+
+    A node with a ``"map"`` object in its config runs its code once per
+    element of a list input, in parallel chunks (see :mod:`map_node`). The
+    node itself only dispatches the chunks, on a thread of the run, to
+    ``pool`` if it is a process or sandbox pool and to threads of its own
+    otherwise.
+
+    A node without a node type whose config names an ``"action"`` runs that
+    Fremen action (see :mod:`fremen_actions`) in the screen session leased
+    through ``screen``; the caller releases the lease after the run. Action
+    outputs are never taken from the cache.
+    """
+    plan = plan_cache.get(workflow) if plan_cache is not None else plan_for(workflow)
+    nodes_by_id = {node.id: node for node in workflow.nodes}
+    if max_parallelism is None:
+        max_parallelism = workflow.max_parallelism or 1
+    isolated = isinstance(pool, SandboxPool)
+    process_pool = isolated or isinstance(pool, ProcessPoolExecutor)
+
+    # Resolve node types up front: workers must not touch the session.
+    node_types = load_node_types(
+        node.node_type_id for node in workflow.nodes if node.node_type_id
+    )
+    calls: dict[int, tuple] = {}
+    sources: dict[int, tuple[str, dict]] = {}
+    streaming: set[int] = set()
+    mapped: set[int] = set()
+    actions: set[int] = set()
+    for node_id in plan.order:
+        node_data: WorkflowNode = nodes_by_id[node_id]
         if not node_data.node_type_id:
-            node_outputs[node_id] = None
+            action = action_call(_node_config(node_data))
+            if action is not None:
+                actions.add(node_id)
+                calls[node_id] = (call_action, screen or SessionLease(None), *action)
+            continue
+        node_type = node_types[node_data.node_type_id]
+        config = _node_config(node_data)
+        sources[node_id] = (node_type.code, config)
+        spec = MapSpec.from_config(config)
+        if spec is not None:
+            if is_generator_code(node_type.code):
+                raise ValueError(f"Node {node_id} maps a generator; map nodes must return")
+            mapped.add(node_id)
+            if process_pool:
+                chunk_call = (_map_chunk_in_process, node_type.id, node_type.code)
+                calls[node_id] = (_call_map, pool, chunk_call, spec, config)
+            else:
+                chunk_call = (map_chunk, get_node_function(node_type))
+                calls[node_id] = (_call_map, None, chunk_call, spec, config)
             continue
+        if is_generator_code(node_type.code):
+            streaming.add(node_id)
+        if process_pool:
+            calls[node_id] = (_call_in_process, node_type.id, node_type.code, config)
+        else:
+            calls[node_id] = (_call_timed, get_node_function(node_type), config)
+    # A stream read by two branches that meet again is collected instead.
+    for node_id in _rejoining_streams(plan, streaming):
+        streaming.discard(node_id)
+        calls[node_id] = (_call_collected, *calls[node_id])
 
-        node_type = NodeType.query.get(node_data.node_type_id)
-        func = compile_node_type_code(node_type.code)
+    node_outputs: dict[int, object] = {}
+    # Hash of each node's pickled output, None when it cannot be pickled.
+    output_hashes: dict[int, str | None] = {}
+    cache_keys: dict[int, str] = {}
+    run_start = time.perf_counter()
+
+    def cache_key(node_id: int) -> str | None:
+        if output_cache is None or node_id not in sources or node_id in streaming:
+            return None
+        code, config = sources[node_id]
+        if config.get("cache", True) is False:
+            return None
+        input_hashes = [output_hashes.get(pn) for pn in plan.predecessors(node_id)]
+        if None in input_hashes:
+            return None
+        return output_key(code, config, input_hashes)
+
+    def begin(node_id: int) -> bool:
+        """Announce a node; return True if it was served from the cache."""
+        if cancelled is not None and cancelled():
+            raise RunCancelled("Run cancelled")
+        if progress is not None:
+            progress({"type": "node_started", "node_id": node_id,
+                      "time": time.perf_counter() - run_start})
+        key = cache_key(node_id)
+        if key is None:
+            return False
+        cache_keys[node_id] = key
+        cached = None if force else output_cache.get(key)
+        if cached is None:
+            return False
+        output, output_hashes[node_id] = cached
+        if reused is not None:
+            reused.append(node_id)
+        now = time.perf_counter()
+        finish(node_id, output, now, now, from_cache=True)
+        return True
+
+    output_sizes: dict[int, int] = {}
+
+    def measure(node_id: int, start: float, end: float, usage: dict | None,
+                error: BaseException | None = None, from_cache: bool = False) -> None:
+        if metrics is None:
+            return
+        sizes = [output_sizes.get(pn) for pn in plan.predecessors(node_id)]
+        metrics[node_id] = {
+            "start": start - run_start,
+            "wall": end - start,
+            "cpu": (usage or {}).get("cpu"),
+            "peak_memory": (usage or {}).get("peak_memory"),
+            "input_bytes": sum(sizes) if None not in sizes else None,
+            "output_bytes": output_sizes.get(node_id),
+            "reused": from_cache,
+            "error": None if error is None else str(error),
+        }
+
+    def fail(node_id: int, start: float, error: BaseException) -> None:
+        measure(node_id, start, time.perf_counter(), None, error)
+
+    def finish(node_id: int, output: object, start: float, end: float,
+               usage: dict | None = None, from_cache: bool = False) -> None:
+        node_outputs[node_id] = output
+        if output_cache is not None and not from_cache and node_id not in streaming:
+            serialized = serialize_output(output)
+            output_hashes[node_id] = serialized and serialized[1]
+            if serialized:
+                output_sizes[node_id] = len(serialized[0])
+            if serialized and node_id in cache_keys:
+                output_cache.put(cache_keys[node_id], *serialized)
+        measure(node_id, start, end, usage, from_cache=from_cache)
+        span = {"start": start - run_start, "end": end - run_start}
+        if timings is not None:
+            timings[node_id] = span
+        if progress is not None:
+            progress({"type": "node_finished", "node_id": node_id,
+                      "reused": from_cache, **span})
+
+    streams: dict[int, Stream] = {}
+    # Readers held by each consumer, detached once it finishes.
+    readers: dict[int, list] = {}
 
-        inputs = [node_outputs.get(pn) for pn in graph.predecessors(node_id)]
+    def arguments(node_id: int) -> tuple:
+        call = calls[node_id]
+        inputs = []
+        for pn in plan.predecessors(node_id):
+            if pn in streams:
+                inputs.append(streams[pn].reader())
+                readers.setdefault(node_id, []).append(inputs[-1])
+            else:
+                inputs.append(node_outputs.get(pn))
+        return (*call[:-1], inputs, call[-1])
 
-        config = {}
-        if node_data.config:
+    sequential = pool is None or (max_parallelism <= 1 and not isolated)
+    if not streaming and sequential:
+        for node_id in plan.order:
+            if begin(node_id):
+                continue
+            if node_id not in calls:
+                now = time.perf_counter()
+                finish(node_id, None, now, now)
+                continue
+            target, *args = arguments(node_id)
+            started = time.perf_counter()
             try:
-                config = json.loads(node_data.config)
-            except Exception:
-                pass
+                outcome = target(*args)
+            except Exception as exc:
+                fail(node_id, started, exc)
+                raise
+            finish(node_id, *outcome)
+        return node_outputs
 
-        node_outputs[node_id] = func(inputs, config)
+    linked = streaming | {s for n in streaming for s in plan.successors(n)}
+    # Map and action nodes wait on other processes, so they must not take a
+    # slot in ``pool``.
+    driven = mapped | actions
+    # Stream producers and consumers must run at the same time, so they get
+    # threads of their own instead of waiting for a slot in ``pool``. In a
+    # sandbox each needs a worker; those are reserved together when the
+    # first producer starts, as other runs share the pool.
+    sandboxed = {n for n in linked - driven if n in calls} if isolated else set()
+    if isolated and len(sandboxed) > pool.size:
+        raise ValueError(
+            f"Streaming nodes need {len(sandboxed)} sandbox workers; the pool has {pool.size}"
+        )
+    reservation = None
+    local = None
+    if linked or driven or pool is None:
+        local = ThreadPoolExecutor(max_workers=len(linked) + len(driven) + 1,
+                                   thread_name_prefix="workflow-stream")
 
-    return node_outputs
+    def submit(node_id: int) -> Future:
+        nonlocal reservation
+        target, *args = arguments(node_id)
+        if node_id in sandboxed and reservation is None:
+            reservation = pool.reserve(len(sandboxed))
+        if node_id in streaming:
+            # Successors without code finish at once and never read.
+            consumers = [s for s in plan.successors(node_id) if s in calls]
+            stream = streams[node_id] = Stream(len(consumers))
+            if isolated:
+                return local.submit(_call_streaming_sandboxed, stream, reservation, *args)
+            return local.submit(_call_streaming, stream, target, *args)
+        if node_id in driven:
+            return local.submit(target, *args)
+        if node_id in sandboxed:
+            return local.submit(reservation.call, target, *args)
+        if isolated or (pool is not None and node_id not in linked):
+            return pool.submit(target, *args)
+        return local.submit(target, *args)
+
+    waiting = {node_id: len(plan.preds[i]) for i, node_id in enumerate(plan.order)}
+    ready = [node_id for node_id, count in waiting.items() if count == 0]
+    running = {}
+    submitted: dict[int, float] = {}
+
+    def release(node_id: int) -> None:
+        for successor in plan.successors(node_id):
+            waiting[successor] -= 1
+            if waiting[successor] == 0:
+                ready.append(successor)
+
+    def next_ready() -> int | None:
+        limited = sum(1 for n in running.values() if n not in linked)
+        for index, node_id in enumerate(ready):
+            if node_id in linked or limited < max(max_parallelism, 1):
+                return ready.pop(index)
+        return None
 
+    try:
+        while ready or running:
+            while (node_id := next_ready()) is not None:
+                if begin(node_id):
+                    if node_id in sandboxed and reservation is not None:
+                        reservation.release(1)
+                    release(node_id)
+                    continue
+                if node_id not in calls:
+                    now = time.perf_counter()
+                    finish(node_id, None, now, now)
+                    release(node_id)
+                    continue
+                submitted[node_id] = time.perf_counter()
+                running[submit(node_id)] = node_id
+                if node_id in streaming:
+                    # Consumers start right away and read as records arrive.
+                    release(node_id)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node_id = running.pop(future)
+                try:
+                    output, start, end, usage = future.result()
+                except Exception as exc:
+                    fail(node_id, submitted[node_id], exc)
+                    raise
+                for reader in readers.pop(node_id, ()):
+                    reader.detach()
+                if node_id in streaming:
+                    finish(node_id, {"records": streams[node_id].count}, start, end, usage)
+                else:
+                    finish(node_id, output, start, end, usage)
+                    release(node_id)
+    except BaseException:
+        # Unblock producers and consumers still waiting on each other.
+        for stream in streams.values():
+            stream.abort()
+        raise
+    finally:
+        for future in running:
+            future.cancel()
+        if reservation is not None:
+            reservation.release()
+        if local is not None:
+            local.shutdown(wait=False)
+
+    return node_outputs
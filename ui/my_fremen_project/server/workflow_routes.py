@@ -1,27 +1,32 @@
 """Endpoints for CRUD and execution of workflows."""
 
-from flask import Blueprint, request, jsonify, session
+import json
+
+from flask import Blueprint, current_app, request, jsonify, session
 from database import db
 from models import Workflow, WorkflowNode, WorkflowEdge, NodeType
-from workflow_executor import execute_workflow
+from http_cache import cached_listing, etag_for, json_response, not_modified
+from queries import load_workflow, visible_workflows
+from workflow_store import StaleWorkflowError, bump_version, save_graph
+from run_queue import run_to_dict
+from workflow_executor import POOL_KINDS
 
 workflow_bp = Blueprint("workflows", __name__)
 
 
 @workflow_bp.route("/workflows", methods=["GET"])
 def get_workflows():
-    """Return all workflows visible to the current user."""
+    """Return one page of the workflows visible to the current user."""
     user_id = session.get("user_id")
     if not user_id:
         return jsonify({"error": "Unauthorized"}), 401
 
-    public_wfs = Workflow.query.filter_by(is_public=True).all()
-    private_wfs = Workflow.query.filter_by(user_id=user_id, is_public=False).all()
-    result = [
-        {"id": wf.id, "name": wf.name, "is_public": wf.is_public}
-        for wf in public_wfs + private_wfs
-    ]
-    return jsonify(result), 200
+    return cached_listing(
+        "workflows",
+        user_id,
+        visible_workflows,
+        lambda wf: {"id": wf.id, "name": wf.name, "is_public": wf.is_public},
+    )
 
 
 @workflow_bp.route("/workflows", methods=["POST"])
@@ -34,29 +39,20 @@ def create_workflow():
     data = request.get_json()
     name = data.get("name")
     is_public = data.get("is_public", False)
+    max_parallelism = data.get("max_parallelism")
     if not name:
         return jsonify({"error": "Missing workflow name"}), 400
 
-    wf = Workflow(user_id=user_id, name=name, is_public=is_public)
+    wf = Workflow(
+        user_id=user_id, name=name, is_public=is_public, max_parallelism=max_parallelism
+    )
     db.session.add(wf)
     db.session.commit()
+    current_app.extensions["response_cache"].invalidate("workflows")
     return jsonify({"message": "Workflow created", "workflow_id": wf.id}), 201
 
 
-@workflow_bp.route("/workflows/<int:workflow_id>", methods=["GET"])
-def get_workflow_detail(workflow_id: int):
-    """Retrieve a workflow along with its nodes and edges."""
-    user_id = session.get("user_id")
-    if not user_id:
-        return jsonify({"error": "Unauthorized"}), 401
-
-    wf = Workflow.query.filter_by(id=workflow_id).first()
-    if not wf:
-        return jsonify({"error": "Workflow not found"}), 404
-
-    if (wf.user_id != user_id) and (not wf.is_public):
-        return jsonify({"error": "Forbidden"}), 403
-
+def _workflow_detail(wf: Workflow) -> dict:
     nodes = [
         {
             "id": node.id,
@@ -78,21 +74,60 @@ def get_workflow_detail(workflow_id: int):
         for edge in wf.edges
     ]
 
-    return (
-        jsonify({
-            "id": wf.id,
-            "name": wf.name,
-            "is_public": wf.is_public,
-            "nodes": nodes,
-            "edges": edges,
-        }),
-        200,
-    )
+    return {
+        "id": wf.id,
+        "name": wf.name,
+        "is_public": wf.is_public,
+        "max_parallelism": wf.max_parallelism,
+        "version": wf.version,
+        "nodes": nodes,
+        "edges": edges,
+    }
+
+
+@workflow_bp.route("/workflows/<int:workflow_id>", methods=["GET"])
+def get_workflow_detail(workflow_id: int):
+    """Retrieve a workflow along with its nodes and edges.
+
+    The ETag is derived from the workflow's version, so revalidating with
+    ``If-None-Match`` costs a single-row lookup.
+    """
+    user_id = session.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    meta = db.session.execute(
+        db.select(Workflow.user_id, Workflow.is_public, Workflow.version)
+        .where(Workflow.id == workflow_id)
+    ).first()
+    if not meta:
+        return jsonify({"error": "Workflow not found"}), 404
+
+    if (meta.user_id != user_id) and (not meta.is_public):
+        return jsonify({"error": "Forbidden"}), 403
+
+    etag = etag_for("workflow", workflow_id, meta.version)
+    if etag in request.if_none_match:
+        return not_modified(etag)
+
+    cache = current_app.extensions["response_cache"]
+    key = ("workflows", "detail", workflow_id, meta.version)
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps(_workflow_detail(load_workflow(workflow_id, plan=False))).encode()
+        cache.put(key, body)
+    return json_response(body, etag)
 
 
 @workflow_bp.route("/workflows/<int:workflow_id>", methods=["PUT"])
 def update_workflow(workflow_id: int):
-    """Update a workflow definition."""
+    """Update a workflow definition.
+
+    ``nodes`` and ``edges``, when present, replace the stored nodes and
+    edges respectively; see :func:`workflow_store.save_graph`. A ``version`` other than the stored
+    one is rejected with 409 so concurrent editors cannot overwrite each
+    other.
+    """
     user_id = session.get("user_id")
     if not user_id:
         return jsonify({"error": "Unauthorized"}), 401
@@ -104,43 +139,30 @@ def update_workflow(workflow_id: int):
         return jsonify({"error": "Forbidden"}), 403
 
     data = request.get_json()
+    try:
+        version = bump_version(wf, data.get("version"))
+    except StaleWorkflowError as exc:
+        return jsonify({"error": str(exc), "version": exc.current_version}), 409
+
     wf.name = data.get("name", wf.name)
     wf.is_public = data.get("is_public", wf.is_public)
-
-    WorkflowNode.query.filter_by(workflow_id=wf.id).delete()
-    WorkflowEdge.query.filter_by(workflow_id=wf.id).delete()
-
-    nodes_data = data.get("nodes", [])
-    for nd in nodes_data:
-        node = WorkflowNode(
-            workflow_id=wf.id,
-            node_type_id=nd.get("node_type_id"),
-            x=nd["position"]["x"],
-            y=nd["position"]["y"],
-            width=nd["size"]["width"],
-            height=nd["size"]["height"],
-            config=nd.get("config", ""),
-        )
-        db.session.add(node)
-        db.session.flush()
-    db.session.commit()
-
-    edges_data = data.get("edges", [])
-    for ed in edges_data:
-        edge = WorkflowEdge(
-            workflow_id=wf.id,
-            source_node_id=ed["source"],
-            target_node_id=ed["target"],
-            label=ed.get("label", ""),
-        )
-        db.session.add(edge)
+    wf.max_parallelism = data.get("max_parallelism", wf.max_parallelism)
+
+    id_map = {}
+    if "nodes" in data or "edges" in data:
+        try:
+            id_map = save_graph(wf, data.get("nodes"), data.get("edges"))
+        except ValueError as exc:
+            db.session.rollback()
+            return jsonify({"error": str(exc)}), 400
     db.session.commit()
-    return jsonify({"message": "Workflow updated"}), 200
+    current_app.extensions["response_cache"].invalidate("workflows")
+    return jsonify({"message": "Workflow updated", "version": version, "node_ids": id_map}), 200
 
 
 @workflow_bp.route("/workflows/<int:workflow_id>/run", methods=["POST"])
 def run_workflow(workflow_id: int):
-    """Execute the requested workflow."""
+    """Queue a run of the requested workflow and return its id."""
     user_id = session.get("user_id")
     if not user_id:
         return jsonify({"error": "Unauthorized"}), 401
@@ -152,9 +174,28 @@ def run_workflow(workflow_id: int):
     if (wf.user_id != user_id) and (not wf.is_public):
         return jsonify({"error": "Forbidden"}), 403
 
-    try:
-        result = execute_workflow(wf)
-        return jsonify({"status": "success", "result": result}), 200
-    except Exception as exc:  # pragma: no cover - generic error propagation
-        return jsonify({"status": "failure", "error": str(exc)}), 500
+    # Optional: {"max_parallelism": 4, "pool": "process", "force": true, "wait": true}.
+    data = request.get_json(silent=True) or {}
+    pool_kind = data.get("pool")
+    if pool_kind is not None and pool_kind not in POOL_KINDS:
+        return jsonify({"error": f"Unknown pool {pool_kind!r}"}), 400
 
+    queue = current_app.extensions["run_queue"]
+    run = queue.submit(
+        wf, user_id, data.get("max_parallelism"), pool_kind, bool(data.get("force"))
+    )
+    if not data.get("wait"):
+        return jsonify({"run_id": run.id, "status": run.status}), 202
+
+    # Blocking mode for scripts and tests; long runs should poll /runs/<id>.
+    queue.wait(run.id, data.get("timeout"))
+    db.session.refresh(run)
+    body = run_to_dict(run)
+    if run.status == "succeeded":
+        return jsonify({"status": "success", "run_id": run.id,
+                        "result": body["result"], "timings": body["timings"],
+                        "reused": body["reused"]}), 200
+    if run.status == "failed":
+        return jsonify({"status": "failure", "run_id": run.id, "error": run.error}), 500
+    # Cancelled, or still going when the timeout expired.
+    return jsonify({"run_id": run.id, "status": run.status}), 202
@@ -0,0 +1,163 @@
+"""Saving workflow graphs as a diff against what is stored."""
+
+from __future__ import annotations
+
+from sqlalchemy import delete, insert, or_, update
+
+from database import db
+from execution_plan import compile_plan
+from models import Workflow, WorkflowEdge, WorkflowNode
+
+NODE_FIELDS = ("node_type_id", "x", "y", "width", "height", "config")
+
+
+class StaleWorkflowError(Exception):
+    """The workflow changed since the version the client edited."""
+
+    def __init__(self, current_version: int):
+        super().__init__("Workflow was modified by another save")
+        self.current_version = current_version
+
+
+def _node_row(nd: dict) -> dict:
+    position = nd.get("position") or {}
+    size = nd.get("size") or {}
+    return {
+        "node_type_id": nd.get("node_type_id"),
+        "x": position.get("x", 0.0),
+        "y": position.get("y", 0.0),
+        "width": size.get("width", 200.0),
+        "height": size.get("height", 100.0),
+        "config": nd.get("config", ""),
+    }
+
+
+def bump_version(wf: Workflow, expected: int | None) -> int:
+    """Increment the workflow version, checking ``expected`` if given."""
+    stmt = update(Workflow).where(Workflow.id == wf.id)
+    if expected is not None:
+        stmt = stmt.where(Workflow.version == expected)
+    result = db.session.execute(
+        stmt.values(version=Workflow.version + 1).returning(Workflow.version),
+        execution_options={"synchronize_session": False},
+    )
+    version = result.scalar()
+    if version is None:
+        db.session.rollback()
+        raise StaleWorkflowError(db.session.get(Workflow, wf.id).version)
+    return version
+
+
+def save_graph(wf: Workflow, nodes_data: list[dict] | None,
+               edges_data: list[dict] | None) -> dict[str, int]:
+    """Make the stored nodes and edges of ``wf`` match the payload.
+
+    ``nodes_data`` or ``edges_data`` may be None to keep the stored nodes
+    or edges as they are.
+
+    Nodes whose ``id`` is a stored node of this workflow are updated in
+    place; any other node is inserted and its ``id``, if given, is a
+    temporary client id that edges may reference. Stored nodes missing from
+    the payload are deleted with their edges. Edges are matched on
+    ``(source, target, label)``. Everything runs as bulk statements in the
+    caller's transaction, and the workflow's execution plan is compiled
+    and stored with it. Returns ``{temporary id: new node id}``.
+
+    Raises ValueError when an edge references an unknown node, and
+    :class:`execution_plan.CycleError` (a ValueError) when the graph has a
+    cycle.
+    """
+    stored_nodes = {
+        row.id: row
+        for row in db.session.execute(
+            db.select(WorkflowNode.id, *(getattr(WorkflowNode, f) for f in NODE_FIELDS))
+            .where(WorkflowNode.workflow_id == wf.id)
+        )
+    }
+    stored_edges = {
+        (row.source_node_id, row.target_node_id, row.label or ""): row.id
+        for row in db.session.execute(
+            db.select(WorkflowEdge.id, WorkflowEdge.source_node_id,
+                      WorkflowEdge.target_node_id, WorkflowEdge.label)
+            .where(WorkflowEdge.workflow_id == wf.id)
+        )
+    }
+
+    updates, inserts, temp_ids = [], [], []
+    kept = set() if nodes_data is not None else set(stored_nodes)
+    for nd in nodes_data or ():
+        row = _node_row(nd)
+        node_id = nd.get("id")
+        if isinstance(node_id, int) and node_id in stored_nodes and node_id not in kept:
+            kept.add(node_id)
+            stored = stored_nodes[node_id]
+            if any(getattr(stored, f) != row[f] for f in NODE_FIELDS):
+                updates.append({"id": node_id, **row})
+        else:
+            inserts.append({"workflow_id": wf.id, **row})
+            temp_ids.append(node_id)
+    removed = set(stored_nodes) - kept
+
+    id_map: dict[str, int] = {}
+    new_ids: list[int] = []
+    if inserts:
+        new_ids = db.session.execute(
+            insert(WorkflowNode).returning(WorkflowNode.id, sort_by_parameter_order=True),
+            inserts,
+        ).scalars().all()
+        for temp_id, new_id in zip(temp_ids, new_ids):
+            if temp_id is not None:
+                id_map[str(temp_id)] = new_id
+    if updates:
+        db.session.execute(update(WorkflowNode), updates)
+
+    def resolve(ref) -> int:
+        if isinstance(ref, int) and ref in kept:
+            return ref
+        if ref is not None and str(ref) in id_map:
+            return id_map[str(ref)]
+        raise ValueError(f"Edge references unknown node {ref!r}")
+
+    # New edges are inserted in payload order: edge ids order a node's inputs.
+    wanted, new_edges = set(), []
+    if edges_data is None:
+        wanted = set(stored_edges)
+    for ed in edges_data or ():
+        key = (resolve(ed.get("source")), resolve(ed.get("target")), ed.get("label") or "")
+        if key in wanted:
+            continue
+        wanted.add(key)
+        if key not in stored_edges:
+            source, target, label = key
+            new_edges.append({"workflow_id": wf.id, "source_node_id": source,
+                              "target_node_id": target, "label": label})
+    stale_edges = [edge_id for key, edge_id in stored_edges.items() if key not in wanted]
+
+    if stale_edges:
+        db.session.execute(
+            delete(WorkflowEdge).where(WorkflowEdge.id.in_(stale_edges)),
+            execution_options={"synchronize_session": False},
+        )
+    if removed:
+        db.session.execute(
+            delete(WorkflowEdge).where(
+                or_(WorkflowEdge.source_node_id.in_(removed),
+                    WorkflowEdge.target_node_id.in_(removed))
+            ),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.execute(
+            delete(WorkflowNode).where(WorkflowNode.id.in_(removed)),
+            execution_options={"synchronize_session": False},
+        )
+    if new_edges:
+        db.session.execute(insert(WorkflowEdge), new_edges)
+
+    # Predecessors are ordered by edge id, as when a run loads the graph.
+    edge_rows = db.session.execute(
+        db.select(WorkflowEdge.source_node_id, WorkflowEdge.target_node_id)
+        .where(WorkflowEdge.workflow_id == wf.id)
+        .order_by(WorkflowEdge.id)
+    )
+    wf.plan = compile_plan(sorted(kept | set(new_ids)), edge_rows).to_json()
+    return id_map